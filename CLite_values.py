@@ -1,6 +1,168 @@
 # coding=utf-8
 __author__ = 'vdmine11'
 
+import math
+import operator
+
+import ast
+import errors
+import tokens
+import visitor
+
+# Widths, in bits, of the fixed width integers a program can run with
+INT_WIDTHS = (32, 64)
+INFINITY = float('inf')
+NAN = float('nan')
+
+
+# ######## Operations ############
+
+def wrap(value, bits):
+    """
+    Wrap an integer into the range of a two's complement integer
+    :param value: type - int
+    :param bits: the width of the integer
+    :return: the integer congruent to value modulo 2 ** bits that fits
+             in bits bits; type - int
+    """
+    sign = 1 << (bits - 1)
+    return ((value + sign) & ((1 << bits) - 1)) - sign
+
+
+def build_operations(bits):
+    """
+    Build the operations of fixed width integers and IEEE floats as C
+    computes them: the integer operations wrap around, / and % on two
+    integers truncate towards zero and an integer is converted to a float
+    when the other operand is a float. A float operation never fails: it
+    gives an infinity or a NaN instead. An integer division by zero raises
+    ZeroDivisionError.
+    :param bits: the width of the integers, one of INT_WIDTHS
+    :return: a dictionary { (operator, left type, right type): (function,
+             result type) } of the binary operations, and under
+             (operator, type) the unary minus
+    """
+    sign = 1 << (bits - 1)
+    mask = (1 << bits) - 1
+    modulus = 1 << bits
+
+    def int_plus(left, right):
+        return ((left + right + sign) & mask) - sign
+
+    def int_minus(left, right):
+        return ((left - right + sign) & mask) - sign
+
+    def int_times(left, right):
+        return ((left * right + sign) & mask) - sign
+
+    def int_divide(left, right):
+        quotient = abs(left) // abs(right)
+        if (left < 0) != (right < 0):
+            quotient = -quotient
+        # The smallest integer divided by -1 does not fit and wraps
+        return ((quotient + sign) & mask) - sign
+
+    def int_mod(left, right):
+        remainder = abs(left) % abs(right)
+        return -remainder if left < 0 else remainder
+
+    def int_exp(left, right):
+        if right >= 0:
+            # The power is computed modulo 2 ** bits, so its size, and the
+            # time it takes, do not grow with the exponent
+            return ((pow(left, right, modulus) + sign) & mask) - sign
+        # A negative power of an integer truncates to 0, except for 1 and -1
+        if left == 0:
+            raise ZeroDivisionError("0 cannot be raised to a negative power")
+        if left == 1 or left == -1:
+            return left if right % 2 else 1
+        return 0
+
+    def int_negate(value):
+        return ((sign - value) & mask) - sign
+
+    operations = {
+        (tokens.PLUS, tokens.INT, tokens.INT): (int_plus, tokens.INT),
+        (tokens.MINUS, tokens.INT, tokens.INT): (int_minus, tokens.INT),
+        (tokens.TIMES, tokens.INT, tokens.INT): (int_times, tokens.INT),
+        (tokens.DIVIDE, tokens.INT, tokens.INT): (int_divide, tokens.INT),
+        (tokens.MOD, tokens.INT, tokens.INT): (int_mod, tokens.INT),
+        (tokens.EXPONENT, tokens.INT, tokens.INT): (int_exp, tokens.INT),
+        (tokens.MINUS, tokens.INT): (int_negate, tokens.INT),
+        (tokens.MINUS, tokens.FLOAT): (operator.neg, tokens.FLOAT),
+    }
+    float_operations = {
+        tokens.PLUS: operator.add, tokens.MINUS: operator.sub,
+        tokens.TIMES: operator.mul, tokens.DIVIDE: float_divide,
+        tokens.MOD: float_mod, tokens.EXPONENT: float_exp
+    }
+    # Python converts an int operand of a float operation itself, and the
+    # wrapped integers are small enough to convert exactly
+    for symbol, function in float_operations.items():
+        for left_type, right_type in ((tokens.FLOAT, tokens.FLOAT), (tokens.FLOAT, tokens.INT),
+                                      (tokens.INT, tokens.FLOAT)):
+            operations[symbol, left_type, right_type] = (function, tokens.FLOAT)
+    return operations
+
+
+def float_divide(left, right):
+    """
+    Divide two numbers as IEEE floats
+    :return: type - float
+    """
+    try:
+        return left / right
+    except ZeroDivisionError:
+        if left != left or left == 0:
+            return NAN
+        return math.copysign(INFINITY, left) * math.copysign(1.0, right)
+
+
+def float_mod(left, right):
+    """
+    The remainder of two numbers as IEEE floats, with the sign of left
+    :return: type - float
+    """
+    try:
+        return math.fmod(left, right)
+    except ValueError:
+        return NAN
+
+
+def float_exp(left, right):
+    """
+    Raise a number to a power as IEEE floats
+    :return: type - float
+    """
+    odd = float(right).is_integer() and right % 2 == 1
+    try:
+        return math.pow(left, right)
+    except OverflowError:
+        return -INFINITY if left < 0 and odd else INFINITY
+    except ValueError:
+        # 0 to a negative power is a pole, a negative number to a
+        # fractional power has no real value
+        if left == 0:
+            return math.copysign(INFINITY, left) if odd else INFINITY
+        return NAN
+
+
+_operations = {}
+
+
+def operations_for(bits):
+    """
+    Return the operations of a width, built once
+    :param bits: one of INT_WIDTHS
+    :return: a dictionary made by build_operations()
+    """
+    table = _operations.get(bits)
+    if table is None:
+        table = _operations[bits] = build_operations(bits)
+    return table
+
+
+# ######## Values ############
 
 # Define our own domain of values
 class CliteValue(object):
@@ -34,4 +196,270 @@ class BoolValue(CliteValue):
 
 
 class StructValue(CliteValue):
-    pass
\ No newline at end of file
+    pass
+
+
+# ######## Evaluation ############
+
+class NativeBinaryExpression(object):
+    """
+    A mixin for a binary arithmetic expression evaluated with the
+    operation of its operand types, chosen once before the program runs
+    instead of on every evaluation
+    """
+
+    def __init__(self, expression, operation):
+        super().__init__(expression.left, expression.right, expression.line_number)
+        self.operation = operation
+
+    def eval(self):
+        """
+        A method that evaluates the expression with its operation
+        :return: type - int or float
+        :raise CliteRuntimeError on an integer division by zero
+        """
+        try:
+            return self.operation(self.left.eval(), self.right.eval())
+        except ZeroDivisionError:
+            raise errors.CliteRuntimeError("Division by zero!", self.line_number)
+
+
+class NativePlusExpression(NativeBinaryExpression, ast.BinaryPlusExpression):
+    pass
+
+
+class NativeMinusExpression(NativeBinaryExpression, ast.BinaryMinusExpression):
+    pass
+
+
+class NativeTimesExpression(NativeBinaryExpression, ast.BinaryTimesExpression):
+    pass
+
+
+class NativeDivideExpression(NativeBinaryExpression, ast.BinaryDivideExpression):
+    pass
+
+
+class NativeModExpression(NativeBinaryExpression, ast.BinaryModExpression):
+    pass
+
+
+class NativeExpExpression(NativeBinaryExpression, ast.BinaryExpExpression):
+    pass
+
+
+class NativeIntExpression(NativeBinaryExpression):
+    """
+    A mixin for an integer +, - or * whose result is wrapped only when it
+    is out of range, which is rare, without calling the operation
+    """
+
+    def __init__(self, expression, operation, bits):
+        super().__init__(expression, operation)
+        self.bits = bits
+        self.low = -(1 << (bits - 1))
+        self.high = (1 << (bits - 1)) - 1
+
+
+class NativeIntPlusExpression(NativeIntExpression, ast.BinaryPlusExpression):
+
+    def eval(self):
+        value = self.left.eval() + self.right.eval()
+        if self.low <= value <= self.high:
+            return value
+        return wrap(value, self.bits)
+
+
+class NativeIntMinusExpression(NativeIntExpression, ast.BinaryMinusExpression):
+
+    def eval(self):
+        value = self.left.eval() - self.right.eval()
+        if self.low <= value <= self.high:
+            return value
+        return wrap(value, self.bits)
+
+
+class NativeIntTimesExpression(NativeIntExpression, ast.BinaryTimesExpression):
+
+    def eval(self):
+        value = self.left.eval() * self.right.eval()
+        if self.low <= value <= self.high:
+            return value
+        return wrap(value, self.bits)
+
+
+class NativeNegation(ast.Factor):
+    """
+    A negated factor evaluated with the negation of its type
+    """
+
+    def __init__(self, factor, operation):
+        super().__init__(factor.primary, factor.unary_operator, factor.line_number)
+        self.operation = operation
+
+    def eval(self):
+        return self.operation(self.primary.eval())
+
+
+class ConvertingAssignment(ast.Assignment):
+    """
+    An assignment that converts its value to the type of its variable,
+    as C does: an int stored in a float variable becomes a float, and a
+    float stored in an int variable is truncated towards zero
+    """
+
+    def __init__(self, assignment, conversion):
+        super().__init__(assignment.identifier, assignment.expr, assignment.level,
+                         assignment.program)
+        self.conversion = conversion
+
+    def eval(self):
+        value = self.program.env[self.slot] = self.conversion(self.expr.eval())
+        return value
+
+
+def int_conversion(bits):
+    """
+    Make the conversion of a float to an integer of a width. C leaves the
+    conversion of an infinity, a NaN or a float out of range undefined;
+    like the x86 instructions it gives the smallest integer.
+    :param bits: one of INT_WIDTHS
+    :return: a function of a float that returns an int
+    """
+    low = -(1 << (bits - 1))
+    high = (1 << (bits - 1)) - 1
+
+    def conversion(value):
+        if low <= value <= high:
+            return int(value)
+        return low
+    return conversion
+
+
+# The native class and the operator of each arithmetic class
+NATIVE_CLASSES = {
+    ast.BinaryPlusExpression: (NativePlusExpression, tokens.PLUS),
+    ast.BinaryMinusExpression: (NativeMinusExpression, tokens.MINUS),
+    ast.BinaryTimesExpression: (NativeTimesExpression, tokens.TIMES),
+    ast.BinaryDivideExpression: (NativeDivideExpression, tokens.DIVIDE),
+    ast.BinaryModExpression: (NativeModExpression, tokens.MOD),
+    ast.BinaryExpExpression: (NativeExpExpression, tokens.EXPONENT),
+}
+# The classes that compute an integer operation inline
+NATIVE_INT_CLASSES = {
+    tokens.PLUS: NativeIntPlusExpression,
+    tokens.MINUS: NativeIntMinusExpression,
+    tokens.TIMES: NativeIntTimesExpression,
+}
+# Python computes these float operations as IEEE does, so their nodes
+# are left as they are
+IEEE_OPERATORS = (tokens.PLUS, tokens.MINUS, tokens.TIMES)
+
+
+class NativeArithmetic(visitor.NodeTransformer):
+    """
+    A pass that makes a type checked program compute with fixed width
+    integers and IEEE floats, as a C program would. Every arithmetic node
+    is replaced by a native node that computes the operation of its
+    operand types from operations_for(), chosen here once, so the result
+    of each operation stays in range and a loop that overflows runs in
+    constant time and memory per iteration. Integer literals that do not
+    fit are wrapped. The values stay Python ints and floats.
+    As in C, / and % on two integers truncate towards zero, so 7 / 2 is 3
+    and -7 % 2 is -1, and an assignment converts its value to the type
+    of its variable.
+    The pass runs before the optimizer, which folds native nodes with
+    their own operation. Only the tree walking evaluator runs native nodes;
+    the compiling back ends would treat them as the plain ones.
+    """
+
+    def __init__(self, program, bits):
+        if bits not in INT_WIDTHS:
+            raise ValueError("Integers are {0} bits wide, not {1}".
+                             format(" or ".join(map(str, INT_WIDTHS)), bits))
+        self.program = program
+        self.bits = bits
+        self.operations = operations_for(bits)
+        self.replaced = 0
+
+    def apply(self):
+        """
+        Replace the arithmetic of the program in place
+        :return: the ast.Program object
+        """
+        return self.transform(self.program)
+
+    def native(self, native_node, node, clite_type):
+        native_node.checked = node.checked
+        native_node.clite_type = clite_type
+        self.replaced += 1
+        return native_node
+
+    def visit_BinaryNumericalExpression(self, node):
+        self.generic_visit(node)
+        native_class, symbol = NATIVE_CLASSES.get(type(node), (None, None))
+        entry = self.operations.get((symbol, getattr(node.left, 'clite_type', None),
+                                     getattr(node.right, 'clite_type', None)))
+        if not node.checked or entry is None:
+            return node
+        operation, result_type = entry
+        if result_type == tokens.INT and symbol in NATIVE_INT_CLASSES:
+            return self.native(NATIVE_INT_CLASSES[symbol](node, operation, self.bits), node,
+                               result_type)
+        if result_type == tokens.FLOAT and symbol in IEEE_OPERATORS:
+            return node
+        # int / int truncates to an int here, though the type checker
+        # gives it the float type of the Python division
+        return self.native(native_class(node, operation), node, result_type)
+
+    def visit_Factor(self, node):
+        self.generic_visit(node)
+        if not node.checked:
+            return node
+        if not node.unary_operator:
+            # The primary may be a division that became an int
+            node.clite_type = node.primary.clite_type
+            return node
+        if node.unary_operator != tokens.MINUS:
+            return node
+        entry = self.operations.get((tokens.MINUS, node.primary.clite_type))
+        if entry is None:
+            return node
+        return self.native(NativeNegation(node, entry[0]), node, entry[1])
+
+    def visit_Assignment(self, node):
+        self.generic_visit(node)
+        expression_type = getattr(node.expr, 'clite_type', None)
+        variable_type = self.program.decls.get(node.identifier)
+        if not node.expr.checked or expression_type == variable_type:
+            return node
+        if variable_type == tokens.FLOAT and expression_type == tokens.INT:
+            conversion = float
+        elif variable_type == tokens.INT and expression_type == tokens.FLOAT:
+            conversion = int_conversion(self.bits)
+        else:
+            return node
+        self.replaced += 1
+        return ConvertingAssignment(node, conversion)
+
+    def visit_IntLitExpression(self, node):
+        value = int(node.intlit)
+        if wrap(value, self.bits) == value:
+            return node
+        constant = ast.ConstantExpression(wrap(value, self.bits), tokens.INT, node.line_number)
+        constant.checked = True
+        return constant
+
+    def visit_Primary(self, node):
+        return node
+
+
+def apply(program, bits):
+    """
+    A convenience function that makes a program compute with fixed width
+    integers
+    :param program: a type checked ast.Program
+    :param bits: the width of the integers, one of INT_WIDTHS
+    :return: the ast.Program object
+    """
+    return NativeArithmetic(program, bits).apply()
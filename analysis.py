@@ -0,0 +1,140 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/22/2015
+"""
+import ast
+
+
+class DefiniteAssignment(object):
+    """
+    A definite-assignment analysis over an ast.Program.
+    An identifier read is safe when every path from the start of the program
+    to the read assigns the variable first; such a read can never raise the
+    "not defined" CliteRuntimeError. The analysis collects the reads that are
+    not provably safe, so back ends only need to emit checks for those.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        # ids of the ast.IdentifierExpression nodes that need a check
+        self.unsafe_reads = set()
+
+    def analyse(self):
+        """
+        Run the analysis
+        :return: a set with the id() of every IdentifierExpression that
+                 may read an undefined variable
+        """
+        assigned = frozenset()
+        for statement in self.program.stmts:
+            assigned = self.visit_statement(statement, assigned)
+        return self.unsafe_reads
+
+    def visit_statement(self, node, assigned):
+        """
+        Analyse a statement
+        :param node: an ast.Statement object
+        :param assigned: the variables definitely assigned before node
+        :return: the variables definitely assigned after node
+        """
+        if isinstance(node, ast.Assignment):
+            self.reads(node.expr, assigned)
+            return assigned | {node.identifier}
+        elif isinstance(node, ast.Block):
+            for statement in node.statements:
+                assigned = self.visit_statement(statement, assigned)
+            return assigned
+        elif isinstance(node, ast.IfStatement):
+            self.reads(node.expression, assigned)
+            after_if = self.visit_statement(node.if_statement, assigned)
+            if node.else_statement:
+                return after_if & self.visit_statement(node.else_statement, assigned)
+            return assigned
+        elif isinstance(node, ast.WhileStatement):
+            # The body may run zero times
+            self.reads(node.expression, assigned)
+            self.visit_statement(node.statement, assigned)
+            return assigned
+        elif isinstance(node, ast.HoistedLoop):
+            return self.visit_statement(node.loop, assigned)
+        elif isinstance(node, ast.PrintStatement):
+            self.reads(node.expression, assigned)
+        return assigned
+
+    def reads(self, expression, assigned):
+        """
+        Record the unsafe identifier reads in an expression
+        :param expression: an ast.Expression object
+        :param assigned: the variables definitely assigned at this point
+        :return: None
+        """
+        for node in identifiers(expression):
+            if node.identifier not in assigned:
+                self.unsafe_reads.add(id(node))
+
+
+def children(expression):
+    """
+    Return the direct sub-expressions of an expression
+    :param expression: an ast.Expression object
+    :return: type - tuple
+    """
+    if isinstance(expression, ast.BinaryExpression):
+        return expression.left, expression.right
+    elif isinstance(expression, ast.Factor):
+        return expression.primary,
+    elif isinstance(expression, ast.LoopInvariantExpression):
+        return expression.expression,
+    return ()
+
+
+def identifiers(expression):
+    """
+    Yield every IdentifierExpression in an expression, in the order the
+    tree walker evaluates them
+    :param expression: an ast.Expression object
+    """
+    stack = [expression]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.IdentifierExpression):
+            yield node
+        else:
+            stack.extend(reversed(children(node)))
+
+
+def assigned_variables(statement):
+    """
+    Return the variables that a statement may assign, looking into
+    nested blocks, if statements and loops
+    :param statement: an ast.Statement object
+    :return: a set of identifiers
+    """
+    assigned = set()
+    stack = [statement]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Assignment):
+            assigned.add(node.identifier)
+        elif isinstance(node, ast.Block):
+            stack.extend(node.statements)
+        elif isinstance(node, ast.IfStatement):
+            stack.append(node.if_statement)
+            if node.else_statement:
+                stack.append(node.else_statement)
+        elif isinstance(node, ast.WhileStatement):
+            stack.append(node.statement)
+        elif isinstance(node, ast.HoistedLoop):
+            stack.append(node.loop)
+    return assigned
+
+
+def unsafe_reads(program):
+    """
+    A convenience function that runs the DefiniteAssignment analysis
+    :param program: an ast.Program object
+    :return: a set of ids of IdentifierExpression nodes
+    """
+    return DefiniteAssignment(program).analyse()
@@ -7,27 +7,56 @@ Date: 03/28/2015
 import sys
 
 import errors
+import output
 import tokens
 
 
 class Program(object):
     """
     A Class that represents the program.
+    Every declared variable is given a slot, an index into the env list
+    of the program, when the program is parsed; identifiers and
+    assignments read and write their slot instead of looking their name
+    up. The environment belongs to the Program object, so several
+    programs can be parsed and run in one process.
     """
-    env = {}
-    decls = {}
 
     # Number of leading spaces added at each level
     INDENT_SIZE = 4
 
     def __init__(self, decls, level):
         # decls is a dictionary of the form { 'identifier': 'type_name' }
-        Program.decls = decls
+        self.decls = decls
         self.level = level
+        # slots is a dictionary of the form { 'identifier': index }
+        self.slots = {}
+        self.env = []
+        # Print statements write to the output sink of their program
+        self.output = output.BufferedSink()
+        # The limits.ResourceLimits the program runs under, if any
+        self.limits = None
 
         # Add each declaration to the environment
         for declaration in decls:
-            Program.env[declaration] = None
+            self.declare(declaration)
+
+    def declare(self, identifier):
+        """
+        A method that gives a declared identifier a slot
+        :param identifier: type(identifier) is a string
+        :return: the slot of the identifier; type - int
+        """
+        if identifier not in self.slots:
+            self.slots[identifier] = len(self.env)
+            self.env.append(None)
+        return self.slots[identifier]
+
+    def environment(self):
+        """
+        Return the values of the declared variables
+        :return: a dictionary of the form { identifier: value }
+        """
+        return {identifier: self.env[slot] for identifier, slot in self.slots.items()}
 
     def add_statements(self, statements):
         """
@@ -48,8 +77,8 @@ class Program(object):
         # Add main method code and opening brace to string
         string = "int main() {"
         # Add declarations to string
-        for d in Program.decls:
-            string += "\n{0}{1} {2};".format(spaces, Program.decls[d], d)
+        for d in self.decls:
+            string += "\n{0}{1} {2};".format(spaces, self.decls[d], d)
         # Add statements to string
         for statement in self.stmts:
             string += statement.__str__()
@@ -58,6 +87,24 @@ class Program(object):
 
         return string
 
+    def execute(self):
+        """
+        A method that evaluates all statements in the Program object and
+        lets any error propagate to the caller.
+        :return None
+        :raise CliteTypeError or CliteRuntimeError
+        """
+        # Every run starts with undefined variables
+        self.env[:] = [None] * len(self.env)
+        if self.limits is not None:
+            self.limits.start()
+        try:
+            for statement in self.stmts:
+                statement.eval()
+        finally:
+            # The output comes before any error message
+            self.output.flush()
+
     def eval(self):
         """
         A method that evaluates all statements in the Program object.
@@ -66,8 +113,7 @@ class Program(object):
         :return None
         """
         try:
-            for statement in self.stmts:
-                statement.eval()
+            self.execute()
         except errors.CliteTypeError as e:
             print(e)
             sys.exit(0)
@@ -82,7 +128,9 @@ class Statement(object):
     """
     A base class that represents a statement.
     """
-    pass
+    # Names of the attributes that hold the child nodes or lists of
+    # child nodes; passes walk the tree through them
+    child_fields = ()
 
 
 class IfStatement(Statement):
@@ -90,6 +138,7 @@ class IfStatement(Statement):
     A class that represents an IfStatement object.
     Inherits the Statement base class.
     """
+    child_fields = ('expression', 'if_statement', 'else_statement')
 
     def __init__(self, expression, if_stmt, else_stmt, level):
         super().__init__()
@@ -131,6 +180,7 @@ class WhileStatement(Statement):
     A class that represents a WhileStatement object.
     Inherits the Statement base class.
     """
+    child_fields = ('expression', 'statement')
 
     def __init__(self, expression, statement, level):
         super().__init__()
@@ -164,11 +214,13 @@ class PrintStatement(Statement):
     A class that represents a PrintStatement object.
     Inherits the Statement base class.
     """
+    child_fields = ('expression',)
 
-    def __init__(self, expression, level):
+    def __init__(self, expression, level, program):
         super().__init__()
         self.expression = expression
         self.level = level
+        self.program = program
 
     def __str__(self):
         """
@@ -183,10 +235,10 @@ class PrintStatement(Statement):
     def eval(self):
         """
         A method that prints the evaluated expression in the
-        PrintStatement object
+        PrintStatement object to the output sink of the program
         :return: None
         """
-        print(self.expression.eval())
+        self.program.output.write(self.expression.eval())
         return None
 
 
@@ -195,12 +247,15 @@ class Assignment(Statement):
     A class that represents an Assignment statement.
     Inherits the Statement base class.
     """
+    child_fields = ('expr',)
 
-    def __init__(self, identifier, expr, level):
+    def __init__(self, identifier, expr, level, program):
         super().__init__()
         self.identifier = identifier
         self.expr = expr
         self.level = level
+        self.program = program
+        self.slot = program.slots[identifier]
 
     def __str__(self):
         """
@@ -215,8 +270,8 @@ class Assignment(Statement):
         A method that evaluates an identifier to its corresponding value
         :return a value of the identifier's type
         """
-        Program.env[self.identifier] = self.expr.eval()
-        return Program.env[self.identifier]
+        value = self.program.env[self.slot] = self.expr.eval()
+        return value
 
 
 class Semicolon(Statement):
@@ -251,6 +306,7 @@ class Block(Statement):
     A class that represents a block.
     Inherits the Statement base class.
     """
+    child_fields = ('statements',)
 
     def __init__(self, statements, level):
         super().__init__()
@@ -278,13 +334,49 @@ class Block(Statement):
             statement.eval()
 
 
+class HoistedLoop(Statement):
+    """
+    A class that represents a while statement together with the loop
+    invariant expressions that were moved out of it.
+    Inherits the Statement base class.
+    """
+    child_fields = ('loop', 'invariants')
+
+    def __init__(self, loop, invariants):
+        super().__init__()
+        self.loop = loop
+        self.invariants = invariants
+        self.level = loop.level
+
+    def __str__(self):
+        """
+        Return the string representation of a HoistedLoop object, which
+        is the one of the loop
+        :return: type - string
+        """
+        return self.loop.__str__()
+
+    def eval(self):
+        """
+        A method that prepares the invariants and evaluates the loop
+        :return None
+        """
+        for invariant in self.invariants:
+            invariant.reset()
+        self.loop.eval()
+
+
 # ######## Expressions ############
 
 class Expression(object):
     """
     A base class that represents an expression.
     """
-    pass
+    # Set to True by the TypeChecker once the types of the expression
+    # have been validated, so eval() can skip the run-time checks
+    checked = False
+    # Names of the attributes that hold the child nodes
+    child_fields = ()
 
 
 class BinaryExpression(Expression):
@@ -292,6 +384,7 @@ class BinaryExpression(Expression):
     A base class that represents a binary expression.
     Inherits the Expression base class.
     """
+    child_fields = ('left', 'right')
 
     def __init__(self, left, right, line_number=-1):
         super().__init__()
@@ -360,18 +453,62 @@ class BinaryBoolExpression(BinaryExpression):
     Inherits the BinaryExpression base class.
     """
 
-    def type(self):
+    @staticmethod
+    def type():
         """
-        A method that returns the type of Clite value of a Binary Expression
+        A method that returns the type of Clite value of a Binary Expression.
+        A comparison or a logical operation is a bool whatever its operands
+        are; they are checked when the expression is evaluated.
         :return: string
         """
-        left_type = self.left.type()
-        right_type = self.right.type()
+        return tokens.BOOL
 
-        if left_type == tokens.BOOL or right_type == tokens.BOOL:
-            raise errors.CliteTypeError("Incompatible types")
-        else:
-            return tokens.BOOL
+
+class BinaryLogicalExpression(BinaryBoolExpression):
+    """
+    A base class for the short-circuit operators || and &&. The right
+    operand is evaluated only when the left one does not decide the
+    result, and then its type is checked only then.
+    Inherits the BinaryBoolExpression base class.
+    """
+    # The value of the left operand that decides the result
+    decisive = None
+
+    def __init__(self, left, right, line_number=-1):
+        super().__init__(left, right, line_number)
+        # Set once the type of an operand has been found to be bool by
+        # an unchecked evaluation
+        self.left_valid = False
+        self.right_valid = False
+
+    def validate_operand(self, operand):
+        """
+        A method that checks that an operand is a bool
+        :param operand: self.left or self.right
+        :return: None
+        :raise CliteTypeError if the operand is not a bool
+        """
+        if operand.type() != tokens.BOOL:
+            raise errors.CliteTypeError(line=self.line_number,
+                                        type1=self.left.type(), type2=self.right.type())
+
+    def eval_unchecked(self):
+        """
+        A method that evaluates the expression with the types of the
+        operands checked as they are reached, each one once
+        :return: type - bool
+        :raise CliteTypeError if an evaluated operand is not a bool
+        """
+        if not self.left_valid:
+            self.validate_operand(self.left)
+            self.left_valid = True
+        left = self.left.eval()
+        if left is self.decisive:
+            return left
+        if not self.right_valid:
+            self.validate_operand(self.right)
+            self.right_valid = True
+        return self.right.eval()
 
 
 class BinaryNumericalExpression(BinaryExpression):
@@ -398,36 +535,39 @@ class BinaryNumericalExpression(BinaryExpression):
             return left_type
 
 
-class Conjunction(BinaryBoolExpression):
+class Conjunction(BinaryLogicalExpression):
     """
     A class that represents a conjunction expression.
-    Inherits the Expression base class.
+    Inherits the BinaryLogicalExpression base class.
     """
+    decisive = True
 
     def __str__(self):
         """
         Return the string representation of a Conjunction object
         :return: type - string
         """
-        super().str(tokens.OR)
+        return super().str(tokens.OR)
 
     def eval(self):
         """
-        A method that evaluates a Conjunction expression if the
-        expression is valid
+        A method that evaluates a Conjunction expression; the right
+        operand is not evaluated when the left one is true
         :return an evaluated boolean expression; type - bool
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_boolean_expression()
+        if not self.checked:
+            return self.eval_unchecked()
         return self.left.eval() or self.right.eval()
 
 
-class Equality(BinaryBoolExpression):
+class Equality(BinaryLogicalExpression):
     """
     A class that represents an equality relation expression.
-    Inherits the Expression base class.
+    Inherits the BinaryLogicalExpression base class.
     """
+    decisive = False
 
     def __str__(self):
         """
@@ -438,13 +578,14 @@ class Equality(BinaryBoolExpression):
 
     def eval(self):
         """
-        A method that evaluates an Equality expression if the
-        expression is valid
+        A method that evaluates an Equality expression; the right operand
+        is not evaluated when the left one is false
         :return an evaluated boolean expression; type - bool
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_boolean_expression()
+        if not self.checked:
+            return self.eval_unchecked()
         return self.left.eval() and self.right.eval()
 
 
@@ -469,7 +610,8 @@ class BinaryEqualOpExpression(BinaryBoolExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_type_compatibility()
+        if not self.checked:
+            self.validate_type_compatibility()
         return self.left.eval() == self.right.eval()
 
 
@@ -493,7 +635,8 @@ class BinaryNotEqualOpExpression(BinaryBoolExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_type_compatibility()
+        if not self.checked:
+            self.validate_type_compatibility()
         return self.left.eval() != self.right.eval()
 
 
@@ -517,7 +660,8 @@ class BinaryLessExpression(BinaryBoolExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() < self.right.eval()
 
 
@@ -541,7 +685,8 @@ class BinaryLessEqualExpression(BinaryBoolExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() <= self.right.eval()
 
 
@@ -565,7 +710,8 @@ class BinaryGreaterExpression(BinaryBoolExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() > self.right.eval()
 
 
@@ -590,7 +736,8 @@ class BinaryGreaterEqualExpression(BinaryBoolExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() >= self.right.eval()
 
 
@@ -622,7 +769,8 @@ class BinaryPlusExpression(BinaryAddOpExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() + self.right.eval()
 
 
@@ -647,7 +795,8 @@ class BinaryMinusExpression(BinaryAddOpExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() - self.right.eval()
 
 
@@ -671,7 +820,8 @@ class BinaryTimesExpression(BinaryNumericalExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() * self.right.eval()
 
 
@@ -688,6 +838,15 @@ class BinaryDivideExpression(BinaryNumericalExpression):
         """
         return super().str(tokens.DIVIDE)
 
+    def type(self):
+        """
+        A method that returns the type of Clite value of a division, a
+        float also for two ints, as / computes it
+        :return: string
+        """
+        super().type()
+        return tokens.FLOAT
+
     def eval(self):
         """
         A method that evaluates a binary division expression
@@ -695,7 +854,8 @@ class BinaryDivideExpression(BinaryNumericalExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() / self.right.eval()
 
 
@@ -719,7 +879,8 @@ class BinaryModExpression(BinaryNumericalExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() % self.right.eval()
 
 
@@ -745,7 +906,8 @@ class BinaryExpExpression(BinaryNumericalExpression):
         :raise CliteTypeError raised when an operation is applied to an
                object of inappropriate type
         """
-        self.validate_numerical_expression()
+        if not self.checked:
+            self.validate_numerical_expression()
         return self.left.eval() ** self.right.eval()
 
 
@@ -754,6 +916,7 @@ class Factor(Expression):
     A class that represents a factor where Factor -> [ UnaryOp ] Primary.
     Inherits the Expression base class
     """
+    child_fields = ('primary',)
 
     def __init__(self, primary, unary_operator, line_number):
         self.primary = primary
@@ -789,6 +952,11 @@ class Factor(Expression):
         if not self.unary_operator:
             return self.primary.eval()
 
+        if self.checked:
+            if self.unary_operator == tokens.NOT:
+                return not self.primary.eval()
+            return - self.primary.eval()
+
         primary_type = self.primary.type()
 
         if (self.unary_operator != tokens.NOT and primary_type == tokens.BOOL) or \
@@ -804,6 +972,56 @@ class Factor(Expression):
             return - self.primary.eval()
 
 
+class LoopInvariantExpression(Expression):
+    """
+    A class that represents an expression whose value does not change
+    while a loop runs. An eager invariant is evaluated once before the
+    loop by HoistedLoop; it can raise no error. Any other invariant is
+    evaluated where it is first used in the loop and remembered, so a loop
+    that never uses it never evaluates it, and a read of an undefined
+    variable still fails where it is written.
+    Inherits the Expression base class.
+    """
+    child_fields = ('expression',)
+
+    def __init__(self, expression, eager):
+        self.expression = expression
+        self.eager = eager
+        self.value = None
+
+    def __str__(self):
+        """
+        Return the string representation of a LoopInvariantExpression
+        :return: type - string
+        """
+        return self.expression.__str__()
+
+    def type(self):
+        """
+        A method that returns the type of the invariant expression
+        :return: type - string
+        """
+        return self.expression.type()
+
+    def reset(self):
+        """
+        A method called each time the loop is entered
+        :return: None
+        """
+        self.value = self.expression.eval() if self.eager else None
+
+    def eval(self):
+        """
+        A method that returns the value of the invariant expression,
+        evaluating it the first time it is needed
+        :return: type - int, float or boolean
+        """
+        value = self.value
+        if value is None:
+            value = self.value = self.expression.eval()
+        return value
+
+
 class Primary(Expression):
     """
     A base class that represents a Primary expression
@@ -818,10 +1036,12 @@ class IdentifierExpression(Primary):
     Inherits the Primary base class.
     """
 
-    def __init__(self, identifier, line_number):
+    def __init__(self, identifier, line_number, program):
         super().__init__()
         self.identifier = identifier
         self.line_number = line_number
+        self.program = program
+        self.slot = program.slots[identifier]
 
     def __str__(self):
         """
@@ -835,7 +1055,7 @@ class IdentifierExpression(Primary):
         A method that returns the type of a Clite IdentifierExpression
         :return: type - string
         """
-        return Program.decls[self.identifier]
+        return self.program.decls[self.identifier]
 
     def eval(self):
         """
@@ -844,10 +1064,11 @@ class IdentifierExpression(Primary):
         :return: type - int
         :raise CliteRuntimeError when identifier is not defined
         """
-        if Program.env[self.identifier] is None:
+        value = self.program.env[self.slot]
+        if value is None:
             raise errors.CliteRuntimeError(self.identifier + " not defined!",
                                            self.line_number)
-        return Program.env[self.identifier]
+        return value
 
 
 class Number(Primary):
@@ -887,20 +1108,15 @@ class IntLitExpression(Number):
     def eval(self):
         """
         A method that evaluates an IntLitExpression object and
-        returns the result of type int. If the past argument throws a
-        ValueError when trying to convert it to an integer,
-        the program is terminated.
+        returns the result of type int.
         :return: type - int
-        :raise ValueError is raised when an inappropriate value is passed
+        :raise CliteRuntimeError when the literal is not an integer
         """
         try:
-            number = int(self.intlit)
+            return int(self.intlit)
         except ValueError:
-            print("Invalid literal for an integer with "
-                  "base 10 at line {}!".format(self.line_number))
-            sys.exit(0)
-        else:
-            return number
+            raise errors.CliteRuntimeError("Invalid literal for an integer with base 10!",
+                                           self.line_number)
 
 
 class RealNumberExpression(Number):
@@ -932,20 +1148,15 @@ class RealNumberExpression(Number):
     def eval(self):
         """
         A method that evaluates a RealNumberExpression object and
-        returns the result of type float. If the past argument throws a
-        ValueError when trying to convert it to a float,
-        the program is terminated.
+        returns the result of type float.
         :return: type - float
-        :raise ValueError is raised when an inappropriate value is passed
+        :raise CliteRuntimeError when the literal is not a number
         """
         try:
-            number = float(self.real_number)
+            return float(self.real_number)
         except ValueError:
-            print("Invalid literal for a float at line {}!".
-                  format(self.line_number))
-            sys.exit(0)
-        else:
-            return number
+            raise errors.CliteRuntimeError("Invalid literal for a float!",
+                                           self.line_number)
 
 
 class BooleanExpression(Primary):
@@ -1003,4 +1214,42 @@ class FalseExpression(BooleanExpression):
         returns the result of type boolean
         :return: type - boolean
         """
-        return False
\ No newline at end of file
+        return False
+
+
+class ConstantExpression(Primary):
+    """
+    A class that represents a value computed before evaluation, such as
+    a literal whose text has already been converted or a constant
+    subexpression folded by the optimizer.
+    Inherits the Primary base class.
+    """
+
+    def __init__(self, value, clite_type, line_number=-1):
+        super().__init__()
+        self.value = value
+        self.clite_type = clite_type
+        self.line_number = line_number
+
+    def __str__(self):
+        """
+        Return the string representation of a ConstantExpression
+        :return: type - string
+        """
+        if isinstance(self.value, bool):
+            return tokens.TRUE if self.value else tokens.FALSE
+        return str(self.value)
+
+    def type(self):
+        """
+        A method that returns the type of a Clite ConstantExpression
+        :return: type - string
+        """
+        return self.clite_type
+
+    def eval(self):
+        """
+        A constant evaluates to its stored value.
+        :return: type - int, float or boolean
+        """
+        return self.value
@@ -0,0 +1,191 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/06/2015
+"""
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import sys
+import time
+
+import CLite_values
+import interpreter
+import limits
+
+# Extension of the Clite sources picked from a directory
+SOURCE_EXTENSION = ".c"
+
+# The Interpreter of a worker process, made once by start_worker()
+_worker_interpreter = None
+
+
+def get_arguments(argv):
+    """
+    A function that parses the arguments of 'clite batch'
+    :param argv: the arguments after 'batch'
+    :return: an argparse.Namespace
+    """
+    arg_parser = argparse.ArgumentParser(prog="clite batch",
+                                         description="Run many Clite programs over "
+                                                     "a pool of worker processes.")
+    arg_parser.add_argument("sources", nargs="*",
+                            help="Clite files, directories of .c files or glob patterns")
+    arg_parser.add_argument("--manifest", metavar="FILE",
+                            help="a file that lists one source per line")
+    arg_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                            help="number of worker processes (default: %(default)s)")
+    arg_parser.add_argument("--report", metavar="FILE",
+                            help="write the JSON Lines report to FILE instead of "
+                                 "the standard output")
+    arg_parser.add_argument("--backend", choices=interpreter.BACKENDS,
+                            default=interpreter.TREE,
+                            help="the back end that runs the programs (default: %(default)s)")
+    arg_parser.add_argument("-O", "--optimize", action="store_true",
+                            help="optimize the programs before they are run")
+    arg_parser.add_argument("--int-bits", type=int, choices=CLite_values.INT_WIDTHS,
+                            help="compute with wrapping integers of this many bits")
+    arg_parser.add_argument("--fuse", action="store_true",
+                            help="evaluate common comparisons as single fused nodes")
+    limits.add_arguments(arg_parser)
+    arguments = arg_parser.parse_args(argv)
+    if arguments.workers < 1:
+        arg_parser.error("at least one worker is needed")
+    try:
+        arguments.limits = limits.from_arguments(arguments)
+    except ValueError as error:
+        arg_parser.error(str(error))
+    if arguments.limits and arguments.backend != interpreter.TREE:
+        arg_parser.error("resource limits are only checked by the tree walking evaluator")
+    if arguments.int_bits and arguments.backend != interpreter.TREE:
+        arg_parser.error("fixed width integers are only supported by the tree walking "
+                         "evaluator")
+    if arguments.fuse and arguments.backend != interpreter.TREE:
+        arg_parser.error("fused nodes are only evaluated by the tree walking evaluator")
+    if arguments.int_bits and arguments.max_int_bits:
+        arg_parser.error("--max-int-bits cannot be used with --int-bits")
+    if not arguments.sources and not arguments.manifest:
+        arg_parser.error("no sources given")
+    return arguments
+
+
+def collect_sources(patterns, manifest=None):
+    """
+    Expand the command line sources into a list of files. A directory
+    gives its .c files, a glob pattern the files it matches, and a
+    manifest one file per non-empty line that is not a # comment;
+    manifest lines are relative to the manifest.
+    :param patterns: a list of files, directories and glob patterns
+    :param manifest: the name of a manifest file [optional]
+    :return: a list of file names in the given order, without duplicates
+    """
+    if manifest is not None:
+        base = os.path.dirname(manifest)
+        with open(manifest) as manifest_file:
+            lines = [line.strip() for line in manifest_file]
+        patterns = list(patterns) + [os.path.join(base, line) for line in lines
+                                     if line and not line.startswith("#")]
+    sources = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            sources.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                  if name.endswith(SOURCE_EXTENSION)))
+        elif glob.has_magic(pattern):
+            sources.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            sources.append(pattern)
+    return list(dict.fromkeys(sources))
+
+
+def start_worker(backend, optimize, resource_limits=None, int_bits=None, fuse=False):
+    """
+    Called once in every worker process: the modules are imported and the
+    Interpreter is made here, so that the cost is paid once per worker
+    and not once per program
+    """
+    global _worker_interpreter
+    _worker_interpreter = interpreter.Interpreter(backend, optimize, resource_limits, int_bits,
+                                                  fuse)
+
+
+def run_source(filename):
+    """
+    Run one program in a worker
+    :param filename: the name of a Clite source file
+    :return: a dictionary with the file name, whether it succeeded, its
+             output, its errors and the time it took in seconds
+    """
+    start = time.perf_counter()
+    try:
+        with open(filename, 'rb') as source_file:
+            source = source_file.read()
+        result = _worker_interpreter.run(source, filename)
+        output_text, error_list = result.output, [str(error) for error in result.errors]
+    except Exception as error:
+        # A program that crashes the interpreter must not stop the batch
+        output_text, error_list = "", ["{0}: {1}".format(type(error).__name__, error)]
+    return {"file": filename, "ok": not error_list, "stdout": output_text,
+            "errors": error_list, "seconds": round(time.perf_counter() - start, 6)}
+
+
+def run_batch(sources, workers, backend=interpreter.TREE, optimize=False,
+              resource_limits=None, int_bits=None, fuse=False):
+    """
+    Run programs over a pool of worker processes
+    :param sources: a list of file names
+    :param workers: the number of worker processes; with 1 the programs
+                    run in this process
+    :param backend: one of interpreter.BACKENDS
+    :param optimize: optimize the programs before they are run
+    :param resource_limits: a limits.ResourceLimits object every program
+                            runs under [optional]
+    :param int_bits: the width of the integers of every program [optional]
+    :param fuse: evaluate the programs with fused nodes
+    :return: an iterator over the reports of run_source(), in the order of
+             sources
+    """
+    if workers == 1:
+        start_worker(backend, optimize, resource_limits, int_bits, fuse)
+        for source in sources:
+            yield run_source(source)
+        return
+    initargs = (backend, optimize, resource_limits, int_bits, fuse)
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=start_worker,
+                                                initargs=initargs) as executor:
+        # Small programs are sent in chunks to cut the cost of each round trip
+        chunk_size = max(1, len(sources) // (workers * 8))
+        for report in executor.map(run_source, sources, chunksize=chunk_size):
+            yield report
+
+
+def main(argv):
+    """
+    The entry point of 'clite batch'
+    :param argv: the arguments after 'batch'
+    :return: the exit status; 1 if a program failed
+    """
+    arguments = get_arguments(argv)
+    try:
+        sources = collect_sources(arguments.sources, arguments.manifest)
+    except IOError as error:
+        print(error, file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    failed = 0
+    report = open(arguments.report, 'w') if arguments.report else sys.stdout
+    try:
+        for entry in run_batch(sources, min(arguments.workers, max(1, len(sources))),
+                               arguments.backend, arguments.optimize, arguments.limits,
+                               arguments.int_bits, arguments.fuse):
+            failed += not entry["ok"]
+            report.write(json.dumps(entry) + "\n")
+    finally:
+        if report is not sys.stdout:
+            report.close()
+    print("{0} programs, {1} failed, {2:.2f}s".format(len(sources), failed,
+                                                     time.perf_counter() - start),
+          file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,395 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/13/2015
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import interpreter
+import lexer
+import output
+from parser import Parser
+
+# Phases of a run, in the order they happen. check includes the
+# optimizer when it is on; compile is the time the back end needs before
+# it runs the program, and eval the time of the run.
+PHASES = ("lex", "parse", "check", "compile", "eval")
+# A phase is a regression when it is slower than the baseline by more
+# than the threshold, given as a fraction, and by more than
+# MIN_DIFFERENCE seconds, which keeps timer noise from being flagged
+DEFAULT_THRESHOLD = 0.10
+MIN_DIFFERENCE = 0.001
+DEFAULT_REPEAT = 5
+
+
+# ######## Workloads ############
+
+def tight_loop(size):
+    """
+    A loop with a little arithmetic in its body
+    :param size: the number of iterations
+    :return: the Clite source; type - string
+    """
+    return """int main() {{
+    int i;
+    int total;
+    float average;
+    i = 0;
+    total = 0;
+    while (i < {0}) {{
+        total = total + i * 3 % 7 - 1;
+        i = i + 1;
+    }}
+    average = 1.0 * total / {0};
+    print(total);
+    print(average);
+}}
+""".format(size)
+
+
+def deep_expression(size):
+    """
+    A loop that evaluates one deeply nested expression
+    :param size: the nesting depth of the expression
+    :return: the Clite source; type - string
+    """
+    expression = "i"
+    for depth in range(size):
+        operator = ("+", "-", "*")[depth % 3]
+        expression = "({0} {1} {2})".format(expression, operator, depth % 5 + 1)
+    return """int main() {{
+    int i;
+    int x;
+    i = 0;
+    x = 0;
+    while (i < 200) {{
+        x = {0} % 1000;
+        i = i + 1;
+    }}
+    print(x);
+}}
+""".format(expression)
+
+
+def many_declarations(size):
+    """
+    A straight line program over many variables
+    :param size: the number of declared variables
+    :return: the Clite source; type - string
+    """
+    lines = ["int main() {"]
+    lines.extend("    int v{0};".format(index) for index in range(size))
+    lines.append("    v0 = 1;")
+    lines.extend("    v{0} = v{1} + {0} % 7;".format(index, index - 1) for index in range(1, size))
+    lines.append("    print(v{0});".format(size - 1))
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def branches(size):
+    """
+    A loop whose body is a chain of if statements
+    :param size: the number of iterations
+    :return: the Clite source; type - string
+    """
+    return """int main() {{
+    int i;
+    int a;
+    int b;
+    bool odd;
+    i = 0;
+    a = 0;
+    b = 0;
+    while (i < {0}) {{
+        odd = i % 2 == 1;
+        if (odd && i % 3 == 0)
+            a = a + 1;
+        else if (!odd || i % 5 == 0) {{
+            if (i % 7 < 3)
+                b = b + 2;
+            else
+                b = b - 1;
+        }}
+        else
+            a = a - 1;
+        i = i + 1;
+    }}
+    print(a);
+    print(b);
+}}
+""".format(size)
+
+
+def prints(size):
+    """
+    A loop that prints a value in every iteration
+    :param size: the number of printed values
+    :return: the Clite source; type - string
+    """
+    return """int main() {{
+    int i;
+    i = 0;
+    while (i < {0}) {{
+        print(i * 2);
+        print(i < 100);
+        i = i + 1;
+    }}
+}}
+""".format(size)
+
+
+def arithmetic(size):
+    """
+    A loop of powers, products and remainders with constant operands
+    :param size: the number of iterations
+    :return: the Clite source; type - string
+    """
+    return """int main() {{
+    int i;
+    int square;
+    int total;
+    i = 0;
+    total = 0;
+    while (i < {0}) {{
+        square = i ** 2;
+        total = (total + square * 4 + i ** 3 % 16) % 1024;
+        i = i + 1;
+    }}
+    print(total);
+}}
+""".format(size)
+
+
+# Generator and default size of each workload
+WORKLOADS = {
+    "tight_loop": (tight_loop, 200000),
+    "deep_expression": (deep_expression, 150),
+    "many_declarations": (many_declarations, 5000),
+    "branches": (branches, 100000),
+    "prints": (prints, 100000),
+    "arithmetic": (arithmetic, 100000),
+}
+
+
+def generate(name, scale=1.0):
+    """
+    Generate the source of a workload
+    :param name: a key of WORKLOADS
+    :param scale: a factor applied to the default size
+    :return: a (size, source) tuple
+    """
+    generator, size = WORKLOADS[name]
+    size = max(1, int(size * scale))
+    return size, generator(size)
+
+
+# ######## Measuring ############
+
+def measure(source, clite_interpreter, repeat=DEFAULT_REPEAT):
+    """
+    Time the phases of a program
+    :param source: the Clite source
+    :param clite_interpreter: an interpreter.Interpreter that selects the
+                              back end and the optimizer
+    :param repeat: the number of runs; the fastest time of each phase is kept
+    :return: a dictionary of the form { phase: seconds }, with the number
+             of tokens under 'tokens'
+    """
+    timer = time.perf_counter
+    best = dict.fromkeys(PHASES, float('inf'))
+    tokens = 0
+    for _ in range(repeat):
+        start = timer()
+        token_stream = lexer.Lexer.from_string(source, "<benchmark>").token_stream()
+        lexed = timer()
+        program = Parser("<benchmark>", token_stream).parse()
+        parsed = timer()
+        type_errors = clite_interpreter.check(program)
+        checked = timer()
+        if type_errors:
+            raise ValueError("The workload is not well typed: {0}".format(type_errors[0]))
+        run, environment = clite_interpreter.prepare(program, output.NullSink())
+        compiled = timer()
+        run()
+        evaluated = timer()
+        tokens = len(token_stream)
+        for phase, seconds in zip(PHASES, (lexed - start, parsed - lexed, checked - parsed,
+                                           compiled - checked, evaluated - compiled)):
+            best[phase] = min(best[phase], seconds)
+    best["tokens"] = tokens
+    return best
+
+
+def run_benchmarks(names, scale=1.0, repeat=DEFAULT_REPEAT, backend=interpreter.TREE,
+                   optimize=False, fuse=False):
+    """
+    Generate and time workloads
+    :param names: a list of keys of WORKLOADS
+    :param scale: a factor applied to the default sizes
+    :param repeat: the number of runs of each workload
+    :param backend: one of interpreter.BACKENDS
+    :param optimize: optimize the programs before they are run
+    :param fuse: evaluate the programs with fused nodes
+    :return: the results as a dictionary that can be dumped as JSON
+    """
+    clite_interpreter = interpreter.Interpreter(backend, optimize, fuse=fuse)
+    results = {}
+    for name in names:
+        size, source = generate(name, scale)
+        results[name] = measure(source, clite_interpreter, repeat)
+        results[name]["size"] = size
+    return {"meta": {"python": platform.python_version(),
+                     "implementation": platform.python_implementation(),
+                     "backend": backend, "optimize": optimize, "fuse": fuse,
+                     "scale": scale, "repeat": repeat},
+            "workloads": results}
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results with a baseline
+    :param results: a dictionary returned by run_benchmarks()
+    :param baseline: a dictionary returned by run_benchmarks() earlier
+    :param threshold: the slowdown, as a fraction, that is a regression
+    :return: a list of (workload, phase, baseline seconds, seconds,
+             regression) tuples for the phases found in both
+    """
+    rows = []
+    for name, phases in sorted(results["workloads"].items()):
+        old_phases = baseline.get("workloads", {}).get(name)
+        if old_phases is None or old_phases.get("size") != phases.get("size"):
+            continue
+        for phase in PHASES:
+            if phase not in old_phases:
+                continue
+            old, new = old_phases[phase], phases[phase]
+            regression = new > old * (1 + threshold) and new - old > MIN_DIFFERENCE
+            rows.append((name, phase, old, new, regression))
+    return rows
+
+
+# ######## Command line ############
+
+def format_results(results):
+    """
+    :param results: a dictionary returned by run_benchmarks()
+    :return: a table of the phase times in milliseconds; type - string
+    """
+    rows = ["{0:<18} {1:>8}".format("Workload", "Tokens") +
+            "".join("{0:>12}".format(phase + " ms") for phase in PHASES)]
+    for name, phases in sorted(results["workloads"].items()):
+        rows.append("{0:<18} {1:>8}".format(name, phases["tokens"]) +
+                    "".join("{0:>12.2f}".format(phases[phase] * 1000) for phase in PHASES))
+    return "\n".join(rows)
+
+
+def format_comparison(rows):
+    """
+    :param rows: a list returned by compare()
+    :return: a table of the changed phases; type - string
+    """
+    lines = ["{0:<18} {1:<8} {2:>12} {3:>12} {4:>8}".
+             format("Workload", "Phase", "Baseline ms", "Current ms", "Change")]
+    for name, phase, old, new, regression in rows:
+        change = (new - old) / old * 100 if old else 0.0
+        lines.append("{0:<18} {1:<8} {2:>12.2f} {3:>12.2f} {4:>+7.1f}%{5}".
+                     format(name, phase, old * 1000, new * 1000, change,
+                            "  REGRESSION" if regression else ""))
+    return "\n".join(lines)
+
+
+def get_arguments(argv):
+    """
+    A function that parses the arguments of 'clite benchmark'
+    :param argv: the arguments after 'benchmark'
+    :return: an argparse.Namespace
+    """
+    arg_parser = argparse.ArgumentParser(prog="clite benchmark",
+                                         description="Time the phases of generated "
+                                                     "Clite workloads.")
+    arg_parser.add_argument("-w", "--workload", action="append", choices=sorted(WORKLOADS),
+                            help="a workload to run; may be repeated (default: all)")
+    arg_parser.add_argument("--scale", type=float, default=1.0,
+                            help="multiply the size of every workload (default: %(default)s)")
+    arg_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                            help="runs of each workload; the fastest is kept "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument("--backend", choices=interpreter.BACKENDS,
+                            default=interpreter.TREE,
+                            help="the back end that runs the programs (default: %(default)s)")
+    arg_parser.add_argument("-O", "--optimize", action="store_true",
+                            help="optimize the programs before they are run")
+    arg_parser.add_argument("--fuse", action="store_true",
+                            help="evaluate common comparisons as single fused nodes")
+    arg_parser.add_argument("--save", metavar="FILE",
+                            help="write the results to FILE as JSON")
+    arg_parser.add_argument("--baseline", metavar="FILE",
+                            help="compare the results with the JSON results in FILE")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="the slowdown, as a fraction, reported as a regression "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument("--emit", metavar="DIRECTORY",
+                            help="write the generated programs to DIRECTORY and exit")
+    arguments = arg_parser.parse_args(argv)
+    if arguments.repeat < 1:
+        arg_parser.error("at least one run is needed")
+    if arguments.scale <= 0:
+        arg_parser.error("the scale must be positive")
+    if arguments.fuse and arguments.backend != interpreter.TREE:
+        arg_parser.error("fused nodes are only evaluated by the tree walking evaluator")
+    return arguments
+
+
+def main(argv):
+    """
+    The entry point of 'clite benchmark'
+    :param argv: the arguments after 'benchmark'
+    :return: the exit status; 1 if a regression was found
+    """
+    arguments = get_arguments(argv)
+    names = arguments.workload or sorted(WORKLOADS)
+
+    if arguments.emit:
+        os.makedirs(arguments.emit, exist_ok=True)
+        for name in names:
+            with open(os.path.join(arguments.emit, name + ".c"), 'w') as source_file:
+                source_file.write(generate(name, arguments.scale)[1])
+        return 0
+
+    baseline = None
+    if arguments.baseline:
+        try:
+            with open(arguments.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        except (IOError, ValueError) as error:
+            print("Unable to read the baseline: {0}".format(error), file=sys.stderr)
+            return 2
+
+    results = run_benchmarks(names, arguments.scale, arguments.repeat,
+                             arguments.backend, arguments.optimize, arguments.fuse)
+    print(format_results(results))
+    if arguments.save:
+        with open(arguments.save, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if baseline is None:
+        return 0
+    rows = compare(results, baseline, arguments.threshold)
+    print()
+    old_meta = baseline.get("meta", {})
+    for key in ("python", "implementation", "backend", "optimize", "fuse"):
+        if old_meta.get(key) != results["meta"][key]:
+            print("Warning: the baseline was measured with {0} {1}, not {2}".
+                  format(key, old_meta.get(key), results["meta"][key]), file=sys.stderr)
+    if not rows:
+        print("No workload of the same size is in the baseline", file=sys.stderr)
+    print(format_comparison(rows))
+    regressions = sum(regression for _, _, _, _, regression in rows)
+    print("{0} regression(s)".format(regressions))
+    return 1 if regressions else 0
@@ -0,0 +1,186 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/04/2015
+"""
+import hashlib
+import os
+import pickle
+import stat
+import sys
+import tempfile
+
+# Name of the cache directory made next to the Clite sources
+CACHE_DIRECTORY_NAME = "__clitecache__"
+# Extension of a cache entry
+SUFFIX = ".pickle"
+# Total size of the entries in one directory before the least recently
+# used ones are removed
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Modules whose code decides what a cached program looks like; a change
+# to any of them gives every program a new key
+FRONT_END_MODULES = ("ast.py", "errors.py", "lexer.py", "output.py", "parser.py",
+                     "tokens.py", "typechecker.py")
+
+_version = None
+
+
+def interpreter_version():
+    """
+    Return a string that changes whenever a cached program could no
+    longer be loaded or would be checked differently: the Python version
+    and a hash of the front end modules
+    :return: type - string
+    """
+    global _version
+    if _version is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in FRONT_END_MODULES:
+            with open(os.path.join(directory, name), 'rb') as module:
+                digest.update(module.read())
+        _version = "{0}-{1}-{2}".format(sys.implementation.cache_tag,
+                                        pickle.HIGHEST_PROTOCOL, digest.hexdigest()[:16])
+    return _version
+
+
+def trusted(status):
+    """
+    :param status: the os.stat_result of a cache entry or directory
+    :return: True if the file belongs to the current user and no one
+             else can write to it
+    """
+    if hasattr(os, 'getuid') and status.st_uid != os.getuid():
+        return False
+    return not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class ProgramCache(object):
+    """
+    An on-disk cache of parsed and type checked ast.Program objects, in
+    the spirit of __pycache__. An entry is the pickled program, stored
+    under the hash of the source text and the interpreter version, so an
+    edited source or an updated interpreter never loads a stale program.
+    Entries are written to a temporary file and renamed, so a reader
+    never sees half an entry. Loading an entry updates its modification
+    time; when the entries grow beyond max_bytes the ones used least
+    recently are removed.
+    Every file system error is ignored: the cache can only make a run
+    faster, never make it fail.
+    Unpickling an entry can run any code, so an entry is loaded only if
+    both the entry and the directory belong to the current user and no
+    one else can write to them; the directory is made with mode 0700.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(source):
+        """
+        :param source: the Clite source; type - bytes
+        :return: the cache key of the source; type - string
+        """
+        digest = hashlib.sha256(interpreter_version().encode())
+        digest.update(b"\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, key):
+        """
+        Load a cached program
+        :param key: a key returned by key()
+        :return: an ast.Program object; None if there is no usable entry
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as entry:
+                if not (trusted(os.stat(self.directory)) and trusted(os.fstat(entry.fileno()))):
+                    return None
+                program = pickle.load(entry)
+            os.utime(path)
+        except Exception:
+            # Any damaged or foreign entry is a miss
+            return None
+        return program
+
+    def store(self, key, program):
+        """
+        Store a program and evict old entries if the cache is too big
+        :param key: a key returned by key()
+        :param program: a type checked ast.Program object
+        :return: True if the program was stored
+        """
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return False
+        try:
+            with os.fdopen(handle, 'wb') as entry:
+                pickle.dump(program, entry, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self.path(key))
+        except (OSError, pickle.PicklingError, RecursionError):
+            # A very deeply nested expression cannot be pickled
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def entries(self):
+        """
+        :return: a list of (modification time, size, path) tuples, one per entry
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if name.endswith(SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in
+        max_bytes
+        :return: the number of removed entries
+        """
+        entries = sorted(self.entries())
+        total = sum(size for mtime, size, path in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def cache_for(filename):
+    """
+    Return the cache that holds the programs of the directory of a file
+    :param filename: the name of a Clite source file
+    :return: a ProgramCache object
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    return ProgramCache(os.path.join(directory, CACHE_DIRECTORY_NAME))
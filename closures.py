@@ -0,0 +1,293 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/24/2015
+"""
+import operator
+
+import analysis
+import ast
+import compiler
+import errors
+import tokens
+import visitor
+
+# Python operator for each binary expression class
+OPERATORS = {
+    ast.BinaryPlusExpression: operator.add, ast.BinaryMinusExpression: operator.sub,
+    ast.BinaryTimesExpression: operator.mul, ast.BinaryDivideExpression: operator.truediv,
+    ast.BinaryModExpression: operator.mod, ast.BinaryExpExpression: operator.pow,
+    ast.BinaryLessExpression: operator.lt, ast.BinaryLessEqualExpression: operator.le,
+    ast.BinaryGreaterExpression: operator.gt, ast.BinaryGreaterEqualExpression: operator.ge,
+    ast.BinaryEqualOpExpression: operator.eq, ast.BinaryNotEqualOpExpression: operator.ne
+}
+
+# Kinds of operands, see ClosureCompiler.operand()
+VARIABLE = 0
+CONSTANT = 1
+CLOSURE = 2
+
+
+class ClosureCompiler(visitor.NodeVisitor):
+    """
+    A compiler that turns a type checked ast.Program into nested Python
+    closures. Every node becomes a function that takes no arguments;
+    variables live in a list of slots that is resolved at compile time, and
+    since the types were validated by the TypeChecker the closures do no
+    type checking. Identifier and literal operands are read inline by the
+    closure of the enclosing operator, so they cost no call.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.names = list(program.slots)
+        self.slot_of = program.slots
+        self.slots = [None] * len(self.names)
+        self.unsafe_reads = analysis.unsafe_reads(program)
+        # Slots of the loop invariants, which follow the variables
+        self.invariant_slots = {}
+        self.run = None
+
+    def compile(self):
+        """
+        Compile the program. The result is also stored in self.run.
+        :return: a function that runs the program
+        """
+        body = self.sequence(self.program.stmts)
+        slots = self.slots
+
+        sink = self.program.output
+
+        def run():
+            slots[:] = [None] * len(slots)
+            try:
+                body()
+            finally:
+                sink.flush()
+        self.run = run
+        return run
+
+    def environment(self):
+        """
+        Return the values of the declared variables after a run
+        :return: a dictionary of the form { identifier: value }
+        """
+        return dict(zip(self.names, self.slots))
+
+    # ######### Statements #############
+
+    def sequence(self, statements):
+        """
+        Compile a list of statements into a single closure
+        """
+        compiled = tuple(self.visit(statement) for statement in statements
+                         if not isinstance(statement, ast.Semicolon))
+        if not compiled:
+            return lambda: None
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def run_sequence():
+            for statement in compiled:
+                statement()
+        return run_sequence
+
+    def visit_Block(self, node):
+        return self.sequence(node.statements)
+
+    def visit_Semicolon(self, node):
+        return lambda: None
+
+    def visit_Assignment(self, node):
+        slots = self.slots
+        slot = self.slot_of[node.identifier]
+        kind, value = self.operand(node.expr)
+
+        if kind == CONSTANT:
+            def assign():
+                slots[slot] = value
+        elif kind == VARIABLE:
+            def assign():
+                slots[slot] = slots[value]
+        else:
+            def assign():
+                slots[slot] = value()
+        return assign
+
+    def visit_PrintStatement(self, node):
+        expression = self.expression(node.expression)
+        write = self.program.output.write
+
+        def print_statement():
+            write(expression())
+        return print_statement
+
+    def visit_IfStatement(self, node):
+        condition = self.expression(node.expression)
+        if_statement = self.visit(node.if_statement)
+        if not node.else_statement:
+            def if_then():
+                if condition():
+                    if_statement()
+            return if_then
+
+        else_statement = self.visit(node.else_statement)
+
+        def if_then_else():
+            if condition():
+                if_statement()
+            else:
+                else_statement()
+        return if_then_else
+
+    def visit_WhileStatement(self, node):
+        condition = self.expression(node.expression)
+        statement = self.visit(node.statement)
+
+        def while_loop():
+            while condition():
+                statement()
+        return while_loop
+
+    def visit_HoistedLoop(self, node):
+        slots = self.slots
+        eager = []
+        lazy = []
+        for invariant in node.invariants:
+            slot = self.invariant_slots[id(invariant)] = len(slots)
+            slots.append(None)
+            if invariant.eager:
+                eager.append((slot, self.expression(invariant.expression)))
+            else:
+                lazy.append(slot)
+        eager = tuple(eager)
+        lazy = tuple(lazy)
+        loop = self.visit(node.loop)
+
+        def hoisted_loop():
+            for slot, expression in eager:
+                slots[slot] = expression()
+            for slot in lazy:
+                slots[slot] = None
+            loop()
+        return hoisted_loop
+
+    # ######## Expressions ############
+
+    def expression(self, node):
+        """
+        Compile an expression into a closure that returns its value
+        """
+        kind, value = self.operand(node)
+        if kind == CONSTANT:
+            return lambda: value
+        elif kind == VARIABLE:
+            slots = self.slots
+            return lambda: slots[value]
+        return value
+
+    def operand(self, node):
+        """
+        Compile an expression as the operand of another node
+        :param node: an ast.Expression object
+        :return: a (kind, value) tuple: (VARIABLE, slot) for an identifier
+                 that is always defined, (CONSTANT, value) for a literal and
+                 (CLOSURE, function) for anything else
+        """
+        while isinstance(node, ast.Factor) and not node.unary_operator:
+            node = node.primary
+        if isinstance(node, ast.LoopInvariantExpression):
+            if node.eager:
+                return VARIABLE, self.invariant_slots[id(node)]
+            return CLOSURE, self.visit(node)
+        if isinstance(node, ast.IdentifierExpression):
+            if id(node) in self.unsafe_reads:
+                return CLOSURE, self.checked_load(node)
+            return VARIABLE, self.slot_of[node.identifier]
+        value = compiler.constant_value(node)
+        if value is not None:
+            return CONSTANT, value
+        return CLOSURE, self.visit(node)
+
+    def checked_load(self, node):
+        """
+        Compile a read of a variable that may be undefined
+        """
+        slots = self.slots
+        slot = self.slot_of[node.identifier]
+        message = node.identifier + " not defined!"
+        line_number = node.line_number
+
+        def load():
+            value = slots[slot]
+            if value is None:
+                raise errors.CliteRuntimeError(message, line_number)
+            return value
+        return load
+
+    def visit_LoopInvariantExpression(self, node):
+        # A lazy invariant is computed at its first use in the loop
+        slots = self.slots
+        slot = self.invariant_slots[id(node)]
+        expression = self.expression(node.expression)
+
+        def load():
+            value = slots[slot]
+            if value is None:
+                value = slots[slot] = expression()
+            return value
+        return load
+
+    def visit_BinaryExpression(self, node):
+        op = OPERATORS[type(node)]
+        slots = self.slots
+        left_kind, left = self.operand(node.left)
+        right_kind, right = self.operand(node.right)
+
+        if left_kind == VARIABLE:
+            if right_kind == CONSTANT:
+                return lambda: op(slots[left], right)
+            elif right_kind == VARIABLE:
+                return lambda: op(slots[left], slots[right])
+            return lambda: op(slots[left], right())
+        elif left_kind == CONSTANT:
+            if right_kind == CONSTANT:
+                return lambda: op(left, right)
+            elif right_kind == VARIABLE:
+                return lambda: op(left, slots[right])
+            return lambda: op(left, right())
+        if right_kind == CONSTANT:
+            return lambda: op(left(), right)
+        elif right_kind == VARIABLE:
+            return lambda: op(left(), slots[right])
+        return lambda: op(left(), right())
+
+    def visit_Conjunction(self, node):
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        return lambda: left() or right()
+
+    def visit_Equality(self, node):
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        return lambda: left() and right()
+
+    def visit_Factor(self, node):
+        primary = self.expression(node.primary)
+        if node.unary_operator == tokens.NOT:
+            return lambda: not primary()
+        elif node.unary_operator == tokens.MINUS:
+            return lambda: -primary()
+        return primary
+
+
+def compile_program(program):
+    """
+    A convenience function that compiles a type checked program
+    :param program: an ast.Program object
+    :return: the ClosureCompiler; call its run attribute to run the program
+    """
+    closure_compiler = ClosureCompiler(program)
+    closure_compiler.compile()
+    return closure_compiler
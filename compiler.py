@@ -0,0 +1,439 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/22/2015
+"""
+import analysis
+import ast
+import visitor
+
+# Opcodes. Every instruction has four fields (opcode, a, b, c); a, b and c
+# are register numbers, except for jumps whose field a is the target.
+HALT = 0
+MOVE = 1                # a = b
+CHECK = 2               # raise unless register a is defined; b is the line
+PRINT = 3               # print a
+JUMP = 4                # jump to a
+JUMP_IF_TRUE = 5        # jump to a if b
+JUMP_IF_FALSE = 6       # jump to a if not b
+ADD = 7                 # a = b + c
+SUB = 8
+MUL = 9
+DIV = 10
+MOD = 11
+POW = 12
+LT = 13                 # a = b < c
+LE = 14
+GT = 15
+GE = 16
+EQ = 17
+NE = 18
+NEG = 19                # a = -b
+NOT = 20                # a = not b
+JUMP_LT = 21            # jump to a if b < c
+JUMP_LE = 22
+JUMP_GT = 23
+JUMP_GE = 24
+JUMP_EQ = 25
+JUMP_NE = 26
+JUMP_NOT_LT = 27        # jump to a if not b < c
+JUMP_NOT_LE = 28
+JUMP_NOT_GT = 29
+JUMP_NOT_GE = 30
+JUMP_NOT_EQ = 31
+JUMP_NOT_NE = 32
+
+OPCODE_NAMES = {value: name for name, value in globals().items()
+                if name.isupper() and isinstance(value, int)}
+
+ARITHMETIC = {
+    ast.BinaryPlusExpression: ADD, ast.BinaryMinusExpression: SUB,
+    ast.BinaryTimesExpression: MUL, ast.BinaryDivideExpression: DIV,
+    ast.BinaryModExpression: MOD, ast.BinaryExpExpression: POW
+}
+
+COMPARISONS = {
+    ast.BinaryLessExpression: LT, ast.BinaryLessEqualExpression: LE,
+    ast.BinaryGreaterExpression: GT, ast.BinaryGreaterEqualExpression: GE,
+    ast.BinaryEqualOpExpression: EQ, ast.BinaryNotEqualOpExpression: NE
+}
+
+# Comparison opcode -> (jump if true, jump if false)
+BRANCHES = {
+    LT: (JUMP_LT, JUMP_NOT_LT), LE: (JUMP_LE, JUMP_NOT_LE),
+    GT: (JUMP_GT, JUMP_NOT_GT), GE: (JUMP_GE, JUMP_NOT_GE),
+    EQ: (JUMP_EQ, JUMP_NOT_EQ), NE: (JUMP_NE, JUMP_NOT_NE)
+}
+
+
+class CodeObject(object):
+    """
+    A compiled Clite program.
+    The register file is laid out as the declared variables, followed by
+    the constants and then the temporaries used by the expressions.
+    """
+
+    def __init__(self, code, names, constants, temporaries, lines):
+        # code is a list of (opcode, a, b, c) tuples, which the virtual
+        # machine unpacks in one step
+        self.code = code
+        # names[i] is the identifier stored in register i
+        self.names = names
+        self.constants = constants
+        self.temporaries = temporaries
+        # lines[i] is the source line of instruction i
+        self.lines = lines
+
+    def __len__(self):
+        return len(self.code)
+
+    def instructions(self):
+        """
+        :return: a list of (opcode, a, b, c) tuples
+        """
+        return self.code
+
+    def registers(self):
+        """
+        Return a fresh register file for a run of the program
+        :return: type - list
+        """
+        return [None] * len(self.names) + list(self.constants) + \
+            [None] * self.temporaries
+
+    def disassemble(self):
+        """
+        Return a readable listing of the instructions
+        :return: type - string
+        """
+        listing = []
+        for index, (op, a, b, c) in enumerate(self.instructions()):
+            listing.append("{0:>5} {1:<14}{2:>6}{3:>6}{4:>6}   ; line {5}".
+                           format(index, OPCODE_NAMES[op], a, b, c, self.lines[index]))
+        return "\n".join(listing)
+
+
+class Compiler(visitor.NodeVisitor):
+    """
+    A compiler that lowers a type checked ast.Program into a CodeObject
+    for the register based vm.VirtualMachine. Conditions of if and while
+    statements are compiled into compare-and-branch instructions, and the
+    && and || operators into jumps, so they short-circuit as in eval().
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.instructions = []
+        self.lines = []
+        self.line = -1
+        # The variables keep their slots as registers
+        self.names = list(program.slots)
+        self.registers = program.slots
+        self.constants = []
+        self.constant_registers = {}
+        self.temporaries = 0
+        self.temp_top = 0
+        self.unsafe_reads = analysis.unsafe_reads(program)
+        # Registers of the eager loop invariants, keyed by node id
+        self.invariant_registers = {}
+
+    def compile(self):
+        """
+        Compile the program
+        :return: a CodeObject
+        """
+        self.collect_constants()
+        for statement in self.program.stmts:
+            self.visit(statement)
+        self.emit(HALT)
+
+        return CodeObject([tuple(instruction) for instruction in self.instructions],
+                          self.names, self.constants, self.temporaries, self.lines)
+
+    def emit(self, op, a=0, b=0, c=0):
+        """
+        Append an instruction
+        :return: the index of the instruction, used to patch jumps
+        """
+        self.instructions.append([op, a, b, c])
+        self.lines.append(self.line)
+        return len(self.instructions) - 1
+
+    def here(self):
+        """
+        :return: the index of the next instruction
+        """
+        return len(self.instructions)
+
+    def patch(self, jump, target):
+        """
+        Set the target of an already emitted jump
+        """
+        self.instructions[jump][1] = target
+
+    # ######### Registers #############
+
+    def collect_constants(self):
+        """
+        Give every literal in the program a register. The constants are
+        gathered before compiling so that the temporaries can be numbered
+        after them.
+        """
+        statements = list(self.program.stmts)
+        while statements:
+            node = statements.pop()
+            if isinstance(node, ast.Block):
+                statements.extend(node.statements)
+            elif isinstance(node, ast.IfStatement):
+                statements.append(node.if_statement)
+                if node.else_statement:
+                    statements.append(node.else_statement)
+                self.collect_expression_constants(node.expression)
+            elif isinstance(node, ast.WhileStatement):
+                statements.append(node.statement)
+                self.collect_expression_constants(node.expression)
+            elif isinstance(node, ast.HoistedLoop):
+                statements.append(node.loop)
+            elif isinstance(node, ast.Assignment):
+                self.collect_expression_constants(node.expr)
+            elif isinstance(node, ast.PrintStatement):
+                self.collect_expression_constants(node.expression)
+
+    def collect_expression_constants(self, expression):
+        stack = [expression]
+        while stack:
+            node = stack.pop()
+            value = constant_value(node)
+            if value is not None:
+                self.constant(value)
+            stack.extend(analysis.children(node))
+
+    def constant(self, value):
+        """
+        Return the register that holds a constant
+        :param value: an int, float or bool
+        :return: type - int
+        """
+        # 1, 1.0 and True are equal dictionary keys, and so are 0.0 and
+        # -0.0, so the key is made of the type and the repr of the value
+        key = (type(value), repr(value))
+        if key not in self.constant_registers:
+            self.constant_registers[key] = len(self.names) + len(self.constants)
+            self.constants.append(value)
+        return self.constant_registers[key]
+
+    def allocate(self):
+        """
+        Allocate a temporary register. Temporaries are released in
+        stack order by resetting temp_top.
+        :return: type - int
+        """
+        register = len(self.names) + len(self.constants) + self.temp_top
+        self.temp_top += 1
+        self.temporaries = max(self.temporaries, self.temp_top)
+        return register
+
+    # ######### Statements #############
+
+    def visit_Block(self, node):
+        for statement in node.statements:
+            self.visit(statement)
+
+    def visit_Semicolon(self, node):
+        return
+
+    def visit_Assignment(self, node):
+        self.line = line_of(node.expr)
+        self.compile_into(node.expr, self.registers[node.identifier])
+
+    def visit_PrintStatement(self, node):
+        self.line = line_of(node.expression)
+        mark = self.temp_top
+        self.emit(PRINT, self.operand(node.expression))
+        self.temp_top = mark
+
+    def visit_IfStatement(self, node):
+        self.line = line_of(node.expression)
+        skip_if = self.compile_jump(node.expression, False)
+        self.visit(node.if_statement)
+        if node.else_statement:
+            skip_else = self.emit(JUMP)
+            self.patch_all(skip_if, self.here())
+            self.visit(node.else_statement)
+            self.patch(skip_else, self.here())
+        else:
+            self.patch_all(skip_if, self.here())
+
+    def visit_WhileStatement(self, node):
+        # The condition is placed after the body, so that every iteration
+        # takes a single conditional jump
+        to_condition = self.emit(JUMP)
+        body = self.here()
+        self.visit(node.statement)
+        self.patch(to_condition, self.here())
+        self.line = line_of(node.expression)
+        self.patch_all(self.compile_jump(node.expression, True), body)
+
+    def visit_HoistedLoop(self, node):
+        # An eager invariant keeps its register until the loop ends; a lazy
+        # one is compiled where it is used
+        mark = self.temp_top
+        for invariant in node.invariants:
+            if invariant.eager:
+                register = self.allocate()
+                self.line = line_of(invariant.expression)
+                self.compile_into(invariant.expression, register)
+                self.invariant_registers[id(invariant)] = register
+        self.visit(node.loop)
+        self.temp_top = mark
+
+    def patch_all(self, jumps, target):
+        for jump in jumps:
+            self.patch(jump, target)
+
+    # ######## Expressions ############
+
+    def strip(self, node):
+        """
+        Skip the nodes that compile to nothing: factors without an operator
+        and lazy loop invariants
+        :param node: an ast.Expression object
+        :return: an ast.Expression object
+        """
+        while True:
+            if isinstance(node, ast.Factor) and not node.unary_operator:
+                node = node.primary
+            elif isinstance(node, ast.LoopInvariantExpression) and \
+                    id(node) not in self.invariant_registers:
+                node = node.expression
+            else:
+                return node
+
+    def operand(self, node):
+        """
+        Compile an expression and return the register that holds its value.
+        Identifiers and literals need no instruction.
+        :param node: an ast.Expression object
+        :return: type - int
+        """
+        node = self.strip(node)
+        if isinstance(node, ast.LoopInvariantExpression):
+            return self.invariant_registers[id(node)]
+        if isinstance(node, ast.IdentifierExpression):
+            if id(node) in self.unsafe_reads:
+                self.emit(CHECK, self.registers[node.identifier], node.line_number)
+            return self.registers[node.identifier]
+        value = constant_value(node)
+        if value is not None:
+            return self.constant(value)
+        register = self.allocate()
+        self.compile_into(node, register)
+        return register
+
+    def compile_into(self, node, target):
+        """
+        Compile an expression so that its value ends up in register target
+        :param node: an ast.Expression object
+        :param target: type - int
+        """
+        node = self.strip(node)
+        mark = self.temp_top
+        node_class = type(node)
+
+        if node_class in ARITHMETIC or node_class in COMPARISONS:
+            op = ARITHMETIC.get(node_class) or COMPARISONS[node_class]
+            left = self.operand(node.left)
+            right = self.operand(node.right)
+            self.emit(op, target, left, right)
+        elif isinstance(node, ast.Factor):
+            op = NOT if node.unary_operator == '!' else NEG
+            self.emit(op, target, self.operand(node.primary))
+        elif isinstance(node, (ast.Conjunction, ast.Equality)):
+            # The target is written before the right operand is evaluated,
+            # so a variable must not receive the partial result
+            result = target if target >= len(self.names) else self.allocate()
+            self.compile_into(node.left, result)
+            jump = JUMP_IF_TRUE if isinstance(node, ast.Conjunction) else JUMP_IF_FALSE
+            done = self.emit(jump, 0, result)
+            self.compile_into(node.right, result)
+            self.patch(done, self.here())
+            if result != target:
+                self.emit(MOVE, target, result)
+        else:
+            source = self.operand(node)
+            if source != target:
+                self.emit(MOVE, target, source)
+        self.temp_top = mark
+
+    def compile_jump(self, node, jump_if):
+        """
+        Compile a condition into jumps that are taken when the condition
+        evaluates to jump_if and fall through otherwise
+        :param node: an ast.Expression object of type bool
+        :param jump_if: type - bool
+        :return: a list of the emitted jumps, to be patched by the caller
+        """
+        node = self.strip(node)
+        mark = self.temp_top
+        node_class = type(node)
+
+        if isinstance(node, ast.Factor):
+            jumps = self.compile_jump(node.primary, not jump_if)
+        elif isinstance(node, (ast.Conjunction, ast.Equality)):
+            # jump_if True for || and False for && decides on either operand
+            decides = isinstance(node, ast.Conjunction)
+            if jump_if == decides:
+                jumps = self.compile_jump(node.left, jump_if) + \
+                    self.compile_jump(node.right, jump_if)
+            else:
+                skip = self.compile_jump(node.left, decides)
+                jumps = self.compile_jump(node.right, jump_if)
+                self.patch_all(skip, self.here())
+        elif node_class in COMPARISONS:
+            left = self.operand(node.left)
+            right = self.operand(node.right)
+            branch = BRANCHES[COMPARISONS[node_class]][0 if jump_if else 1]
+            jumps = [self.emit(branch, 0, left, right)]
+        elif isinstance(node, (ast.BooleanExpression, ast.ConstantExpression)):
+            jumps = [self.emit(JUMP)] if constant_value(node) == jump_if else []
+        else:
+            register = self.operand(node)
+            jumps = [self.emit(JUMP_IF_TRUE if jump_if else JUMP_IF_FALSE, 0, register)]
+        self.temp_top = mark
+        return jumps
+
+
+def constant_value(node):
+    """
+    Return the value of a literal expression
+    :param node: an ast.Expression object
+    :return: an int, float or bool; None if node is not a literal
+    """
+    if isinstance(node, ast.ConstantExpression):
+        return node.value
+    elif isinstance(node, ast.IntLitExpression):
+        return int(node.intlit)
+    elif isinstance(node, ast.RealNumberExpression):
+        return float(node.real_number)
+    elif isinstance(node, ast.TrueExpression):
+        return True
+    elif isinstance(node, ast.FalseExpression):
+        return False
+    return None
+
+
+def line_of(expression):
+    """
+    :return: the line number of an expression, or -1 if it has none
+    """
+    return getattr(expression, 'line_number', -1)
+
+
+def compile_program(program):
+    """
+    A convenience function that compiles a type checked program
+    :param program: an ast.Program object
+    :return: a CodeObject
+    """
+    return Compiler(program).compile()
@@ -85,4 +85,24 @@ class CliteTypeError(CliteRuntimeError):
             return self.msg
         else:
             return "TypeError at line {0}: {1}".\
-                format(self.line_number, self.msg)
\ No newline at end of file
+                format(self.line_number, self.msg)
+
+
+class CliteLimitError(CliteRuntimeError):
+    """
+    A Class that represents a program stopped by a resource limit.
+    It is raised when a program runs more loop iterations or for longer
+    than it is allowed, or computes a too large integer. The associated
+    value is a string indicating which limit was exceeded.
+    """
+
+    def __init__(self, msg, line=-1, limit=None):
+        super().__init__(msg, line)
+        self.limit = limit
+
+    def __str__(self):
+        if self.line_number == -1:
+            return "LimitError: {0}".format(self.msg)
+        else:
+            return "LimitError at line {0}: {1}".\
+                format(self.line_number, self.msg)
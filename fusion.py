@@ -0,0 +1,249 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/18/2015
+"""
+import ast
+import errors
+import optimizer
+import visitor
+
+
+class FusedRelation(object):
+    """
+    A mixin for a relation whose left operand is a variable. The fused
+    node reads the variable from the environment itself instead of
+    evaluating the identifier, and the Factor around it, as nodes of
+    their own. The operands are kept as children, so every other pass
+    sees the relation it replaces.
+    """
+
+    def __init__(self, relation, identifier):
+        super().__init__(relation.left, relation.right, relation.line_number)
+        # The program keeps the same env list for all its runs
+        self.env = identifier.program.env
+        self.slot = identifier.slot
+        self.identifier = identifier
+
+    def undefined(self):
+        """
+        :raise CliteRuntimeError for the undefined variable, as the
+               identifier would
+        """
+        raise errors.CliteRuntimeError(self.identifier.identifier + " not defined!",
+                                       self.identifier.line_number)
+
+
+class FusedLessExpression(FusedRelation, ast.BinaryLessExpression):
+
+    def eval(self):
+        value = self.env[self.slot]
+        if value is None:
+            self.undefined()
+        return value < self.right.eval()
+
+
+class FusedLessEqualExpression(FusedRelation, ast.BinaryLessEqualExpression):
+
+    def eval(self):
+        value = self.env[self.slot]
+        if value is None:
+            self.undefined()
+        return value <= self.right.eval()
+
+
+class FusedGreaterExpression(FusedRelation, ast.BinaryGreaterExpression):
+
+    def eval(self):
+        value = self.env[self.slot]
+        if value is None:
+            self.undefined()
+        return value > self.right.eval()
+
+
+class FusedGreaterEqualExpression(FusedRelation, ast.BinaryGreaterEqualExpression):
+
+    def eval(self):
+        value = self.env[self.slot]
+        if value is None:
+            self.undefined()
+        return value >= self.right.eval()
+
+
+class FusedModEquality(object):
+    """
+    A mixin for a test of a remainder, 'x % y == c' or 'x % y != c', where
+    x is a variable, y a variable or a constant and c a constant. The
+    fused node loads the variables, divides and compares in one step.
+    """
+
+    def __init__(self, comparison, dividend, divisor, constant):
+        super().__init__(comparison.left, comparison.right, comparison.line_number)
+        self.env = dividend.program.env
+        self.dividend = dividend
+        self.dividend_slot = dividend.slot
+        if isinstance(divisor, ast.IdentifierExpression):
+            self.divisor = divisor
+            self.divisor_slot = divisor.slot
+            self.divisor_value = None
+        else:
+            self.divisor = None
+            self.divisor_slot = None
+            self.divisor_value = constant_value(divisor)
+        self.constant = constant_value(constant)
+
+    def operands(self):
+        """
+        Read the dividend and the divisor
+        :return: a (dividend, divisor) tuple
+        :raise CliteRuntimeError if a variable is undefined
+        """
+        env = self.env
+        value = env[self.dividend_slot]
+        if value is None:
+            raise errors.CliteRuntimeError(self.dividend.identifier + " not defined!",
+                                           self.dividend.line_number)
+        if self.divisor_slot is None:
+            return value, self.divisor_value
+        divisor = env[self.divisor_slot]
+        if divisor is None:
+            raise errors.CliteRuntimeError(self.divisor.identifier + " not defined!",
+                                           self.divisor.line_number)
+        return value, divisor
+
+
+class FusedModEqualExpression(FusedModEquality, ast.BinaryEqualOpExpression):
+
+    def eval(self):
+        value, divisor = self.operands()
+        return value % divisor == self.constant
+
+
+class FusedModNotEqualExpression(FusedModEquality, ast.BinaryNotEqualOpExpression):
+
+    def eval(self):
+        value, divisor = self.operands()
+        return value % divisor != self.constant
+
+
+# The fused class of each relation
+FUSED_RELATIONS = {
+    ast.BinaryLessExpression: FusedLessExpression,
+    ast.BinaryLessEqualExpression: FusedLessEqualExpression,
+    ast.BinaryGreaterExpression: FusedGreaterExpression,
+    ast.BinaryGreaterEqualExpression: FusedGreaterEqualExpression,
+}
+FUSED_MOD_EQUALITIES = {
+    ast.BinaryEqualOpExpression: FusedModEqualExpression,
+    ast.BinaryNotEqualOpExpression: FusedModNotEqualExpression,
+}
+
+
+class Fuser(visitor.NodeTransformer):
+    """
+    A pass that replaces the comparisons that guard most loops and
+    branches by fused nodes, which do the work of several nodes in one
+    eval() call:
+        x < e, x <= e, x > e, x >= e      where x is a variable
+        x % y == c, x % y != c            where y is a variable or a
+                                          constant and c a constant
+    Only type checked nodes of the plain ast classes, and the remainders
+    reduced to masks by the optimizer, are fused, so the nodes of other
+    passes, such as the fixed width arithmetic of CLite_values, keep their
+    own evaluation. A fused node computes
+    exactly what the nodes it replaces would.
+    Only the tree walking evaluator runs the fused nodes; the compiling
+    back ends would treat them as the plain ones.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.fused = 0
+
+    def fuse(self):
+        """
+        Fuse the comparisons of the program in place
+        :return: the ast.Program object
+        """
+        return self.transform(self.program)
+
+    def visit_BinaryBoolExpression(self, node):
+        self.generic_visit(node)
+        if not node.checked:
+            return node
+        node_class = type(node)
+        if node_class in FUSED_RELATIONS:
+            identifier = variable(node.left)
+            if identifier is not None:
+                self.fused += 1
+                return self.copy_type(FUSED_RELATIONS[node_class](node, identifier), node)
+        elif node_class in FUSED_MOD_EQUALITIES:
+            remainder = unwrap(node.left)
+            if type(remainder) not in (ast.BinaryModExpression, optimizer.MaskExpression) or \
+                    not remainder.checked or constant_value(node.right) is None:
+                return node
+            dividend = variable(remainder.left)
+            divisor = unwrap(remainder.right)
+            if dividend is None or (variable(divisor) is None and
+                                    constant_value(divisor) is None):
+                return node
+            self.fused += 1
+            return self.copy_type(FUSED_MOD_EQUALITIES[node_class](node, dividend, divisor,
+                                                                   node.right), node)
+        return node
+
+    @staticmethod
+    def copy_type(fused, node):
+        fused.checked = node.checked
+        fused.clite_type = node.clite_type
+        return fused
+
+    def visit_Primary(self, node):
+        return node
+
+
+def unwrap(node):
+    """
+    Skip the Factors without a unary operator around an expression
+    :param node: an ast.Expression object
+    :return: the expression inside the Factors
+    """
+    while type(node) is ast.Factor and not node.unary_operator:
+        node = node.primary
+    return node
+
+
+def variable(node):
+    """
+    :param node: an ast.Expression object
+    :return: the ast.IdentifierExpression the node reads; None if it
+             computes something else
+    """
+    node = unwrap(node)
+    return node if type(node) is ast.IdentifierExpression else None
+
+
+def constant_value(node):
+    """
+    :param node: an ast.Expression object
+    :return: the number the node always evaluates to; None if it is not
+             a numeric literal or constant
+    """
+    node = unwrap(node)
+    if type(node) is ast.ConstantExpression and type(node.value) in (int, float):
+        return node.value
+    elif type(node) is ast.IntLitExpression:
+        return int(node.intlit)
+    elif type(node) is ast.RealNumberExpression:
+        return float(node.real_number)
+    return None
+
+
+def fuse(program):
+    """
+    A convenience function that fuses the comparisons of a program
+    :param program: a type checked, and possibly optimized, ast.Program
+    :return: the ast.Program object
+    """
+    return Fuser(program).fuse()
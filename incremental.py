@@ -0,0 +1,333 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/15/2015
+"""
+import bisect
+import re
+
+import ast
+import errors
+import lexer
+import typechecker
+from parser import Parser
+
+# Whitespace and comments followed by the keyword else
+ELSE_AHEAD = re.compile(r"(?:\s|//[^\r\n]*)*else(?![\w.])")
+# A character that joins the characters around it into one token
+WORD_CHARACTER = re.compile(r"[\w.]")
+NEWLINE = re.compile(r"\r\n?|\n")
+NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+
+class SpanParser(Parser):
+    """
+    A parser that records the range of tokens of every statement it
+    parses, as (first token, token after the last, statement) tuples
+    """
+
+    def __init__(self, filename, token_stream):
+        super().__init__(filename, token_stream)
+        self.spans = []
+
+    def statement(self, level):
+        first = self.position
+        node = super().statement(level)
+        self.spans.append((first, self.position, node))
+        return node
+
+
+class Document(object):
+    """
+    A Clite source that is edited, e.g. in an editor, together with its
+    parsed ast.Program. The document remembers where every statement
+    starts and ends in the text. An edit re-lexes and re-parses only the
+    innermost statement around the edited range and puts the new subtree
+    in the place of the old one; if the new text is not one statement,
+    the enclosing statements are tried in turn, and an edit that no
+    statement encloses, such as one in the declarations, parses the whole
+    text again. The program is the one a full parse of the text gives.
+    Offsets are character offsets into the text. The new nodes are not
+    type checked; check() does that.
+    """
+
+    def __init__(self, text, filename="<string>"):
+        self.filename = filename
+        self.text = ""
+        self.program = None
+        # The spans of the statements in pre-order: where each starts and
+        # ends in the text, the line it starts on, and the statement
+        self.starts = []
+        self.ends = []
+        self.lines = []
+        self.nodes = []
+        # id(statement): (list or node holding it, attribute name, index)
+        self.parents = {}
+        self.statements_parsed = 0
+        self.programs_parsed = 0
+        self.parse_all(text)
+
+    def parse_all(self, text):
+        """
+        Parse the whole text
+        :param text: the Clite source; type - string
+        :return: the ast.Program object
+        :raise CliteUnrecognizedTokenError or CliteSyntaxError; the text
+               is kept and the next edit parses it whole again
+        """
+        self.text = text
+        self.program = None
+        token_stream = lexer.Lexer.from_string(text, self.filename).token_stream(offsets=True)
+        span_parser = SpanParser(self.filename, token_stream)
+        program = span_parser.parse()
+        self.starts, self.ends, self.lines, self.nodes = \
+            self.convert_spans(span_parser.spans, token_stream, text, 0)
+        self.parents = {}
+        for index, statement in enumerate(program.stmts):
+            self.link(statement, program.stmts, None, index)
+        self.program = program
+        self.programs_parsed += 1
+        return program
+
+    def edit(self, start, end, replacement):
+        """
+        Replace the text between two offsets and update the program
+        :param start: the offset of the first replaced character
+        :param end: the offset after the last replaced character
+        :param replacement: the new text; type - string
+        :return: the statement that was parsed again, or the ast.Program
+                 object if the whole text was parsed
+        :raise CliteUnrecognizedTokenError or CliteSyntaxError if the new
+               text is not a valid program
+        """
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError("The edit range {0}:{1} is not in the text".format(start, end))
+        text = self.text[:start] + replacement + self.text[end:]
+        if self.program is None:
+            return self.parse_all(text)
+        delta = len(replacement) - (end - start)
+        index = self.innermost(start, end)
+        while index is not None:
+            statement = self.reparse(index, text, delta)
+            if statement is not None:
+                self.text = text
+                return statement
+            index = self.enclosing(index)
+        return self.parse_all(text)
+
+    def check(self, statement=None):
+        """
+        Type check the program or one of its statements
+        :param statement: a statement returned by edit() [optional]
+        :return: a list of errors.CliteTypeError objects
+        """
+        checker = typechecker.TypeChecker(self.program)
+        if statement is None or statement is self.program:
+            return checker.check()
+        checker.visit(statement)
+        return checker.errors
+
+    # ######## Spans ############
+
+    def innermost(self, start, end):
+        """
+        :return: the index of the innermost statement whose text contains
+                 the range; None if there is none
+        """
+        index = bisect.bisect_right(self.starts, start) - 1
+        while index >= 0:
+            if self.ends[index] >= end:
+                return index
+            index -= 1
+        return None
+
+    def enclosing(self, index):
+        """
+        :return: the index of the statement that encloses statement index;
+                 None for a statement of the program
+        """
+        start, end = self.starts[index], self.ends[index]
+        index -= 1
+        while index >= 0:
+            if self.starts[index] <= start and self.ends[index] >= end:
+                return index
+            index -= 1
+        return None
+
+    @staticmethod
+    def convert_spans(spans, token_stream, text, offset):
+        """
+        Turn the token spans of a SpanParser into sorted span lists
+        :param spans: the spans of the parser
+        :param token_stream: the TokenStream the parser read, with offsets
+        :param text: the text the stream was made from
+        :param offset: the offset of the text in the document
+        :return: the starts, ends, lines and nodes lists, in pre-order
+        """
+        to_characters = character_offsets(text)
+        starts, ends = token_stream.starts, token_stream.ends
+        rows = sorted((to_characters(starts[first]) + offset,
+                       -(to_characters(ends[after - 1]) + offset),
+                       token_stream.lines[first], node)
+                      for first, after, node in spans)
+        return ([row[0] for row in rows], [-row[1] for row in rows],
+                [row[2] for row in rows], [row[3] for row in rows])
+
+    def link(self, statement, holder, field=None, index=None):
+        """
+        Record where each statement of a subtree is held
+        :param statement: an ast.Statement object
+        :param holder: the list or the node that holds statement
+        :param field: the attribute of a node that holds statement
+        :param index: the index of statement in a list
+        :return: None
+        """
+        self.parents[id(statement)] = (holder, field, index)
+        for child_field in statement.child_fields:
+            value = getattr(statement, child_field)
+            if isinstance(value, list):
+                for position, child in enumerate(value):
+                    self.link(child, value, None, position)
+            elif isinstance(value, ast.Statement):
+                self.link(value, statement, child_field)
+
+    def unlink(self, statement):
+        """
+        Forget where the statements of a subtree are held
+        :return: None
+        """
+        self.parents.pop(id(statement), None)
+        for field in statement.child_fields:
+            value = getattr(statement, field)
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, ast.Statement):
+                    self.unlink(child)
+
+    # ######## Re-parsing ############
+
+    def reparse(self, index, text, delta):
+        """
+        Parse the new text of a statement and splice it into the program
+        :param index: the index of the statement
+        :param text: the edited text of the document
+        :param delta: the change of the length of the text
+        :return: the new statement; None if its text is not one statement
+                 that a full parse would give
+        """
+        old = self.nodes[index]
+        start, old_end = self.starts[index], self.ends[index]
+        end = old_end + delta
+        if end <= start:
+            return None
+        # A token at a border of the region must not join a token next to it
+        if start > 0 and WORD_CHARACTER.match(text, start - 1) and \
+                WORD_CHARACTER.match(text, start):
+            return None
+        region = text[start:end]
+        try:
+            token_stream = lexer.Lexer.from_string(region, self.filename).\
+                token_stream(self.lines[index], offsets=True)
+            span_parser = SpanParser(self.filename, token_stream)
+            statement = span_parser.parse_statement(self.program, old.level)
+        except (errors.CliteSyntaxError, errors.CliteUnrecognizedTokenError):
+            return None
+        # The statement must end where the region ends, or a comment could
+        # have run past the end of the region
+        if token_stream.ends[len(token_stream) - 2] != token_stream.ends[-1]:
+            return None
+        # A following else would belong to an if without an else at the end
+        # of the new statement
+        if takes_else(statement) and ELSE_AHEAD.match(text, end):
+            return None
+        self.statements_parsed += 1
+
+        # Put the new statement where the old one was held
+        holder, field, position = self.parents[id(old)]
+        if field is None:
+            holder[position] = statement
+        else:
+            setattr(holder, field, statement)
+        self.unlink(old)
+        self.link(statement, holder, field, position)
+
+        # Replace the spans of the old subtree by the new ones and move the
+        # spans after it
+        after = index + 1
+        while after < len(self.starts) and self.starts[after] < old_end:
+            after += 1
+        starts, ends, lines, nodes = self.convert_spans(span_parser.spans, token_stream,
+                                                        region, start)
+        line_delta = len(NEWLINE.findall(region)) - \
+            len(NEWLINE.findall(self.text, self.starts[index], old_end))
+        self.starts[index:after] = starts
+        self.ends[index:after] = ends
+        self.lines[index:after] = lines
+        self.nodes[index:after] = nodes
+        tail = index + len(nodes)
+        if delta:
+            self.starts[tail:] = [offset + delta for offset in self.starts[tail:]]
+            self.ends[tail:] = [offset + delta for offset in self.ends[tail:]]
+            # Only the statements that enclose the old one end after it
+            self.ends[:index] = [offset + delta if offset >= old_end else offset
+                                 for offset in self.ends[:index]]
+        if line_delta:
+            self.lines[tail:] = [line + line_delta for line in self.lines[tail:]]
+            for node in self.nodes[tail:]:
+                move_lines(node, line_delta)
+        return statement
+
+
+def takes_else(statement):
+    """
+    Check if an else after a statement would belong to an if statement at
+    the end of it
+    :return: type - bool
+    """
+    while True:
+        if isinstance(statement, ast.IfStatement):
+            if statement.else_statement is None:
+                return True
+            statement = statement.else_statement
+        elif isinstance(statement, ast.WhileStatement):
+            statement = statement.statement
+        else:
+            return False
+
+
+def move_lines(statement, line_delta):
+    """
+    Move the expressions of a statement, but not of the statements in it,
+    by a number of lines
+    :return: None
+    """
+    stack = [getattr(statement, field) for field in statement.child_fields]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Expression):
+            if getattr(node, 'line_number', -1) != -1:
+                node.line_number += line_delta
+            stack.extend(getattr(node, field) for field in node.child_fields)
+
+
+def character_offsets(text):
+    """
+    Make a function that turns a byte offset into the UTF-8 encoding of a
+    text into a character offset into the text
+    :param text: type - string
+    :return: a function
+    """
+    if text.isascii():
+        return int
+    ends = []
+    extra_bytes = []
+    extra = 0
+    for match in NON_ASCII.finditer(text):
+        extra += len(match.group().encode()) - 1
+        ends.append(match.start() + extra + 1)
+        extra_bytes.append(extra)
+
+    def to_characters(offset):
+        index = bisect.bisect_right(ends, offset)
+        return offset - extra_bytes[index - 1] if index else offset
+    return to_characters
@@ -0,0 +1,200 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/02/2015
+"""
+import io
+
+import closures
+import CLite_values
+import compiler
+import errors
+import fusion
+import limits
+import optimizer
+import output
+import transpiler
+import typechecker
+import vm
+from parser import Parser
+
+# Names of the back ends an Interpreter can run a program on
+TREE = "tree"
+VM = "vm"
+CLOSURE = "closure"
+PYTHON = "python"
+BACKENDS = (TREE, VM, CLOSURE, PYTHON)
+
+
+class Result(object):
+    """
+    The outcome of a program run by an Interpreter: the final values of
+    the variables, the printed output and the Clite errors, which stopped
+    the program. ok is True when there are no errors.
+    """
+
+    def __init__(self, environment=None, output_text="", error_list=()):
+        # environment is a dictionary of the form { identifier: value }
+        self.environment = environment if environment is not None else {}
+        self.output = output_text
+        self.errors = list(error_list)
+        self.ok = not self.errors
+
+    def __str__(self):
+        """
+        Return the output followed by the error messages, as clite
+        would print them
+        :return: type - string
+        """
+        return self.output + "".join(str(error) + "\n" for error in self.errors)
+
+
+class Interpreter(object):
+    """
+    An interpreter for Clite programs that is meant to be embedded in a
+    long running process. Programs are given as source text or as file
+    like objects, the printed output is collected in memory, and errors
+    are returned in a Result or raised, but never end the process.
+    With resource_limits, a limits.ResourceLimits object, every program
+    is stopped by a CliteLimitError when it exceeds a limit; with
+    int_bits, one of CLite_values.INT_WIDTHS, programs compute with
+    wrapping integers of that width; with fuse, the comparisons that
+    guard loops are replaced by fused nodes. Only the tree walking back
+    end supports limits, fixed width integers and fused nodes, and fixed
+    width integers cannot be combined with an integer size limit.
+    """
+
+    def __init__(self, backend=TREE, optimize=False, resource_limits=None, int_bits=None,
+                 fuse=False):
+        if backend not in BACKENDS:
+            raise ValueError("Unknown back end '{0}'; expected one of {1}".
+                             format(backend, ", ".join(BACKENDS)))
+        if resource_limits and backend != TREE:
+            raise ValueError("Resource limits are only supported by the '{0}' back end".
+                             format(TREE))
+        if int_bits is not None and backend != TREE:
+            raise ValueError("Fixed width integers are only supported by the '{0}' back end".
+                             format(TREE))
+        if fuse and backend != TREE:
+            raise ValueError("Fused nodes are only supported by the '{0}' back end".
+                             format(TREE))
+        if int_bits is not None and resource_limits and \
+                resource_limits.max_int_bits is not None:
+            # The integer size limit would replace the wrapping arithmetic
+            raise ValueError("An integer size limit cannot be used with fixed width integers")
+        if int_bits is not None and int_bits not in CLite_values.INT_WIDTHS:
+            raise ValueError("Integers are {0} bits wide, not {1}".
+                             format(" or ".join(map(str, CLite_values.INT_WIDTHS)), int_bits))
+        self.backend = backend
+        self.optimize = optimize
+        self.limits = resource_limits if resource_limits else None
+        self.int_bits = int_bits
+        self.fuse = fuse
+
+    def parse(self, source, filename="<string>"):
+        """
+        Parse a program
+        :param source: the Clite source; a string, bytes or a file like
+                       object with a read() method
+        :param filename: a name for the source
+        :return: an ast.Program object
+        :raise CliteUnrecognizedTokenError or CliteSyntaxError
+        """
+        if hasattr(source, 'read'):
+            source = source.read()
+        return Parser.from_string(source, filename).parse()
+
+    def check(self, program):
+        """
+        Type check a program, and if it is well typed give it fixed width
+        integers, optimize it when the interpreter was asked to and guard
+        it with the resource limits and fuse it
+        :param program: an ast.Program object
+        :return: a list of errors.CliteTypeError objects
+        """
+        type_errors = typechecker.check(program)
+        if not type_errors:
+            if self.int_bits is not None:
+                CLite_values.apply(program, self.int_bits)
+            if self.optimize:
+                # The values of the variables are part of the Result, so
+                # a store is kept even if the program never reads it
+                optimizer.optimize(program, reduce_strength=self.backend == TREE,
+                                   remove_dead_stores=False)
+            if self.limits is not None:
+                limits.apply(program, self.limits)
+            if self.fuse:
+                fusion.fuse(program)
+        return type_errors
+
+    def prepare(self, program, sink):
+        """
+        Compile a checked program for the back end of the interpreter
+        :param program: an ast.Program object
+        :param sink: the output.Sink for the printed values
+        :return: a (run, environment) tuple of functions; run() runs the
+                 program and may raise a CliteRuntimeError, environment()
+                 returns the values of the variables
+        """
+        program.output = sink
+        if self.backend == VM:
+            machine = vm.VirtualMachine(compiler.compile_program(program), sink)
+            return machine.run, machine.environment
+        elif self.backend == CLOSURE:
+            closure_compiler = closures.compile_program(program)
+            return closure_compiler.run, closure_compiler.environment
+        elif self.backend == PYTHON:
+            function = transpiler.compile_program(program)
+            # The variables of the generated function are lost on an error
+            values = {}
+
+            def run():
+                values.update(transpiler.run(function, sink))
+            return run, values.copy
+        return program.execute, program.environment
+
+    def run(self, source, filename="<string>"):
+        """
+        Parse, check and run a program. Clite errors are reported in the
+        result, every syntax error of the program at once; any other
+        exception is raised.
+        :param source: the Clite source; a string, bytes or a file like
+                       object with a read() method
+        :param filename: a name for the source
+        :return: a Result object
+        """
+        if hasattr(source, 'read'):
+            source = source.read()
+        try:
+            clite_parser = Parser.from_string(source, filename, recover=True)
+            program = clite_parser.parse()
+        except (errors.CliteUnrecognizedTokenError, errors.CliteSyntaxError) as error:
+            return Result(error_list=[error])
+        if clite_parser.errors:
+            return Result(error_list=clite_parser.errors)
+        type_errors = self.check(program)
+        if type_errors:
+            return Result(error_list=type_errors)
+
+        stream = io.StringIO()
+        run, environment = self.prepare(program, output.BufferedSink(stream))
+        error_list = []
+        try:
+            run()
+        except errors.CliteRuntimeError as error:
+            error_list.append(error)
+        return Result(environment(), stream.getvalue(), error_list)
+
+
+def run(source, backend=TREE, optimize=False, resource_limits=None, int_bits=None):
+    """
+    A convenience function that runs a program with a new Interpreter
+    :param source: the Clite source; a string, bytes or a file like object
+    :param backend: one of BACKENDS
+    :param optimize: run the optimizer before the program
+    :param resource_limits: a limits.ResourceLimits object [optional]
+    :param int_bits: the width of the integers [optional]
+    :return: a Result object
+    """
+    return Interpreter(backend, optimize, resource_limits, int_bits).run(source)
@@ -0,0 +1,873 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/20/2015
+"""
+import ast
+import compiler
+import tokens
+import typechecker
+import visitor
+
+# Operator of each binary expression class; || and && are lowered to
+# branches, since their right operand is not always evaluated
+OPERATORS = {
+    ast.BinaryPlusExpression: tokens.PLUS, ast.BinaryMinusExpression: tokens.MINUS,
+    ast.BinaryTimesExpression: tokens.TIMES, ast.BinaryDivideExpression: tokens.DIVIDE,
+    ast.BinaryModExpression: tokens.MOD, ast.BinaryExpExpression: tokens.EXPONENT,
+    ast.BinaryLessExpression: tokens.LESS, ast.BinaryLessEqualExpression: tokens.LESS_EQ,
+    ast.BinaryGreaterExpression: tokens.GREATER,
+    ast.BinaryGreaterEqualExpression: tokens.GREATER_EQ,
+    ast.BinaryEqualOpExpression: tokens.EQUAL_EQ, ast.BinaryNotEqualOpExpression: tokens.NOT_EQUAL
+}
+
+# Prefix of the names of temporaries, which no Clite identifier starts with
+TEMPORARY_PREFIX = "%"
+
+
+# ######## Operands ############
+
+class Constant(object):
+    """
+    A constant operand of an instruction
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        if type(self.value) is bool:
+            return tokens.TRUE if self.value else tokens.FALSE
+        return repr(self.value)
+
+
+class Variable(object):
+    """
+    A variable or a temporary operand of an instruction. In SSA form
+    every variable also has a version, and version 0 stands for the
+    value a variable has before it is first assigned, which is undefined.
+    Two Variable objects with the same name and version are equal.
+    """
+
+    def __init__(self, name, version=None):
+        self.name = name
+        self.version = version
+
+    def __eq__(self, other):
+        return isinstance(other, Variable) and self.name == other.name and \
+            self.version == other.version
+
+    def __hash__(self):
+        return hash((self.name, self.version))
+
+    def __str__(self):
+        if self.version is None:
+            return self.name
+        return "{0}.{1}".format(self.name, self.version)
+
+    def is_temporary(self):
+        """
+        :return: True for a temporary made by the lowering; type - bool
+        """
+        return self.name.startswith(TEMPORARY_PREFIX)
+
+
+# ######## Instructions ############
+
+class Instruction(object):
+    """
+    A base class for the instructions of a basic block. An instruction
+    assigns at most one variable, its target, and reads its operands,
+    which are Constant or Variable objects.
+    """
+
+    def __init__(self, target, operands, line_number=-1):
+        self.target = target
+        self.operands = operands
+        self.line_number = line_number
+
+    def uses(self):
+        """
+        :return: the variables the instruction reads; type - list
+        """
+        return [operand for operand in self.operands if isinstance(operand, Variable)]
+
+
+class Copy(Instruction):
+    """
+    target = operand
+    """
+
+    def __init__(self, target, source, line_number=-1):
+        super().__init__(target, [source], line_number)
+
+    def __str__(self):
+        return "{0} = {1}".format(self.target, self.operands[0])
+
+
+class BinaryOperation(Instruction):
+    """
+    target = left operator right
+    """
+
+    def __init__(self, target, operator, left, right, line_number=-1):
+        super().__init__(target, [left, right], line_number)
+        self.operator = operator
+
+    def __str__(self):
+        return "{0} = {1} {2} {3}".format(self.target, self.operands[0], self.operator,
+                                          self.operands[1])
+
+
+class UnaryOperation(Instruction):
+    """
+    target = operator operand, where the operator is - or !
+    """
+
+    def __init__(self, target, operator, operand, line_number=-1):
+        super().__init__(target, [operand], line_number)
+        self.operator = operator
+
+    def __str__(self):
+        return "{0} = {1}{2}".format(self.target, self.operator, self.operands[0])
+
+
+class Print(Instruction):
+    """
+    print operand
+    """
+
+    def __init__(self, value, line_number=-1):
+        super().__init__(None, [value], line_number)
+
+    def __str__(self):
+        return "{0} {1}".format(tokens.PRINT, self.operands[0])
+
+
+class Phi(Instruction):
+    """
+    A phi function of SSA form, at the start of a block. Its value is the
+    operand that belongs to the predecessor the block was entered from:
+    operands[i] comes from blocks[i].
+    """
+
+    def __init__(self, target, blocks):
+        super().__init__(target, [Variable(target.name) for _ in blocks])
+        self.blocks = list(blocks)
+
+    def __str__(self):
+        return "{0} = phi({1})".format(self.target, ", ".join(
+            "{0}: {1}".format(block.label(), operand)
+            for block, operand in zip(self.blocks, self.operands)))
+
+
+class Jump(Instruction):
+    """
+    A terminator that continues with another block
+    """
+
+    def __init__(self, block):
+        super().__init__(None, [])
+        self.block = block
+
+    def successors(self):
+        return [self.block]
+
+    def __str__(self):
+        return "jump {0}".format(self.block.label())
+
+
+class Branch(Instruction):
+    """
+    A terminator that continues with if_true when its condition is true
+    and with if_false otherwise
+    """
+
+    def __init__(self, condition, if_true, if_false, line_number=-1):
+        super().__init__(None, [condition], line_number)
+        self.if_true = if_true
+        self.if_false = if_false
+
+    def successors(self):
+        return [self.if_true, self.if_false]
+
+    def __str__(self):
+        return "branch {0} {1} {2}".format(self.operands[0], self.if_true.label(),
+                                           self.if_false.label())
+
+
+class Return(Instruction):
+    """
+    A terminator that ends the program
+    """
+
+    def __init__(self):
+        super().__init__(None, [])
+
+    @staticmethod
+    def successors():
+        return []
+
+    def __str__(self):
+        return "return"
+
+
+# ######## Control flow graph ############
+
+class BasicBlock(object):
+    """
+    A sequence of instructions that is always run from its first to its
+    last instruction, followed by a terminator that selects the next block
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.instructions = []
+        self.terminator = None
+        self.predecessors = []
+
+    def label(self):
+        return "B{0}".format(self.index)
+
+    def successors(self):
+        """
+        :return: the blocks that may run after this one; type - list
+        """
+        return self.terminator.successors()
+
+    def phis(self):
+        """
+        :return: the phi functions at the start of the block; type - list
+        """
+        phis = []
+        for instruction in self.instructions:
+            if not isinstance(instruction, Phi):
+                break
+            phis.append(instruction)
+        return phis
+
+    def all_instructions(self):
+        """
+        :return: the instructions of the block and its terminator
+        """
+        return self.instructions + [self.terminator]
+
+    def __str__(self):
+        header = self.label() + ":"
+        if self.predecessors:
+            header += "    // from " + ", ".join(block.label() for block in self.predecessors)
+        return "\n".join([header] + ["    " + str(instruction)
+                                     for instruction in self.all_instructions()])
+
+
+class ControlFlowGraph(object):
+    """
+    A Clite program as a graph of basic blocks. The program starts in
+    the entry block, blocks[0], and the blocks are kept in reverse
+    postorder, so a block comes before the blocks it dominates.
+    """
+
+    def __init__(self, declarations):
+        # declarations is a dictionary of the form { identifier: type }
+        self.declarations = dict(declarations)
+        self.blocks = []
+        self.temporaries = 0
+        self.ssa = False
+        self.entry = self.new_block()
+
+    def new_block(self):
+        """
+        :return: a new empty BasicBlock of the graph
+        """
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    def new_temporary(self):
+        """
+        :return: a Variable for a new temporary
+        """
+        self.temporaries += 1
+        return Variable("{0}{1}".format(TEMPORARY_PREFIX, self.temporaries))
+
+    def variables(self):
+        """
+        :return: a Variable for each declared variable, as it is before
+                 the program assigns it
+        """
+        version = 0 if self.ssa else None
+        return [Variable(identifier, version) for identifier in self.declarations]
+
+    def finish(self):
+        """
+        Drop the blocks that cannot be reached from the entry, number the
+        others in reverse postorder and find their predecessors
+        :return: None
+        """
+        self.blocks = reverse_postorder(self.entry)
+        for index, block in enumerate(self.blocks):
+            block.index = index
+            block.predecessors = []
+        for block in self.blocks:
+            for successor in block.successors():
+                if block not in successor.predecessors:
+                    successor.predecessors.append(block)
+
+    def __str__(self):
+        """
+        Return the listing of the graph
+        :return: type - string
+        """
+        lines = ["{0} {1}".format(clite_type, identifier)
+                 for identifier, clite_type in self.declarations.items()]
+        return "\n".join(lines + [str(block) for block in self.blocks]) + "\n"
+
+
+def reverse_postorder(entry):
+    """
+    Order the blocks that can be reached from a block in reverse
+    postorder; the first successor of a block comes before the second
+    :param entry: a BasicBlock
+    :return: a list of BasicBlock objects
+    """
+    postorder = []
+    visited = {entry}
+    stack = [(entry, iter(reversed(entry.successors())))]
+    while stack:
+        block, successors = stack[-1]
+        for successor in successors:
+            if successor not in visited:
+                visited.add(successor)
+                stack.append((successor, iter(reversed(successor.successors()))))
+                break
+        else:
+            stack.pop()
+            postorder.append(block)
+    postorder.reverse()
+    return postorder
+
+
+# ######## Lowering ############
+
+class Lowering(visitor.NodeVisitor):
+    """
+    A pass that lowers a type checked ast.Program into a ControlFlowGraph.
+    Every expression is split into instructions with at most one operator
+    whose intermediate values are held by temporaries. If and while
+    statements become branches between blocks, and so do || and &&, whose
+    right operand is only evaluated when the left one does not decide.
+    Hoisted loop invariants are computed before their loop.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.cfg = ControlFlowGraph(program.decls)
+        self.block = self.cfg.entry
+        # Temporaries of the hoisted loop invariants, keyed by node id
+        self.invariants = {}
+
+    def lower(self):
+        """
+        Lower the program
+        :return: the ControlFlowGraph
+        """
+        for statement in self.program.stmts:
+            self.visit(statement)
+        self.block.terminator = Return()
+        self.cfg.finish()
+        return self.cfg
+
+    def emit(self, instruction):
+        self.block.instructions.append(instruction)
+
+    def jump(self, block):
+        """
+        End the current block with a jump and continue in block
+        """
+        self.block.terminator = Jump(block)
+        self.block = block
+
+    # ######### Statements #############
+
+    def visit_Block(self, node):
+        for statement in node.statements:
+            self.visit(statement)
+
+    def visit_Semicolon(self, node):
+        return
+
+    def visit_Assignment(self, node):
+        self.compute_into(node.expr, Variable(node.identifier))
+
+    def visit_PrintStatement(self, node):
+        self.emit(Print(self.operand(node.expression), typechecker.line_of(node.expression)))
+
+    def visit_IfStatement(self, node):
+        if_block = self.cfg.new_block()
+        join = self.cfg.new_block()
+        else_block = self.cfg.new_block() if node.else_statement else join
+        self.branch(node.expression, if_block, else_block)
+        self.block = if_block
+        self.visit(node.if_statement)
+        self.jump(join)
+        if node.else_statement:
+            self.block = else_block
+            self.visit(node.else_statement)
+            self.jump(join)
+
+    def visit_WhileStatement(self, node):
+        header = self.cfg.new_block()
+        body = self.cfg.new_block()
+        done = self.cfg.new_block()
+        self.jump(header)
+        self.branch(node.expression, body, done)
+        self.block = body
+        self.visit(node.statement)
+        self.block.terminator = Jump(header)
+        self.block = done
+
+    def visit_HoistedLoop(self, node):
+        # A lazy invariant is computed where it is used, like any other
+        # expression, which gives the same value
+        for invariant in node.invariants:
+            if invariant.eager:
+                temporary = self.cfg.new_temporary()
+                self.compute_into(invariant.expression, temporary)
+                self.invariants[id(invariant)] = temporary
+        self.visit(node.loop)
+
+    # ######## Expressions ############
+
+    def strip(self, node):
+        """
+        Skip the nodes that compute nothing: factors without an operator
+        and the invariants that are not computed before their loop
+        :param node: an ast.Expression object
+        :return: an ast.Expression object
+        """
+        while True:
+            if isinstance(node, ast.Factor) and not node.unary_operator:
+                node = node.primary
+            elif isinstance(node, ast.LoopInvariantExpression) and \
+                    id(node) not in self.invariants:
+                node = node.expression
+            else:
+                return node
+
+    def operand(self, node):
+        """
+        Lower an expression and return the operand that holds its value.
+        Identifiers and literals need no instruction.
+        :param node: an ast.Expression object
+        :return: a Variable or a Constant
+        """
+        node = self.strip(node)
+        if isinstance(node, ast.LoopInvariantExpression):
+            return self.invariants[id(node)]
+        if isinstance(node, ast.IdentifierExpression):
+            return Variable(node.identifier)
+        value = compiler.constant_value(node)
+        if value is not None:
+            return Constant(value)
+        temporary = self.cfg.new_temporary()
+        self.compute_into(node, temporary)
+        return temporary
+
+    def compute_into(self, node, target):
+        """
+        Lower an expression so that its value is assigned to target
+        :param node: an ast.Expression object
+        :param target: a Variable
+        """
+        node = self.strip(node)
+        line_number = typechecker.line_of(node)
+        operator = operator_of(node)
+        if operator is not None:
+            left = self.operand(node.left)
+            right = self.operand(node.right)
+            self.emit(BinaryOperation(target, operator, left, right, line_number))
+        elif isinstance(node, ast.Factor):
+            self.emit(UnaryOperation(target, node.unary_operator, self.operand(node.primary),
+                                     line_number))
+        elif isinstance(node, (ast.Conjunction, ast.Equality)):
+            if_true = self.cfg.new_block()
+            if_false = self.cfg.new_block()
+            join = self.cfg.new_block()
+            self.branch(node, if_true, if_false)
+            self.block = if_true
+            self.emit(Copy(target, Constant(True), line_number))
+            self.block.terminator = Jump(join)
+            self.block = if_false
+            self.emit(Copy(target, Constant(False), line_number))
+            self.jump(join)
+        else:
+            self.emit(Copy(target, self.operand(node), line_number))
+
+    def branch(self, node, if_true, if_false):
+        """
+        End the current block with branches to if_true when a condition
+        is true and to if_false when it is false
+        :param node: an ast.Expression object of type bool
+        :param if_true: a BasicBlock
+        :param if_false: a BasicBlock
+        """
+        node = self.strip(node)
+        if isinstance(node, ast.Factor) and node.unary_operator == tokens.NOT:
+            self.branch(node.primary, if_false, if_true)
+        elif isinstance(node, (ast.Conjunction, ast.Equality)):
+            # || is decided by a true left operand and && by a false one
+            right = self.cfg.new_block()
+            if isinstance(node, ast.Conjunction):
+                self.branch(node.left, if_true, right)
+            else:
+                self.branch(node.left, right, if_false)
+            self.block = right
+            self.branch(node.right, if_true, if_false)
+        else:
+            condition = self.operand(node)
+            self.block.terminator = Branch(condition, if_true, if_false,
+                                           typechecker.line_of(node))
+
+
+def operator_of(node):
+    """
+    :param node: an ast.Expression object
+    :return: the operator of a binary expression other than || and &&;
+             None for any other expression
+    """
+    for node_class in type(node).__mro__:
+        if node_class in OPERATORS:
+            return OPERATORS[node_class]
+    return None
+
+
+# ######## SSA form ############
+
+def dominators(cfg):
+    """
+    Find the immediate dominator of every block, the last block on every
+    path from the entry to it, with the algorithm of Cooper, Harvey and
+    Kennedy
+    :param cfg: a ControlFlowGraph
+    :return: a dictionary of the form { block: immediate dominator }; the
+             entry block has None
+    """
+    order = {block: index for index, block in enumerate(cfg.blocks)}
+    idom = {cfg.entry: cfg.entry}
+
+    def intersect(first, second):
+        while first is not second:
+            while order[first] > order[second]:
+                first = idom[first]
+            while order[second] > order[first]:
+                second = idom[second]
+        return first
+
+    changed = True
+    while changed:
+        changed = False
+        for block in cfg.blocks[1:]:
+            processed = [predecessor for predecessor in block.predecessors
+                         if predecessor in idom]
+            dominator = processed[0]
+            for predecessor in processed[1:]:
+                dominator = intersect(predecessor, dominator)
+            if idom.get(block) is not dominator:
+                idom[block] = dominator
+                changed = True
+    idom[cfg.entry] = None
+    return idom
+
+
+def dominance_frontiers(cfg, idom):
+    """
+    Find the dominance frontier of every block: the blocks where its
+    dominance ends, which is where the values it assigns meet others
+    :param cfg: a ControlFlowGraph
+    :param idom: the immediate dominators, see dominators()
+    :return: a dictionary of the form { block: set of blocks }
+    """
+    frontiers = {block: set() for block in cfg.blocks}
+    for block in cfg.blocks:
+        if len(block.predecessors) < 2:
+            continue
+        for predecessor in block.predecessors:
+            runner = predecessor
+            while runner is not idom[block]:
+                frontiers[runner].add(block)
+                runner = idom[runner]
+    return frontiers
+
+
+class SSABuilder(object):
+    """
+    A pass that converts a ControlFlowGraph into SSA form, in which every
+    variable is assigned by one instruction. Phi functions are placed on
+    the dominance frontiers of the assignments, but only where the
+    variable is live, and the variables are then renamed along the
+    dominator tree (Cytron et al.). The declared variables, and the
+    temporaries that are assigned more than once by || and &&, are
+    renamed; a read of version 0 of a variable may read it undefined.
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.idom = {}
+        self.renamed = set()
+        self.counters = {}
+        self.stacks = {}
+
+    def build(self):
+        """
+        Convert the graph in place
+        :return: the ControlFlowGraph
+        """
+        if self.cfg.ssa:
+            return self.cfg
+        self.idom = dominators(self.cfg)
+        definitions = {}
+        for block in self.cfg.blocks:
+            for instruction in block.instructions:
+                if instruction.target is not None:
+                    definitions.setdefault(instruction.target.name, []).append(block)
+        # The order of the names is the order of the phi functions
+        names = list(self.cfg.declarations)
+        names.extend(name for name, blocks in definitions.items()
+                     if len(blocks) > 1 and name not in self.cfg.declarations)
+        self.renamed = set(names)
+        self.place_phis(names, definitions)
+        self.rename()
+        self.cfg.ssa = True
+        return self.cfg
+
+    def place_phis(self, names, definitions):
+        """
+        Insert the phi functions of the renamed variables
+        :param names: the renamed variables, in order
+        :param definitions: a dictionary of the form { name: the blocks
+                            that assign it }
+        """
+        frontiers = dominance_frontiers(self.cfg, self.idom)
+        live_in, _ = liveness(self.cfg)
+        for name in names:
+            variable = Variable(name)
+            has_phi = set()
+            work = list(set(definitions.get(name, ())))
+            queued = set(work)
+            while work:
+                block = work.pop()
+                for frontier in frontiers[block]:
+                    if frontier in has_phi or variable not in live_in[frontier]:
+                        continue
+                    frontier.instructions.insert(len(frontier.phis()),
+                                                 Phi(Variable(name), frontier.predecessors))
+                    has_phi.add(frontier)
+                    if frontier not in queued:
+                        queued.add(frontier)
+                        work.append(frontier)
+
+    def rename(self):
+        """
+        Give every assignment of a renamed variable a new version and make
+        every read use the version that reaches it
+        """
+        self.counters = {name: 0 for name in self.renamed}
+        self.stacks = {name: [0] for name in self.renamed}
+        children = {block: [] for block in self.cfg.blocks}
+        for block, dominator in self.idom.items():
+            if dominator is not None:
+                children[dominator].append(block)
+        # The blocks are entered in preorder and left in postorder of the
+        # dominator tree; leaving a block pops the versions it pushed
+        stack = [(self.cfg.entry, False)]
+        pushed = {}
+        while stack:
+            block, leaving = stack.pop()
+            if leaving:
+                for name in pushed.pop(block):
+                    self.stacks[name].pop()
+                continue
+            pushed[block] = self.rename_block(block)
+            stack.append((block, True))
+            stack.extend((child, False) for child in reversed(children[block]))
+
+    def rename_block(self, block):
+        """
+        Rename the variables of a block and the phi operands of its
+        successors that come from it
+        :return: the names whose new versions the block pushed
+        """
+        names = []
+        for instruction in block.all_instructions():
+            if not isinstance(instruction, Phi):
+                instruction.operands = [self.current(operand) for operand in instruction.operands]
+            target = instruction.target
+            if target is not None and target.name in self.renamed:
+                self.counters[target.name] += 1
+                version = self.counters[target.name]
+                self.stacks[target.name].append(version)
+                instruction.target = Variable(target.name, version)
+                names.append(target.name)
+        for successor in block.successors():
+            for phi in successor.phis():
+                for index, predecessor in enumerate(phi.blocks):
+                    if predecessor is block:
+                        phi.operands[index] = self.current(phi.operands[index])
+        return names
+
+    def current(self, operand):
+        """
+        :param operand: a Variable or a Constant
+        :return: the operand with the version of the variable that reaches
+                 the current block
+        """
+        if isinstance(operand, Variable) and operand.name in self.renamed:
+            return Variable(operand.name, self.stacks[operand.name][-1])
+        return operand
+
+
+# ######## Analyses ############
+
+def liveness(cfg):
+    """
+    Find the variables that are live on entry to and on exit from every
+    block: those that may be read before they are assigned again. A phi
+    operand is live on exit from the predecessor it comes from, not on
+    entry to the block of the phi.
+    :param cfg: a ControlFlowGraph, in SSA form or not
+    :return: a (live_in, live_out) tuple of dictionaries of the form
+             { block: set of Variable objects }
+    """
+    upward = {}
+    defined = {}
+    phi_defined = {}
+    phi_used = {block: set() for block in cfg.blocks}
+    for block in cfg.blocks:
+        used, assigned = set(), set()
+        for instruction in block.all_instructions():
+            if isinstance(instruction, Phi):
+                for predecessor, operand in zip(instruction.blocks, instruction.operands):
+                    if isinstance(operand, Variable):
+                        phi_used[predecessor].add(operand)
+            else:
+                used.update(variable for variable in instruction.uses()
+                            if variable not in assigned)
+            if instruction.target is not None:
+                assigned.add(instruction.target)
+        upward[block] = used
+        defined[block] = assigned
+        phi_defined[block] = {phi.target for phi in block.phis()}
+
+    live_in = {block: set() for block in cfg.blocks}
+    live_out = {block: set() for block in cfg.blocks}
+    changed = True
+    while changed:
+        changed = False
+        # Backward problem: visiting in postorder converges faster
+        for block in reversed(cfg.blocks):
+            out = set(phi_used[block])
+            for successor in block.successors():
+                out |= live_in[successor] - phi_defined[successor]
+            new_in = phi_defined[block] | upward[block] | (out - defined[block])
+            if out != live_out[block] or new_in != live_in[block]:
+                live_out[block] = out
+                live_in[block] = new_in
+                changed = True
+    return live_in, live_out
+
+
+def reaching_definitions(cfg):
+    """
+    Find the assignments whose value may reach the entry to and the exit
+    from every block without being overwritten
+    :param cfg: a ControlFlowGraph, in SSA form or not
+    :return: a (reach_in, reach_out) tuple of dictionaries of the form
+             { block: set of Instruction objects }
+    """
+    assignments = {}
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            if instruction.target is not None:
+                assignments.setdefault(instruction.target, set()).add(instruction)
+    generated = {}
+    killed = {}
+    for block in cfg.blocks:
+        last = {}
+        for instruction in block.instructions:
+            if instruction.target is not None:
+                last[instruction.target] = instruction
+        generated[block] = set(last.values())
+        killed[block] = set()
+        for target in last:
+            killed[block] |= assignments[target]
+        killed[block] -= generated[block]
+
+    reach_in = {block: set() for block in cfg.blocks}
+    reach_out = {block: set(generated[block]) for block in cfg.blocks}
+    changed = True
+    while changed:
+        changed = False
+        for block in cfg.blocks:
+            new_in = set()
+            for predecessor in block.predecessors:
+                new_in |= reach_out[predecessor]
+            if new_in != reach_in[block]:
+                reach_in[block] = new_in
+                reach_out[block] = generated[block] | (new_in - killed[block])
+                changed = True
+    return reach_in, reach_out
+
+
+def def_use(cfg):
+    """
+    Link every assignment to the instructions that may read the value it
+    assigns. A read that no assignment reaches reads an undefined
+    variable; such reads are listed under None.
+    :param cfg: a ControlFlowGraph, in SSA form or not
+    :return: a dictionary of the form { assignment: list of instructions }
+    """
+    reach_in, reach_out = reaching_definitions(cfg)
+    chains = {}
+    for block in cfg.blocks:
+        for instruction in block.instructions:
+            if instruction.target is not None:
+                chains[instruction] = []
+
+    def link(variable, reaching, instruction):
+        found = False
+        for definition in reaching:
+            if definition.target == variable:
+                chains[definition].append(instruction)
+                found = True
+        if not found:
+            chains.setdefault(None, []).append(instruction)
+
+    for block in cfg.blocks:
+        reaching = set(reach_in[block])
+        for instruction in block.all_instructions():
+            if isinstance(instruction, Phi):
+                for predecessor, operand in zip(instruction.blocks, instruction.operands):
+                    if isinstance(operand, Variable):
+                        link(operand, reach_out[predecessor], instruction)
+            else:
+                for variable in instruction.uses():
+                    link(variable, reaching, instruction)
+            if instruction.target is not None:
+                reaching = {definition for definition in reaching
+                            if definition.target != instruction.target}
+                reaching.add(instruction)
+    return chains
+
+
+def lower(program, ssa=True):
+    """
+    A convenience function that lowers a type checked program
+    :param program: an ast.Program object
+    :param ssa: convert the graph to SSA form [optional]
+    :return: a ControlFlowGraph
+    """
+    cfg = Lowering(program).lower()
+    if ssa:
+        SSABuilder(cfg).build()
+    return cfg
@@ -1 +1,249 @@
-# coding=utf-8"""CS 364 Programming LanguagesAuthor: Vela Dimitrova MinevaDate: 03/06/2015"""import sysimport reimport osimport tokensclass Lexer(object):    """    A Lexer class that models a Clite lexical analyzer.    The lexer recognizes Clite tokens and token_generator() method    returns them one at a time upon a call of the builtin __next__() function.    """    # Token status indicator    # VALIDITY = {0: "INVALID", 1: "VALID"}    def __init__(self, filename):        self.Clite_file = self.open_file(filename)        self.token_generator()    @staticmethod    def open_file(filename):        """        A method that, given a filename returns the opened file object.        If the file is not successfully opened, a message is printed and        the program is terminated.        :param filename: type(filename) is a string; len(filename) > 0        :return type(file) is a file object        """        if os.path.isfile(filename):            try:                file = open(filename)            except IOError:                sys.stdout.write("Could not open {0}!\n".format(filename))                sys.exit(0)            else:                return file        else:            sys.stdout.write("The file {0} does not exist!\n".format(filename))            sys.exit(0)    @staticmethod    def remove_comments(line):        """        A method that removes comments from a line        and returns it.        :param line: type(line) is a string        :return: type(processed_line) is a string        """        processed_line = re.sub("//.*$", "", line)        return processed_line    @staticmethod    def get_token_regex(collection, patt=""):        """        A method that generates a regular expression by a given        collection. The optional patt parameters allows to        attach a pattern to the front of the regular expression        :param collection: type(collection) is a collection        :param patt: patt is a regex [optional]        :return: generated regular expression, type(expression) is string        """        expression = ""        if patt:            expression += patt + "|"        for token in collection:            expression += "(" + re.escape(token) + ")|"        return expression[0:-1]    def token_generator(self):        """        A method that goes through each line in a file, removes comments,        splits each line on tokens and yields a 4-tuple of the form        (NAME, TOKEN, LINE NUMBER, VALIDITY)        03/28/2015: Method modified to yield a 4-tuple of the form                    (CODE, TOKEN, LINE NUMBER)        The program is terminated if unrecognized token is encountered        """        # Compile regular expression patterns that will be used to identify tokens        int_lit = re.compile(tokens.INTLIT[2])              # an integer literal        real_number = re.compile(tokens.REAL_NUMBER[2])      # a real number        identifier = re.compile(tokens.ID[2])        # identifier        # Form a regular expression        complex_tokens_regex = self.get_token_regex(tokens.COMPLEX_TOKENS, "\s+")        single_tokens_regex = self.get_token_regex(tokens.SINGLE_TOKENS)        token_regex = complex_tokens_regex + "|" + single_tokens_regex        line_number = 0        # Process each line in the file        for number, line in enumerate(self.Clite_file):            line_number = number + 1            # If the line contains a comment, remove the comment            line = self.remove_comments(line)            # Split the processed line on the formed regular expression            line_tokens = re.split(token_regex, line)            # Process each token in a line            for tok in line_tokens:                if not tok:                    continue                elif tok in tokens.COMPLEX_TOKENS.keys():                    code = tokens.COMPLEX_TOKENS[tok][0]                    name = tokens.COMPLEX_TOKENS[tok][1]                    yield (code, name, tok, line_number)                elif real_number.search(tok):                    code = tokens.REAL_NUMBER[0]                    name = tokens.REAL_NUMBER[1]                    yield (code, name, tok, line_number)                elif int_lit.search(tok):                    yield (tokens.INTLIT[0], tokens.INTLIT[1], int(tok), line_number)                elif tok in tokens.KEYWORDS:                    yield (tokens.KEYWORDS[tok], tokens.KEYWORD, tok, line_number)                elif identifier.search(tok):                    yield (tokens.ID[0], tokens.ID[1], tok, line_number)                elif tok in tokens.SINGLE_TOKENS.keys():                    code = tokens.SINGLE_TOKENS[tok][0]                    name = tokens.SINGLE_TOKENS[tok][1]                    yield (code, name, tok, line_number)                else:                    # yield (tokens.UNRECOGNIZED_TOKEN[0], tokens.UNRECOGNIZED_TOKEN[1],                    #       tok, line_number, self.VALIDITY[0])                    sys.exit("ERROR at LINE NUMBER {0}: "                             "Unrecognized token '{1}'!\nGood night!".format(line_number, tok))        while True:            yield (tokens.END_OF_FILE[0], tokens.END_OF_FILE[1], "", line_number)
\ No newline at end of file
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 03/06/2015
+"""
+import array
+import contextlib
+import mmap
+import re
+import sys
+
+import errors
+import tokens
+
+
+def build_master_regex():
+    """
+    A function that builds the single regular expression that recognizes
+    every Clite token. Each alternative is a named group, and the name of
+    the group that matched tells the kind of the token. The alternatives
+    are ordered by how often they match; comments come before operators,
+    so that '//' is not read as two divisions, and longer operators come
+    before shorter ones, so that '<=' is not read as '<' followed by '='.
+    A run of word characters that is
+    not a valid literal or identifier (e.g. '4a' or '3.4.5') is matched
+    as a whole by MISMATCH and reported as one unrecognized token.
+    :return: a compiled bytes pattern
+    """
+    operators = sorted(list(tokens.COMPLEX_TOKENS) + list(tokens.SINGLE_TOKENS),
+                       key=len, reverse=True)
+    patterns = [
+        ("SKIP", r"[ \t\f\v]+"),
+        ("ID", r"[a-zA-Z_]\w*(?![\w.])"),
+        ("COMMENT", r"//[^\r\n]*"),
+        ("OPERATOR", "|".join(re.escape(operator) for operator in operators)),
+        ("REAL", r"\d+\.\d+(?![\w.])"),
+        ("INT", r"\d+(?![\w.])"),
+        ("NEWLINE", r"\r\n?|\n"),
+        ("MISMATCH", r"[\w.]+|\S")
+    ]
+    return re.compile("|".join("(?P<{0}>{1})".format(name, pattern)
+                               for name, pattern in patterns).encode())
+
+
+def build_operator_table():
+    """
+    :return: a dictionary { operator as bytes: (code, name, operator) }
+    """
+    table = {}
+    for collection in (tokens.COMPLEX_TOKENS, tokens.SINGLE_TOKENS):
+        for operator, (code, name) in collection.items():
+            table[operator.encode()] = (code, name, operator)
+    return table
+
+
+def build_token_names():
+    """
+    :return: a dictionary { token code: token name }
+    """
+    names = {code: tokens.KEYWORD for code in tokens.KEYWORDS.values()}
+    for collection in (tokens.COMPLEX_TOKENS, tokens.SINGLE_TOKENS):
+        for code, name in collection.values():
+            names[code] = name
+    for token in (tokens.INTLIT, tokens.REAL_NUMBER, tokens.ID, tokens.END_OF_FILE):
+        names[token[0]] = token[1]
+    return names
+
+
+class TokenStream(object):
+    """
+    A compact token list for the parser. Instead of one tuple per token,
+    the codes, values and line numbers are stored in parallel: codes and
+    lines in typed arrays and the values in a list of interned strings
+    and ints. Token i is (codes[i], values[i], lines[i]); the last token
+    is always the end of file token. A stream made with offsets also
+    holds the byte offsets where token i starts and ends in the source.
+    """
+
+    NAMES = build_token_names()
+
+    def __init__(self):
+        self.codes = array.array('H')
+        self.values = []
+        self.lines = array.array('I')
+        self.starts = None
+        self.ends = None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def token(self, index):
+        """
+        Return token index in the tuple form produced by token_generator()
+        :return: a 4-tuple (CODE, TOKEN, VALUE, LINE NUMBER)
+        """
+        code = self.codes[index]
+        return code, self.NAMES[code], self.values[index], self.lines[index]
+
+
+class Lexer(object):
+    """
+    A Lexer class that models a Clite lexical analyzer.
+    The lexer recognizes Clite tokens and token_generator() method
+    returns them one at a time upon a call of the builtin __next__() function.
+    The file is memory mapped and scanned with one compiled regular
+    expression, so large files are never copied into memory. A lexer made by from_string() scans source text
+    instead of a file.
+    """
+
+    MASTER_REGEX = build_master_regex()
+    OPERATORS = build_operator_table()
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.text = None
+
+    @classmethod
+    def from_string(cls, text, filename="<string>"):
+        """
+        Make a lexer that reads source text instead of a file
+        :param text: the Clite source; type - string or bytes
+        :param filename: a name for the source
+        :return: a Lexer object
+        """
+        source_lexer = cls(filename)
+        source_lexer.text = text.encode() if isinstance(text, str) else bytes(text)
+        return source_lexer
+
+    @staticmethod
+    def open_source(file):
+        """
+        A method that maps an open binary file into memory. Empty files
+        cannot be mapped and are read instead.
+        :param file: a file object opened in binary mode
+        :return: an mmap object or a bytes object
+        """
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return file.read()
+
+    @contextlib.contextmanager
+    def source(self):
+        """
+        A context manager that gives the bytes to scan: the source text,
+        or the memory mapped file, which is closed afterwards
+        """
+        if self.text is not None:
+            yield self.text
+            return
+        with open(self.filename, 'rb') as file:
+            source = self.open_source(file)
+            try:
+                yield source
+            finally:
+                if isinstance(source, mmap.mmap):
+                    source.close()
+
+    def token_generator(self):
+        """
+        A generator that yields the tokens of the file as 4-tuples of the
+        form (CODE, TOKEN, VALUE, LINE NUMBER). After the last token the
+        end of file token is yielded for every further call. The tokens
+        come from token_stream(), so the whole file is scanned by the
+        first call.
+        :raise CliteUnrecognizedTokenError if an unrecognized token is seen
+        """
+        stream = self.token_stream()
+        last = len(stream) - 1
+        for index in range(last):
+            yield stream.token(index)
+        end_of_file = stream.token(last)
+        while True:
+            yield end_of_file
+
+    def token_stream(self, line_number=1, offsets=False):
+        """
+        A method that tokenizes the whole file into a TokenStream
+        :param line_number: the line the source starts on
+        :param offsets: also record where each token starts and ends in
+                        the source, in the starts and ends arrays of the
+                        stream
+        :return: a TokenStream ending with the end of file token
+        :raise CliteUnrecognizedTokenError if an unrecognized token is seen
+        """
+        stream = TokenStream()
+        add_code = stream.codes.append
+        add_value = stream.values.append
+        add_line = stream.lines.append
+        add_span = None
+        if offsets:
+            stream.starts = array.array('L')
+            stream.ends = array.array('L')
+            add_start = stream.starts.append
+            add_end = stream.ends.append
+
+            def add_span(match):
+                add_start(match.start())
+                add_end(match.end())
+        keywords = tokens.KEYWORDS
+        operators = {lexeme: (code, value) for lexeme, (code, name, value)
+                     in self.OPERATORS.items()}
+        intern = sys.intern
+        int_code = tokens.INTLIT[0]
+        real_code = tokens.REAL_NUMBER[0]
+        id_code = tokens.ID[0]
+
+        first_line = line_number
+        with self.source() as source:
+            for match in self.MASTER_REGEX.finditer(source):
+                kind = match.lastgroup
+                if kind == "SKIP":
+                    continue
+                elif kind == "ID":
+                    value = intern(match.group().decode())
+                    add_code(keywords.get(value, id_code))
+                    add_value(value)
+                elif kind == "OPERATOR":
+                    code, value = operators[match.group()]
+                    add_code(code)
+                    add_value(value)
+                elif kind == "NEWLINE":
+                    line_number += 1
+                    continue
+                elif kind == "COMMENT":
+                    continue
+                elif kind == "INT":
+                    add_code(int_code)
+                    add_value(int(match.group()))
+                elif kind == "REAL":
+                    add_code(real_code)
+                    add_value(intern(match.group().decode()))
+                else:
+                    raise errors.CliteUnrecognizedTokenError(
+                        match.group().decode(errors="replace"), line_number)
+                add_line(line_number)
+                if add_span is not None:
+                    add_span(match)
+            if line_number > first_line and source[-1:] in (b"\n", b"\r"):
+                line_number -= 1
+            if add_span is not None:
+                stream.starts.append(len(source))
+                stream.ends.append(len(source))
+
+        add_code(tokens.END_OF_FILE[0])
+        add_value("")
+        add_line(line_number)
+        return stream
@@ -0,0 +1,289 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/08/2015
+"""
+import math
+import time
+
+import ast
+import errors
+import typechecker
+import visitor
+
+# Number of loop iterations between two looks at the clock
+CHECK_INTERVAL = 1024
+
+
+class ResourceLimits(object):
+    """
+    The resources a program may use while it is evaluated: a budget of
+    steps, where a step is one iteration of a while loop, the only
+    statement that can run for ever; a timeout in seconds; and the number
+    of bits of the largest integer a * or ** may compute. None stands for
+    no limit. A program that exceeds a limit is stopped with a
+    CliteLimitError.
+    The object also counts the steps of the run in progress; start() is
+    called by ast.Program.execute() before every run.
+    """
+
+    def __init__(self, max_steps=None, timeout=None, max_int_bits=None):
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.max_int_bits = max_int_bits
+        self.steps = 0
+        self.next_check = 0
+        self.deadline = None
+
+    def __bool__(self):
+        return self.max_steps is not None or self.timeout is not None or \
+            self.max_int_bits is not None
+
+    def start(self):
+        """
+        A method that starts counting the steps and the time of a run
+        :return: None
+        """
+        self.steps = 0
+        self.deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        self.schedule()
+
+    def schedule(self):
+        """
+        A method that sets the step count at which check() is called next
+        :return: None
+        """
+        if self.deadline is not None:
+            self.next_check = self.steps + CHECK_INTERVAL
+            if self.max_steps is not None:
+                self.next_check = min(self.next_check, self.max_steps + 1)
+        elif self.max_steps is not None:
+            self.next_check = self.max_steps + 1
+        else:
+            self.next_check = float('inf')
+
+    def check(self, line_number=-1):
+        """
+        A method called by a loop when the step count reaches next_check
+        :param line_number: the line of the loop
+        :return: None
+        :raise CliteLimitError if the program ran out of steps or time
+        """
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise errors.CliteLimitError("The program ran more than {0} loop iterations!".
+                                         format(self.max_steps), line_number, "steps")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise errors.CliteLimitError("The program ran longer than {0} seconds!".
+                                         format(self.timeout), line_number, "timeout")
+        self.schedule()
+
+    def check_bits(self, bits, line_number=-1):
+        """
+        A method that checks the size of an integer before it is computed
+        :param bits: an upper bound on the number of bits of the integer
+        :param line_number: the line of the operation
+        :return: None
+        :raise CliteLimitError if the integer would be too large
+        """
+        if bits > self.max_int_bits:
+            raise errors.CliteLimitError("An integer larger than {0} bits was computed!".
+                                         format(self.max_int_bits), line_number, "int_bits")
+
+
+class GuardedWhileStatement(ast.WhileStatement):
+    """
+    A while statement that counts its iterations against the step budget
+    and the timeout of its ResourceLimits
+    """
+
+    def __init__(self, loop, limits, line_number=-1):
+        super().__init__(loop.expression, loop.statement, loop.level)
+        self.limits = limits
+        # A loop has no line of its own; its errors carry the line of
+        # its condition
+        self.line_number = line_number
+
+    def eval(self):
+        """
+        A method that evaluates the loop and checks the limits
+        :return None
+        :raise CliteLimitError when a limit is exceeded
+        """
+        limits = self.limits
+        expression = self.expression
+        statement = self.statement
+        while expression.eval():
+            limits.steps += 1
+            if limits.steps >= limits.next_check:
+                limits.check(self.line_number)
+            statement.eval()
+
+
+class GuardedTimesExpression(ast.BinaryTimesExpression):
+    """
+    A times expression whose integer result may not be larger than the
+    integer size limit
+    """
+
+    def __init__(self, expression, limits):
+        super().__init__(expression.left, expression.right, expression.line_number)
+        self.limits = limits
+
+    def eval(self):
+        """
+        A method that evaluates a binary times expression
+        :return an evaluated expression of the same type as the terms
+        :raise CliteLimitError if the integer result would be too large
+        """
+        if not self.checked:
+            self.validate_numerical_expression()
+        left = self.left.eval()
+        right = self.right.eval()
+        if type(left) is int and type(right) is int:
+            self.limits.check_bits(left.bit_length() + right.bit_length(), self.line_number)
+        return left * right
+
+
+class GuardedExpExpression(ast.BinaryExpExpression):
+    """
+    An exponentiation whose integer result may not be larger than the
+    integer size limit. The size is estimated before the power is
+    computed, so a huge power is never allocated.
+    """
+
+    def __init__(self, expression, limits):
+        super().__init__(expression.left, expression.right, expression.line_number)
+        self.limits = limits
+
+    def eval(self):
+        """
+        A method that evaluates a binary exponentiation expression
+        :return an evaluated expression of the same type as the terms
+        :raise CliteLimitError if the integer result would be too large
+        """
+        if not self.checked:
+            self.validate_numerical_expression()
+        left = self.left.eval()
+        right = self.right.eval()
+        if type(left) is int and type(right) is int and right > 0 and abs(left) > 1:
+            # Every unit of the exponent adds at least one bit, and a huge
+            # exponent would overflow the float estimate
+            if right > self.limits.max_int_bits:
+                bits = right + 1
+            else:
+                bits = int(right * math.log2(abs(left))) + 1
+            self.limits.check_bits(bits, self.line_number)
+        return left ** right
+
+
+class LimitGuard(visitor.NodeTransformer):
+    """
+    A pass that prepares a program to run under ResourceLimits. The
+    nodes that can run for ever or allocate without bound are replaced by
+    the guarded subclasses above, which check the limits as they are
+    evaluated; nodes with no limit to check are left as they are, so a
+    limit costs nothing where it is not needed.
+    Only the tree walking evaluator checks the limits; the compiling back
+    ends would treat the guarded nodes as the plain ones.
+    """
+
+    def __init__(self, program, limits):
+        self.program = program
+        self.limits = limits
+        self.guarded = 0
+
+    def apply(self):
+        """
+        Guard the program in place
+        :return: the ast.Program object
+        """
+        self.program.limits = self.limits
+        return self.transform(self.program)
+
+    def guard(self, guarded, node):
+        """
+        Give a guarded node the type checking results of the node it
+        replaces
+        :param guarded: the new guarded node
+        :param node: the replaced ast node
+        :return: the guarded node
+        """
+        if isinstance(node, ast.Expression):
+            guarded.checked = node.checked
+            guarded.clite_type = getattr(node, 'clite_type', None)
+        self.guarded += 1
+        return guarded
+
+    def visit_WhileStatement(self, node):
+        self.generic_visit(node)
+        if self.limits.max_steps is None and self.limits.timeout is None:
+            return node
+        # The condition may have been hoisted out of the loop
+        expression = node.expression
+        while isinstance(expression, ast.LoopInvariantExpression):
+            expression = expression.expression
+        return self.guard(GuardedWhileStatement(node, self.limits,
+                                                typechecker.line_of(expression)), node)
+
+    def visit_BinaryTimesExpression(self, node):
+        self.generic_visit(node)
+        if self.limits.max_int_bits is None:
+            return node
+        return self.guard(GuardedTimesExpression(node, self.limits), node)
+
+    def visit_BinaryExpExpression(self, node):
+        self.generic_visit(node)
+        if self.limits.max_int_bits is None:
+            return node
+        return self.guard(GuardedExpExpression(node, self.limits), node)
+
+    def visit_GuardedWhileStatement(self, node):
+        # An invariant hoisted out of a loop is reached twice, once from
+        # its loop and once from where it is used
+        return node
+
+    visit_GuardedTimesExpression = visit_GuardedExpExpression = visit_GuardedWhileStatement
+
+
+def add_arguments(arg_parser):
+    """
+    A function that adds the resource limit options to a command line
+    :param arg_parser: an argparse.ArgumentParser
+    :return: None
+    """
+    group = arg_parser.add_argument_group("resource limits",
+                                          "stop a program that exceeds a limit; only "
+                                          "the tree walking evaluator checks them")
+    group.add_argument("--max-steps", metavar="N", type=int,
+                       help="the number of while loop iterations a program may run")
+    group.add_argument("--timeout", metavar="SECONDS", type=float,
+                       help="the time a program may run for")
+    group.add_argument("--max-int-bits", metavar="N", type=int,
+                       help="the number of bits of the largest integer * and ** "
+                            "may compute")
+
+
+def from_arguments(arguments):
+    """
+    Make the ResourceLimits selected on the command line
+    :param arguments: an argparse.Namespace with the options added by
+                      add_arguments()
+    :return: a ResourceLimits object
+    :raise ValueError if a limit is not positive
+    """
+    for name in ("max_steps", "timeout", "max_int_bits"):
+        value = getattr(arguments, name)
+        if value is not None and value <= 0:
+            raise ValueError("--{0} must be positive".format(name.replace("_", "-")))
+    return ResourceLimits(arguments.max_steps, arguments.timeout, arguments.max_int_bits)
+
+
+def apply(program, limits):
+    """
+    A convenience function that makes a program run under limits
+    :param program: a type checked, and possibly optimized, ast.Program
+    :param limits: a ResourceLimits object
+    :return: the ast.Program object
+    """
+    return LimitGuard(program, limits).apply()
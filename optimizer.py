@@ -0,0 +1,779 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/28/2015
+"""
+import operator
+
+import analysis
+import ast
+import errors
+import tokens
+import typechecker
+import visitor
+
+# Python function for each binary expression class
+OPERATORS = {
+    ast.BinaryPlusExpression: operator.add, ast.BinaryMinusExpression: operator.sub,
+    ast.BinaryTimesExpression: operator.mul, ast.BinaryDivideExpression: operator.truediv,
+    ast.BinaryModExpression: operator.mod, ast.BinaryExpExpression: operator.pow,
+    ast.BinaryLessExpression: operator.lt, ast.BinaryLessEqualExpression: operator.le,
+    ast.BinaryGreaterExpression: operator.gt, ast.BinaryGreaterEqualExpression: operator.ge,
+    ast.BinaryEqualOpExpression: operator.eq, ast.BinaryNotEqualOpExpression: operator.ne,
+    ast.Conjunction: lambda left, right: left or right,
+    ast.Equality: lambda left, right: left and right
+}
+
+# Operations that can raise an error, which makes an invariant lazy
+RAISING_OPERATIONS = (ast.BinaryDivideExpression, ast.BinaryModExpression,
+                      ast.BinaryExpExpression)
+
+# An integer power is not folded when its result would need more bits,
+# so that 'x = 10 ** 1000000;' does not stall the optimizer
+MAX_FOLDED_BITS = 4096
+
+# The largest constant exponent computed by a chain of multiplications
+MAX_CHAIN_EXPONENT = 4
+
+
+class Optimizer(visitor.NodeTransformer):
+    """
+    An optimizer that rewrites a type checked ast.Program before it is
+    evaluated. Literals are replaced by ast.ConstantExpression nodes that
+    hold their converted value, subexpressions whose operands are all
+    constant are folded into one ConstantExpression, and identities such
+    as x * 1, x - 0 and !!b are reduced to their operand. A Factor without
+    a unary operator is replaced by its primary.
+    An operation that fails while folding, e.g. 1 / 0, is left in the tree
+    so that it fails when the program runs, as it did before.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.folded = 0
+        self.simplified = 0
+
+    def optimize(self):
+        """
+        Optimize the program in place
+        :return: the ast.Program object
+        """
+        return self.transform(self.program)
+
+    def constant(self, value, node):
+        """
+        Make the constant that replaces a node
+        :param value: the value of the node
+        :param node: a type checked ast.Expression object
+        :return: an ast.ConstantExpression object
+        """
+        constant = ast.ConstantExpression(value, node.clite_type, typechecker.line_of(node))
+        constant.checked = True
+        return constant
+
+    # ######## Expressions ############
+
+    def visit_BinaryExpression(self, node):
+        node.left = left = self.visit(node.left)
+        node.right = right = self.visit(node.right)
+        if not node.checked:
+            return node
+        if isinstance(left, ast.ConstantExpression) and isinstance(right, ast.ConstantExpression):
+            value = fold(type(node), left.value, right.value, getattr(node, 'operation', None))
+            if value is None:
+                return node
+            self.folded += 1
+            return self.constant(value, node)
+        replacement = self.simplify(node, left, right)
+        if replacement is not node:
+            self.simplified += 1
+        return replacement
+
+    def simplify(self, node, left, right):
+        """
+        Reduce an operation with one constant operand that does not change
+        the other operand. An int or float typed operand can hold either
+        kind of number when the program runs, e.g. 7 / 2 is an int typed
+        3.5, so only x * 1, 1 * x, x - 0 and x ** 1 with an int constant
+        are reduced: they keep both kinds unchanged. x + 0 turns -0.0 into
+        0.0, and x / 1 turns an int into a float.
+        :return: the node that replaces node
+        """
+        node_class = type(node)
+        if node_class is ast.Conjunction or node_class is ast.Equality:
+            # false || b and true && b are b; true || b and false && b are
+            # decided by the left operand and b is never evaluated
+            decides = node_class is ast.Conjunction
+            if is_constant(left, decides):
+                return left
+            elif is_constant(left, not decides):
+                return right
+            elif is_constant(right, not decides):
+                return left
+            return node
+
+        same_type = node.clite_type == left.clite_type, node.clite_type == right.clite_type
+        if node_class is ast.BinaryMinusExpression:
+            if same_type[0] and is_constant(right, 0):
+                return left
+        elif node_class is ast.BinaryTimesExpression:
+            if same_type[0] and is_constant(right, 1):
+                return left
+            elif same_type[1] and is_constant(left, 1):
+                return right
+        elif node_class is ast.BinaryExpExpression:
+            if same_type[0] and is_constant(right, 1):
+                return left
+        return node
+
+    def visit_Factor(self, node):
+        node.primary = primary = self.visit(node.primary)
+        if not node.unary_operator:
+            return primary
+        if not node.checked:
+            return node
+        if isinstance(primary, ast.ConstantExpression):
+            self.folded += 1
+            if node.unary_operator == tokens.NOT:
+                return self.constant(not primary.value, node)
+            negate = getattr(node, 'operation', operator.neg)
+            return self.constant(negate(primary.value), node)
+        if isinstance(primary, ast.Factor) and primary.unary_operator == node.unary_operator:
+            # !!b is b and -(-x) is x
+            self.simplified += 1
+            return primary.primary
+        return node
+
+    def visit_IntLitExpression(self, node):
+        return self.constant(int(node.intlit), node)
+
+    def visit_RealNumberExpression(self, node):
+        return self.constant(float(node.real_number), node)
+
+    def visit_TrueExpression(self, node):
+        return self.constant(True, node)
+
+    def visit_FalseExpression(self, node):
+        return self.constant(False, node)
+
+    def visit_Primary(self, node):
+        return node
+
+
+class LoopInvariantMotion(visitor.NodeTransformer):
+    """
+    A pass that moves loop invariant expressions out of while statements.
+    For every loop the pass collects the variables assigned in its body;
+    an expression that reads none of them has the same value in every
+    iteration. The largest such expressions are wrapped in
+    ast.LoopInvariantExpression nodes and the loop is replaced by an
+    ast.HoistedLoop that computes them once per entry. An expression is
+    moved to the outermost loop for which it is invariant.
+    An invariant that can raise a CliteRuntimeError or an arithmetic
+    error, because it reads a variable that may be undefined or divides,
+    is evaluated lazily at its first use, so it fails where it did before.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.unsafe_reads = analysis.unsafe_reads(program)
+        # For each enclosing loop, from the outermost: the assigned
+        # variables and the invariants hoisted out of it
+        self.loops = []
+        self.invariants = []
+        self.levels = {}
+        self.hoisted = 0
+
+    def optimize(self):
+        """
+        Hoist the loop invariants of the program in place
+        :return: the ast.Program object
+        """
+        return self.transform(self.program)
+
+    def visit_WhileStatement(self, node):
+        self.loops.append(analysis.assigned_variables(node.statement))
+        self.invariants.append([])
+        node.expression = self.visit(node.expression)
+        node.statement = self.visit(node.statement)
+        self.loops.pop()
+        invariants = self.invariants.pop()
+        if not invariants:
+            return node
+        self.hoisted += len(invariants)
+        return ast.HoistedLoop(node, invariants)
+
+    def visit_Expression(self, node):
+        if not self.loops:
+            return node
+        self.levels = {}
+        self.level(node)
+        return self.hoist(node, len(self.loops))
+
+    def level(self, node):
+        """
+        Compute the index of the outermost loop for which an expression and
+        each of its subexpressions is invariant; len(self.loops) stands for
+        an expression that changes in the innermost loop.
+        :param node: an ast.Expression object
+        :return: type - int
+        """
+        if isinstance(node, ast.IdentifierExpression):
+            level = len(self.loops)
+            for index, assigned in enumerate(self.loops):
+                if node.identifier not in assigned:
+                    level = index
+                    break
+        else:
+            level = max([self.level(child) for child in analysis.children(node)] or [0])
+        self.levels[id(node)] = level
+        return level
+
+    def hoist(self, node, bound):
+        """
+        Replace the largest invariant expressions in node by invariants of
+        their loops
+        :param node: an ast.Expression object
+        :param bound: the index of the innermost loop node may be moved to,
+                      plus one
+        :return: the node that replaces node
+        """
+        level = self.levels[id(node)]
+        if level < bound and not is_leaf(node):
+            invariant = ast.LoopInvariantExpression(node, not self.can_raise(node))
+            invariant.checked = node.checked
+            invariant.clite_type = getattr(node, 'clite_type', None)
+            self.invariants[level].append(invariant)
+            bound = level
+        else:
+            invariant = node
+        # A part of the expression may be invariant in an outer loop
+        if isinstance(node, ast.BinaryExpression):
+            node.left = self.hoist(node.left, bound)
+            node.right = self.hoist(node.right, bound)
+        elif isinstance(node, ast.Factor):
+            node.primary = self.hoist(node.primary, bound)
+        return invariant
+
+    def can_raise(self, node):
+        """
+        Check if evaluating an expression can raise an error
+        :return: type - bool
+        """
+        return can_raise(node, self.unsafe_reads)
+
+
+class DeadCodeElimination(visitor.NodeTransformer):
+    """
+    A pass that removes the statements that have no effect once the
+    constants are folded:
+        ;                       an empty statement
+        if (true) S else T      S
+        if (false) S else T     T, or nothing without an else
+        while (false) S         nothing
+        { }                     an empty block
+        x = e;                  a dead store: x is never read
+    A variable is dead when no expression other than its own assignments
+    reads it, so i = i + 1 alone keeps no i alive, and all the stores of a
+    dead variable are removed. A variable with a store that can raise an
+    error is kept with all its stores, and so is an if or a while whose
+    condition can raise. Removing code can leave other variables unread,
+    so the pass is repeated until nothing is removed. A statement that
+    must stay where it is, the body of a loop for example, becomes an
+    empty block. With remove_dead_stores=False every store is kept, for
+    a caller that reads the values of the variables after the run.
+    """
+
+    def __init__(self, program, remove_dead_stores=True):
+        self.program = program
+        self.remove_dead_stores = remove_dead_stores
+        self.unsafe_reads = analysis.unsafe_reads(program)
+        self.dead = set()
+        self.removed = 0
+        self.dead_stores = 0
+
+    def optimize(self):
+        """
+        Remove the dead code of the program in place
+        :return: the ast.Program object
+        """
+        while True:
+            self.dead = self.dead_variables()
+            removed = self.removed
+            self.program.stmts = self.statements(self.program.stmts)
+            if self.removed == removed:
+                return self.program
+
+    def dead_variables(self):
+        """
+        Find the variables whose stores can all be removed
+        :return: a set of identifiers
+        """
+        if not self.remove_dead_stores:
+            return set()
+        live = read_variables(self.program.stmts)
+        for assignment in assignments(self.program.stmts):
+            if can_raise(assignment.expr, self.unsafe_reads):
+                live.add(assignment.identifier)
+        return set(self.program.decls) - live
+
+    def statements(self, statements):
+        """
+        Remove the dead statements of a list
+        :param statements: a list of ast.Statement objects
+        :return: the list of the statements that are left
+        """
+        kept = []
+        for statement in statements:
+            statement = self.visit(statement)
+            # A block in a list of statements is a list of statements
+            if isinstance(statement, ast.Block):
+                kept.extend(statement.statements)
+            elif statement is not None:
+                kept.append(statement)
+        return kept
+
+    def statement(self, node):
+        """
+        Remove the dead code of a statement that cannot be dropped
+        :param node: an ast.Statement object
+        :return: the statement, or an empty ast.Block
+        """
+        if is_empty(node):
+            return node
+        statement = self.visit(node)
+        if statement is None:
+            statement = ast.Block([], node.level)
+        return statement
+
+    def constant_condition(self, expression):
+        """
+        :param expression: the condition of an if or a while statement
+        :return: the value of a condition that is a bool constant; None
+                 if the condition has to be evaluated
+        """
+        if isinstance(expression, ast.ConstantExpression) and \
+                type(expression.value) is bool:
+            return expression.value
+        return None
+
+    def visit_Semicolon(self, node):
+        self.removed += 1
+        return None
+
+    def visit_Block(self, node):
+        node.statements = self.statements(node.statements)
+        if not node.statements:
+            self.removed += 1
+            return None
+        return node
+
+    def visit_Assignment(self, node):
+        if node.identifier not in self.dead:
+            return node
+        self.removed += 1
+        self.dead_stores += 1
+        return None
+
+    def visit_PrintStatement(self, node):
+        return node
+
+    def visit_IfStatement(self, node):
+        condition = self.constant_condition(node.expression)
+        if condition is not None:
+            self.removed += 1
+            taken = node.if_statement if condition else node.else_statement
+            if taken is None:
+                return None
+            dedent(taken)
+            return self.visit(taken)
+        node.if_statement = self.statement(node.if_statement)
+        if node.else_statement is not None:
+            node.else_statement = self.visit(node.else_statement)
+        if is_empty(node.if_statement) and node.else_statement is None and \
+                not can_raise(node.expression, self.unsafe_reads):
+            self.removed += 1
+            return None
+        return node
+
+    def visit_WhileStatement(self, node):
+        if self.constant_condition(node.expression) is False:
+            self.removed += 1
+            return None
+        node.statement = self.statement(node.statement)
+        return node
+
+    def visit_HoistedLoop(self, node):
+        node.loop = self.visit(node.loop)
+        return node if node.loop is not None else None
+
+
+class ShiftExpression(ast.BinaryTimesExpression):
+    """
+    A product of an expression and a power of two, x * 2^k. An integer
+    operand is shifted left by k bits instead of multiplied; any other
+    value is multiplied as before. The constant is the right operand.
+    """
+
+    def __init__(self, expression, shift):
+        super().__init__(expression.left, expression.right, expression.line_number)
+        self.shift = shift
+        self.multiplier = 1 << shift
+
+    def eval(self):
+        value = self.left.eval()
+        try:
+            return value << self.shift
+        except TypeError:
+            return value * self.multiplier
+
+
+class MaskExpression(ast.BinaryModExpression):
+    """
+    A remainder of a division by a power of two, x % 2^k. The remainder of
+    an integer is its lowest k bits, which is also what Python's % gives
+    for a negative integer; any other value is divided as before.
+    """
+
+    def __init__(self, expression, divisor):
+        super().__init__(expression.left, expression.right, expression.line_number)
+        self.divisor = divisor
+        self.mask = divisor - 1
+
+    def eval(self):
+        value = self.left.eval()
+        try:
+            return value & self.mask
+        except TypeError:
+            return value % self.divisor
+
+
+class PowerChainExpression(ast.BinaryExpExpression):
+    """
+    A power with a small constant exponent, x ** n. The base is evaluated
+    once and an integer base is multiplied by itself, which is exact.
+    A float base is still raised with **: a chain of multiplications
+    would round differently and would not raise OverflowError.
+    """
+
+    def __init__(self, expression, exponent):
+        super().__init__(expression.left, expression.right, expression.line_number)
+        self.exponent = exponent
+
+    def eval(self):
+        value = self.left.eval()
+        if type(value) is not int:
+            return value ** self.exponent
+        exponent = self.exponent
+        if exponent == 2:
+            return value * value
+        elif exponent == 3:
+            return value * value * value
+        square = value * value
+        return square * square
+
+
+class IncrementStatement(ast.Assignment):
+    """
+    An assignment that adds a constant to the variable it assigns,
+    i = i + c or i = i - c. The statement reads, adds and stores in one
+    step; the expression is kept for printing only and is not a child,
+    so no other pass changes an expression that is never evaluated.
+    """
+    child_fields = ()
+
+    def __init__(self, assignment, variable, step):
+        super().__init__(assignment.identifier, assignment.expr, assignment.level,
+                         assignment.program)
+        # The program keeps the same env list for all its runs
+        self.env = assignment.program.env
+        self.step = step
+        self.line_number = variable.line_number
+
+    def eval(self):
+        env = self.env
+        value = env[self.slot]
+        if value is None:
+            raise errors.CliteRuntimeError(self.identifier + " not defined!",
+                                           self.line_number)
+        value = env[self.slot] = value + self.step
+        return value
+
+
+class StrengthReduction(visitor.NodeTransformer):
+    """
+    A pass that replaces arithmetic by cheaper arithmetic with the same
+    result:
+        x * 2^k, 2^k * x      shift left by k bits      ShiftExpression
+        x % 2^k               keep the lowest k bits    MaskExpression
+        x ** n, 2 <= n <= 4   multiplications           PowerChainExpression
+        i = i + c, i - c      add c to the variable     IncrementStatement
+    where x is an int expression and 2^k, n and c are int constants. An
+    int expression can still hold a float, e.g. 7 / 2, so the new nodes
+    check the value and compute anything but an int as before.
+    Only type checked nodes of the plain ast classes are reduced, so the
+    fixed width arithmetic of CLite_values keeps its wrapping, and the
+    resource limits replace a reduced node by their guarded one. Only the
+    tree walking evaluator runs the reduced nodes; the compiling back ends
+    would not know them.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.reduced = 0
+
+    def optimize(self):
+        """
+        Reduce the arithmetic of the program in place
+        :return: the ast.Program object
+        """
+        return self.transform(self.program)
+
+    def reduce(self, reduced, node):
+        """
+        Give a reduced node the type checking results of the node it
+        replaces
+        :return: the reduced node
+        """
+        reduced.checked = node.checked
+        reduced.clite_type = node.clite_type
+        self.reduced += 1
+        return reduced
+
+    def visit_Assignment(self, node):
+        self.generic_visit(node)
+        expression = node.expr
+        if type(node) is not ast.Assignment or not expression.checked or \
+                type(expression) not in (ast.BinaryPlusExpression, ast.BinaryMinusExpression):
+            return node
+        if is_variable(expression.left, node.identifier):
+            step = int_constant(expression.right)
+            variable = expression.left
+        elif type(expression) is ast.BinaryPlusExpression and \
+                is_variable(expression.right, node.identifier):
+            step = int_constant(expression.left)
+            variable = expression.right
+        else:
+            return node
+        if step is None:
+            return node
+        if type(expression) is ast.BinaryMinusExpression:
+            step = -step
+        self.reduced += 1
+        return IncrementStatement(node, variable, step)
+
+    def visit_BinaryExpression(self, node):
+        self.generic_visit(node)
+        node_class = type(node)
+        if not node.checked or node.clite_type != tokens.INT:
+            return node
+        if node_class is ast.BinaryTimesExpression:
+            if power_of_two(node.left) and int_constant(node.right) is None:
+                # The product is the same either way round
+                node.left, node.right = node.right, node.left
+            multiplier = int_constant(node.right)
+            if power_of_two(node.right) and multiplier > 1:
+                return self.reduce(ShiftExpression(node, multiplier.bit_length() - 1), node)
+        elif node_class is ast.BinaryModExpression:
+            divisor = int_constant(node.right)
+            if power_of_two(node.right) and divisor > 1:
+                return self.reduce(MaskExpression(node, divisor), node)
+        elif node_class is ast.BinaryExpExpression:
+            exponent = int_constant(node.right)
+            if exponent is not None and 2 <= exponent <= MAX_CHAIN_EXPONENT:
+                return self.reduce(PowerChainExpression(node, exponent), node)
+        return node
+
+    def visit_Primary(self, node):
+        return node
+
+
+def is_leaf(node):
+    """
+    Check if an expression is read without computing anything, which
+    makes it pointless to hoist
+    :return: type - bool
+    """
+    while isinstance(node, ast.Factor) and not node.unary_operator:
+        node = node.primary
+    return isinstance(node, (ast.Primary, ast.LoopInvariantExpression))
+
+
+def dedent(statement):
+    """
+    Move a statement and the statements nested in it one level to the
+    left, for a statement that takes the place of its parent
+    :param statement: an ast.Statement object
+    :return: None
+    """
+    stack = [statement]
+    while stack:
+        node = stack.pop()
+        node.level -= 1
+        stack.extend(child_statements(node))
+
+
+def child_statements(statement):
+    """
+    Yield the statements directly nested in a statement
+    :param statement: an ast.Statement object
+    """
+    for field in statement.child_fields:
+        value = getattr(statement, field)
+        for child in value if isinstance(value, list) else [value]:
+            if isinstance(child, ast.Statement):
+                yield child
+
+
+def is_empty(statement):
+    """
+    Check if a statement does nothing
+    :return: type - bool
+    """
+    return isinstance(statement, ast.Block) and not statement.statements
+
+
+def can_raise(node, unsafe_reads):
+    """
+    Check if evaluating an expression can raise an error, because it
+    divides or reads a variable that may be undefined
+    :param node: an ast.Expression object
+    :param unsafe_reads: the ids of the unsafe identifier reads, see
+                         analysis.unsafe_reads()
+    :return: type - bool
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, RAISING_OPERATIONS) or id(node) in unsafe_reads:
+            return True
+        stack.extend(analysis.children(node))
+    return False
+
+
+def assignments(statements):
+    """
+    Yield the assignments among some statements and the statements
+    nested in them
+    :param statements: a list of ast.Statement objects
+    """
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Assignment):
+            yield node
+        else:
+            stack.extend(child_statements(node))
+
+
+def read_variables(statements):
+    """
+    Return the variables that the expressions of some statements read,
+    leaving out the reads of a variable in its own assignments
+    :param statements: a list of ast.Statement objects
+    :return: a set of identifiers
+    """
+    read = set()
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Assignment):
+            read.update(identifier.identifier for identifier in analysis.identifiers(node.expr)
+                        if identifier.identifier != node.identifier)
+            continue
+        for field in node.child_fields:
+            value = getattr(node, field)
+            for child in value if isinstance(value, list) else [value]:
+                if isinstance(child, ast.Expression):
+                    read.update(identifier.identifier
+                                for identifier in analysis.identifiers(child))
+                elif child is not None:
+                    stack.append(child)
+    return read
+
+
+def fold(node_class, left, right, operation=None):
+    """
+    Compute the value of an operation on two constants
+    :param node_class: a binary expression class from the ast module
+    :param left: the value of the left operand
+    :param right: the value of the right operand
+    :param operation: the function of a node that does not compute with
+                      the Python operator of its class, e.g. a fixed width
+                      integer operation of CLite_values [optional]
+    :return: an int, float or bool; None if the operation is not folded
+    """
+    if node_class is ast.BinaryExpExpression and type(left) is int and \
+            type(right) is int and right > 0 and \
+            abs(left).bit_length() * right > MAX_FOLDED_BITS:
+        return None
+    try:
+        value = (operation or OPERATORS[node_class])(left, right)
+    except (ArithmeticError, ValueError):
+        return None
+    # (-8.0) ** 0.5 is a complex number, which is no Clite value
+    if type(value) not in (int, float, bool):
+        return None
+    return value
+
+
+def is_constant(node, value):
+    """
+    Check if a node is a constant equal to value. True, 1 and 1.0
+    compare equal in Python, so the type of the value is compared as
+    well; it need not match the clite_type of the node, since 2 / 2 is an
+    int typed 1.0.
+    :return: type - bool
+    """
+    return isinstance(node, ast.ConstantExpression) and \
+        type(node.value) is type(value) and node.value == value
+
+
+def int_constant(node):
+    """
+    :param node: an ast.Expression object
+    :return: the value of an int constant; None for any other node
+    """
+    if isinstance(node, ast.ConstantExpression) and type(node.value) is int:
+        return node.value
+    return None
+
+
+def power_of_two(node):
+    """
+    Check if a node is an int constant that is a positive power of two
+    :return: type - bool
+    """
+    value = int_constant(node)
+    return value is not None and value > 0 and value & (value - 1) == 0
+
+
+def is_variable(node, identifier):
+    """
+    Check if a node reads the variable identifier
+    :return: type - bool
+    """
+    return type(node) is ast.IdentifierExpression and node.identifier == identifier
+
+
+def optimize(program, reduce_strength=False, remove_dead_stores=True):
+    """
+    A convenience function that optimizes a type checked program: constants
+    are folded first, then the dead code is removed and the loop invariants
+    are hoisted. A variable that is never read may be left without the
+    value it would have had, unless the dead stores are kept.
+    :param program: an ast.Program object
+    :param reduce_strength: reduce the strength of the arithmetic at the
+                            end; only for a program that the tree walking
+                            evaluator runs [optional]
+    :param remove_dead_stores: remove the stores to variables that are
+                               never read [optional]
+    :return: the optimized ast.Program object
+    """
+    Optimizer(program).optimize()
+    DeadCodeElimination(program, remove_dead_stores).optimize()
+    LoopInvariantMotion(program).optimize()
+    if reduce_strength:
+        StrengthReduction(program).optimize()
+    return program
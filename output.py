@@ -0,0 +1,132 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/30/2015
+"""
+import sys
+
+# Number of characters a BufferedSink collects before it writes them
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+
+class Sink(object):
+    """
+    A base class for the destinations of the values printed by a Clite
+    program. A print statement calls write() with the value it printed;
+    flush() must be called when the program stops.
+    """
+
+    def __init__(self, stream=None, owned=False):
+        # sys.stdout is looked up when it is needed, so that a sink made
+        # before sys.stdout is redirected writes to the redirected stream
+        self.stream = stream
+        self.owned = owned
+
+    def target(self):
+        """
+        :return: the stream the sink writes to
+        """
+        return self.stream if self.stream is not None else sys.stdout
+
+    def write(self, value):
+        """
+        Print one value on a line of its own
+        :param value: an int, float or bool
+        :return: None
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Write out every value held by the sink
+        :return: None
+        """
+        return
+
+    def close(self):
+        """
+        Flush the sink and close its stream if the sink opened it
+        :return: None
+        """
+        self.flush()
+        if self.owned:
+            self.stream.close()
+
+
+class BufferedSink(Sink):
+    """
+    A sink that collects the printed values in memory and writes them to
+    a text stream in one call once size characters are collected.
+    """
+
+    def __init__(self, stream=None, size=DEFAULT_BUFFER_SIZE, owned=False):
+        super().__init__(stream, owned)
+        self.size = size
+        self.parts = []
+        self.length = 0
+
+    def write(self, value):
+        text = str(value)
+        self.parts.append(text)
+        self.length += len(text) + 1
+        if self.length >= self.size:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.target().write("\n".join(self.parts) + "\n")
+            self.parts = []
+            self.length = 0
+
+
+class StreamSink(Sink):
+    """
+    A sink that writes every value as soon as it is printed. A text stream
+    with an underlying binary buffer, such as sys.stdout, is written to
+    through the buffer, which skips the text layer of print().
+    """
+
+    def __init__(self, stream=None, owned=False):
+        super().__init__(stream, owned)
+        stream = self.target()
+        # Text written before the sink was made must come out first
+        stream.flush()
+        self.buffer = getattr(stream, 'buffer', None)
+
+    def write(self, value):
+        if self.buffer is not None:
+            self.buffer.write((str(value) + "\n").encode())
+        else:
+            self.target().write(str(value) + "\n")
+
+    def flush(self):
+        if self.buffer is not None:
+            self.buffer.flush()
+        else:
+            self.target().flush()
+
+
+class NullSink(Sink):
+    """
+    A sink that discards the printed values, used to time programs
+    without their output.
+    """
+
+    def write(self, value):
+        return
+
+
+def open_sink(filename=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    A function that makes the sink selected on the command line
+    :param filename: the file to write to; standard output if None
+    :param buffer_size: the buffer size in characters; 0 writes every
+                        value as soon as it is printed
+    :return: a Sink object
+    """
+    stream = open(filename, 'w') if filename is not None else None
+    owned = stream is not None
+    if buffer_size > 0:
+        return BufferedSink(stream, buffer_size, owned)
+    return StreamSink(stream, owned)
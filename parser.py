@@ -13,34 +13,213 @@ import errors
 import ast
 
 
+def build_binary_operators():
+    """
+    A function that builds the binding power table of the binary operators
+    from the operator tokens in tokens.COMPLEX_TOKENS and tokens.SINGLE_TOKENS.
+    Levels are listed from the loosest to the tightest binding. On a
+    non-associative level an operator cannot follow another operator of
+    the same level, so 'a < b < c' and 'a == b != c' are not expressions.
+    :return: a dictionary { token code: (binding power, non-associative, ast class) }
+    """
+    levels = [
+        (False, {tokens.OR: ast.Conjunction}),
+        (False, {tokens.AND: ast.Equality}),
+        (True, {tokens.EQUAL_EQ: ast.BinaryEqualOpExpression,
+                tokens.NOT_EQUAL: ast.BinaryNotEqualOpExpression}),
+        (True, {tokens.LESS: ast.BinaryLessExpression,
+                tokens.LESS_EQ: ast.BinaryLessEqualExpression,
+                tokens.GREATER: ast.BinaryGreaterExpression,
+                tokens.GREATER_EQ: ast.BinaryGreaterEqualExpression}),
+        (False, {tokens.PLUS: ast.BinaryPlusExpression,
+                 tokens.MINUS: ast.BinaryMinusExpression}),
+        (False, {tokens.TIMES: ast.BinaryTimesExpression,
+                 tokens.DIVIDE: ast.BinaryDivideExpression,
+                 tokens.MOD: ast.BinaryModExpression}),
+        (False, {tokens.EXPONENT: ast.BinaryExpExpression})
+    ]
+    table = {}
+    # Binding power 0 is reserved for open parentheses
+    for power, (non_associative, operators) in enumerate(levels, 1):
+        for operator, node_class in operators.items():
+            code = (tokens.COMPLEX_TOKENS.get(operator) or tokens.SINGLE_TOKENS[operator])[0]
+            table[code] = (power, non_associative, node_class)
+    return table
+
+
+def expression_depth(expression):
+    """
+    A function that finds the depth of an expression tree level by level,
+    without recursion
+    :param expression: an ast.Expression object
+    :return: the number of nodes on the longest path from the root to a leaf
+    """
+    depth = 0
+    nodes = [expression]
+    while nodes:
+        depth += 1
+        nodes = [getattr(node, field) for node in nodes
+                 for field in node.child_fields if getattr(node, field) is not None]
+    return depth
+
+
 class Parser(object):
     """
     Parser class encapsulates all parsing functions.
     There is one public function called parse().
+    The tokens are read from a lexer.TokenStream through an integer
+    cursor; the code, value and line of the current token are kept in
+    self.code, self.value and self.line.
+    A parser made with recover=True does not stop at the first syntax
+    error: the error is added to self.errors, the tokens up to the next
+    ';' or '}' are skipped and parsing goes on with the next statement
+    or declaration, so one pass finds every error. parse() then returns
+    a partial ast.Program, which must not be run if there are errors.
     """
 
-    # Positions of the indicated token features
-    # in the tuple returned by lexer
-    CODE = 0
-    TYPE = 1
-    VALUE = 2
-    LINE = 3
-
-    def __init__(self, filename):
-        try:
-            self.check_validity(filename)
-        except IOError as error:
-            print(error, end="")
-            sys.exit(1)
+    BINARY_OPERATORS = build_binary_operators()
+    UNARY_OPERATORS = {tokens.SINGLE_TOKENS[tokens.MINUS][0], tokens.SINGLE_TOKENS[tokens.NOT][0]}
+    LPAREN = tokens.SINGLE_TOKENS[tokens.LPAREN][0]
+    RPAREN = tokens.SINGLE_TOKENS[tokens.RPAREN][0]
+    LBRACE = tokens.SINGLE_TOKENS[tokens.LBRACE][0]
+    RBRACE = tokens.SINGLE_TOKENS[tokens.RBRACE][0]
+    SEMICOLON = tokens.SINGLE_TOKENS[tokens.SEMICOLON][0]
+    # The evaluators, the compilers and the other passes over the tree
+    # recurse on it, so deeper trees are syntax errors rather than a
+    # RecursionError in one of them
+    MAX_EXPRESSION_DEPTH = 100
+    MAX_NESTING = 100
+    # Statements -> { Statement } reads statements while the current
+    # token is in this set
+    STATEMENT_FIRST_SET = frozenset((
+        tokens.SINGLE_TOKENS[tokens.SEMICOLON][0],
+        tokens.SINGLE_TOKENS[tokens.LBRACE][0],
+        tokens.ID[0], tokens.KEYWORDS[tokens.IF],
+        tokens.KEYWORDS[tokens.WHILE], tokens.KEYWORDS[tokens.ELSE],
+        tokens.KEYWORDS[tokens.PRINT]
+    ))
+
+    def __init__(self, filename, token_stream=None, recover=False):
         self.filename = filename
-        self.vellexer = lexer.Lexer(filename)
-        try:
-            self.lex = self.vellexer.token_generator()
-        except errors.CliteUnrecognizedTokenError as error:
-            print(error, end="")
-            sys.exit(1)
+        self.recover = recover
+        # The syntax errors found so far by a recovering parser
+        self.errors = []
+        # The undeclared identifiers reported so far
+        self.undeclared_identifiers = set()
+        # The ast.Program object the statements are parsed into
+        self.tree = None
+        # The number of blocks, if and while statements the current
+        # statement is in
+        self.nesting = 0
+        if token_stream is None:
+            try:
+                self.check_validity(filename)
+            except IOError as error:
+                print(error, end="")
+                sys.exit(1)
+            self.vellexer = lexer.Lexer(filename)
+            try:
+                token_stream = self.vellexer.token_stream()
+            except errors.CliteUnrecognizedTokenError as error:
+                print(error)
+                sys.exit(1)
+        self.tokens = token_stream
+        self.codes = self.tokens.codes
+        self.values = self.tokens.values
+        self.lines = self.tokens.lines
         # Retrieve the first token in the file
-        self.curr_tok = self.lex.__next__()
+        self.position = -1
+        self.advance()
+
+    @classmethod
+    def from_string(cls, source, filename="<string>", recover=False):
+        """
+        Make a parser for Clite source text. Unlike the constructor, it
+        neither reads a file nor exits on an error.
+        :param source: the Clite source; type - string or bytes
+        :param filename: a name for the source
+        :param recover: collect the syntax errors instead of raising the first
+        :return: a Parser object
+        :raise CliteUnrecognizedTokenError if an unrecognized token is seen
+        """
+        return cls(filename, lexer.Lexer.from_string(source, filename).token_stream(), recover)
+
+    def advance(self):
+        """
+        A method that moves the cursor to the next token
+        :return: None
+        """
+        self.position += 1
+        position = self.position
+        self.code = self.codes[position]
+        self.value = self.values[position]
+        self.line = self.lines[position]
+
+    def seek(self, position):
+        """
+        A method that moves the cursor to the given token
+        :param position: the index of a token; type(position) is an int
+        :return: None
+        """
+        self.position = position
+        self.code = self.codes[position]
+        self.value = self.values[position]
+        self.line = self.lines[position]
+
+    def error(self, error):
+        """
+        A method that reports a syntax error: a recovering parser records
+        it and goes on, any other parser raises it
+        :param error: an errors.CliteSyntaxError object
+        :return: None
+        :raise CliteSyntaxError if the parser does not recover
+        """
+        if not self.recover:
+            raise error
+        self.errors.append(error)
+
+    def undeclared(self, identifier, line_number):
+        """
+        A method that reports the use of an undeclared identifier. Only its
+        first use is reported; a recovering parser gives it a slot to build
+        the partial tree.
+        :param identifier: type(identifier) is a string
+        :param line_number: the line of the use; type(line_number) is an int
+        :return: None
+        :raise CliteSyntaxError if the parser does not recover
+        """
+        if identifier not in self.undeclared_identifiers:
+            self.undeclared_identifiers.add(identifier)
+            self.error(errors.CliteSyntaxError("Identifier '{0}' not declared!".
+                                               format(identifier), line_number))
+        self.tree.declare(identifier)
+
+    def synchronize(self):
+        """
+        A method that skips the tokens of a statement or a declaration with
+        a syntax error, up to and including the next ';', or up to the
+        next '}', which closes the enclosing block. A block opened in the
+        skipped tokens is skipped whole, with the else part that follows it.
+        :return: None
+        """
+        end_of_file = tokens.END_OF_FILE[0]
+        depth = 0
+        while self.code != end_of_file:
+            if self.code == self.SEMICOLON and not depth:
+                self.advance()
+                return
+            if self.code == self.LBRACE:
+                depth += 1
+            elif self.code == self.RBRACE:
+                if not depth:
+                    return
+                depth -= 1
+                if not depth:
+                    self.advance()
+                    if self.code != tokens.KEYWORDS[tokens.ELSE]:
+                        return
+                    continue
+            self.advance()
 
     @staticmethod
     def check_validity(filename):
@@ -60,16 +239,42 @@ class Parser(object):
     def parse(self):
         """
         Parse a Clite file
-        :return: An ast.Program object
-        :raise CliteSyntaxError if an unexpected token is seen
-        """
+        :return: An ast.Program object; a partial one if the parser recovered
+                 from errors, which are in self.errors
+        :raise CliteSyntaxError if an unexpected token is seen and the
+               parser does not recover
+        """
+        # A parser can parse its tokens again
+        self.seek(0)
+        self.errors = []
+        self.undeclared_identifiers = set()
+        self.nesting = 0
         program = self.program()
 
-        if self.curr_tok[self.CODE] != tokens.END_OF_FILE[self.CODE]:
-            raise errors.CliteSyntaxError("Extra symbols in input.", self.curr_tok[self.LINE])
+        if self.code != tokens.END_OF_FILE[0]:
+            self.error(errors.CliteSyntaxError("Extra symbols in input.", self.line))
 
         return program
 
+    def parse_statement(self, program, level):
+        """
+        Parse the token stream as one statement of an existing program,
+        e.g. a statement whose source was edited
+        :param program: the ast.Program object the statement belongs to
+        :param level: the level of the statement
+        :return: an ast.Statement object
+        :raise CliteSyntaxError if the tokens are not exactly one statement
+        """
+        self.tree = program
+        self.decls = program.decls
+        self.nesting = level
+        statement = self.statement(level)
+
+        if self.code != tokens.END_OF_FILE[0]:
+            raise errors.CliteSyntaxError("Extra symbols in input.", self.line)
+
+        return statement
+
     def program(self):
         """
         Program -> int  main '(' ')' '{' Declarations Statements '}'
@@ -79,20 +284,25 @@ class Parser(object):
         # Indicates the level of indentation
         level = 1
 
-        self.match_main()
+        try:
+            self.match_main()
+        except errors.CliteSyntaxError as error:
+            self.error(error)
+            # Skip the rest of the top, up to the declarations
+            while self.code not in tokens.TYPES and \
+                    self.code not in (self.LBRACE, tokens.END_OF_FILE[0]):
+                self.advance()
+            if self.code == self.LBRACE:
+                self.advance()
         self.decls = self.declarations()
         # Create a program object with declarations and a level
-        program = ast.Program(self.decls, level)
+        program = self.tree = ast.Program(self.decls, level)
         # Process statements and add them to the program object
         self.stmts = self.statements(level)
-        program.add_statements(self.stmts)
 
         # Match final closing brace
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.RBRACE][self.CODE]:
-            raise errors.CliteSyntaxError("Missing final closing brace '}'!",
-                                          self.curr_tok[self.LINE])
-        # Consume closing brace
-        self.curr_tok = self.lex.__next__()
+        self.match_closing_brace(self.stmts, level, "Missing final closing brace '}'!")
+        program.add_statements(self.stmts)
 
         return program
 
@@ -103,35 +313,35 @@ class Parser(object):
         :raise CliteSyntaxError if an unexpected token is seen
         """
         # Match 'int'
-        if self.curr_tok[self.CODE] != tokens.KEYWORDS[tokens.INT]:
+        if self.code != tokens.KEYWORDS[tokens.INT]:
             raise errors.CliteSyntaxError("Undefined reference to 'main'! Missing return type 'int'!",
-                                          self.curr_tok[self.LINE])
+                                          self.line)
         # Consume 'int'
-        self.curr_tok = self.lex.__next__()
+        self.advance()
         # Match main
-        if self.curr_tok[self.CODE] != tokens.KEYWORDS[tokens.MAIN]:
+        if self.code != tokens.KEYWORDS[tokens.MAIN]:
             raise errors.CliteSyntaxError("Undefined reference to 'main'! Missing 'main'!",
-                                          self.curr_tok[self.LINE])
+                                          self.line)
         # Consume 'main'
-        self.curr_tok = self.lex.__next__()
+        self.advance()
         # Match left opening parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.LPAREN][self.CODE]:
+        if self.code != tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
             raise errors.CliteSyntaxError("Missing opening parenthesis",
-                                          self.curr_tok[self.LINE])
+                                          self.line)
         # Consume left opening parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
         # Match right closing parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.RPAREN][self.CODE]:
+        if self.code != tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
             raise errors.CliteSyntaxError("Missing closing parenthesis!",
-                                          self.curr_tok[self.LINE])
+                                          self.line)
         # Consume right closing parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
         # Match left opening brace
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.LBRACE][self.CODE]:
+        if self.code != tokens.SINGLE_TOKENS[tokens.LBRACE][0]:
             raise errors.CliteSyntaxError("Missing opening brace '{'!",
-                                          self.curr_tok[self.LINE])
+                                          self.line)
         # Consume left opening brace
-        self.curr_tok = self.lex.__next__()
+        self.advance()
         return
 
     def declarations(self):
@@ -142,16 +352,20 @@ class Parser(object):
         """
         declaration_dict = {}
 
-        while self.curr_tok[self.CODE] in tokens.TYPES:
-            declaration = self.declaration()
-            identifier = declaration[0][self.VALUE]
-            type_name = declaration[1][self.VALUE]
+        while self.code in tokens.TYPES:
+            try:
+                identifier, type_name = self.declaration()
+            except errors.CliteSyntaxError as error:
+                self.error(error)
+                self.synchronize()
+                continue
 
-            # Raise an error if trying to declare an already declared identifier
+            # Report an error if trying to declare an already declared identifier
             if identifier in declaration_dict:
-                raise errors.CliteSyntaxError('Identifier already declared',
-                                              self.curr_tok[self.LINE])
-            declaration_dict[identifier] = type_name
+                self.error(errors.CliteSyntaxError('Identifier already declared',
+                                                   self.line))
+            else:
+                declaration_dict[identifier] = type_name
 
         return declaration_dict
 
@@ -161,21 +375,21 @@ class Parser(object):
         :return: A tuple in the form (identifier, type)
         :raise: CliteSyntaxError if an unexpected token is seen
         """
-        temp_type = self.curr_tok
-        self.curr_tok = self.lex.__next__()
+        temp_type = self.value
+        self.advance()
 
-        if self.curr_tok[self.CODE] != tokens.ID[self.CODE]:
-            raise errors.CliteSyntaxError("Identifier expected", self.curr_tok[self.LINE])
+        if self.code != tokens.ID[0]:
+            raise errors.CliteSyntaxError("Identifier expected", self.line)
 
-        temp_identifier = self.curr_tok
+        temp_identifier = self.value
         # Consume identifier
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         # Match a semicolon
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.SEMICOLON][self.CODE]:
-            raise errors.CliteSyntaxError("Semicolon expected", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.SEMICOLON][0]:
+            raise errors.CliteSyntaxError("Semicolon expected", self.line)
         # Consume semicolon
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         return temp_identifier, temp_type
 
@@ -186,18 +400,16 @@ class Parser(object):
         :return:
         :raise CliteSyntaxError if an unexpected token is seen
         """
-        first_set = {
-            tokens.SINGLE_TOKENS[tokens.SEMICOLON][self.CODE],
-            tokens.SINGLE_TOKENS[tokens.LBRACE][self.CODE],
-            tokens.ID[self.CODE], tokens.KEYWORDS[tokens.IF],
-            tokens.KEYWORDS[tokens.WHILE], tokens.KEYWORDS[tokens.ELSE],
-            tokens.KEYWORDS[tokens.PRINT]
-        }
+        first_set = self.STATEMENT_FIRST_SET
         statements = []
 
-        while self.curr_tok[0] in first_set:
-            # Do not consume the token yet
-            statements.append(self.statement(level))
+        while self.code in first_set:
+            try:
+                # Do not consume the token yet
+                statements.append(self.statement(level))
+            except errors.CliteSyntaxError as error:
+                self.error(error)
+                self.synchronize()
 
         return statements
 
@@ -209,21 +421,31 @@ class Parser(object):
         :return: None
         :raise CliteSyntaxError if an unexpected token is seen
         """
-        if self.curr_tok[self.CODE] == tokens.SINGLE_TOKENS[tokens.SEMICOLON][self.CODE]:
-            self.curr_tok = self.lex.__next__()
+        if self.code == tokens.SINGLE_TOKENS[tokens.SEMICOLON][0]:
+            self.advance()
             return ast.Semicolon(level)
-        elif self.curr_tok[self.CODE] == tokens.SINGLE_TOKENS[tokens.LBRACE][self.CODE]:
-            return self.block(level)
-        elif self.curr_tok[self.CODE] == tokens.ID[self.CODE]:
+        elif self.code == tokens.ID[0]:
             return self.assignment(level)
-        elif self.curr_tok[self.CODE] == tokens.KEYWORDS[tokens.IF]:
-            return self.if_statement(level)
-        elif self.curr_tok[self.CODE] == tokens.KEYWORDS[tokens.WHILE]:
-            return self.while_statement(level)
-        elif self.curr_tok[self.CODE] == tokens.KEYWORDS[tokens.PRINT]:
+        elif self.code == tokens.KEYWORDS[tokens.PRINT]:
             return self.print_statement(level)
+
+        if self.code == tokens.SINGLE_TOKENS[tokens.LBRACE][0]:
+            compound_statement = self.block
+        elif self.code == tokens.KEYWORDS[tokens.IF]:
+            compound_statement = self.if_statement
+        elif self.code == tokens.KEYWORDS[tokens.WHILE]:
+            compound_statement = self.while_statement
         else:
-            raise errors.CliteSyntaxError("Statement expected!", self.curr_tok[self.LINE])
+            raise errors.CliteSyntaxError("Statement expected!", self.line)
+
+        if self.nesting >= self.MAX_NESTING:
+            raise errors.CliteSyntaxError("Statements are nested too deeply!",
+                                          self.line)
+        self.nesting += 1
+        try:
+            return compound_statement(level)
+        finally:
+            self.nesting -= 1
 
     def block(self, level):
         """
@@ -233,18 +455,36 @@ class Parser(object):
         :raise CliteSyntaxError if an unexpected token is seen
         """
         # Consume the opening brace identifying the start of a block
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         statements = self.statements(level)
 
         # Match right closing brace
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.RBRACE][self.CODE]:
-            raise errors.CliteSyntaxError("'}' expected!", self.curr_tok[self.LINE])
-        # Consume right closing brace
-        self.curr_tok = self.lex.__next__()
+        self.match_closing_brace(statements, level, "'}' expected!")
 
         return ast.Block(statements, level)
 
+    def match_closing_brace(self, statements, level, message):
+        """
+        A method that matches and consumes the closing brace after a list of
+        statements. A recovering parser skips the tokens that cannot start
+        a statement and adds the statements after them to the list.
+        :param statements: the statements before the brace; type - list
+        :param level: the level of the statements; type(level) - int
+        :param message: the message of the error if the brace is missing
+        :return: None
+        :raise CliteSyntaxError if the brace is missing and the parser does
+               not recover
+        """
+        while self.code != self.RBRACE:
+            self.error(errors.CliteSyntaxError(message, self.line))
+            if self.code == tokens.END_OF_FILE[0]:
+                return
+            self.synchronize()
+            statements.extend(self.statements(level))
+        # Consume closing brace
+        self.advance()
+
     def if_statement(self, level):
         """
         IfStatement -> if '(' Expression ')' Statement [ else Statement ]
@@ -253,28 +493,28 @@ class Parser(object):
         :raise CliteSyntaxError if an unexpected token is seen
         """
         # Consume the keyword if identifying the start of an if statement
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         # Match left opening left parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
-            raise errors.CliteSyntaxError("'(' expected!", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
+            raise errors.CliteSyntaxError("'(' expected!", self.line)
         # Consume opening left parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         expression = self.expression()
 
         # Match right closing left parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
-            raise errors.CliteSyntaxError("')' expected!", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
+            raise errors.CliteSyntaxError("')' expected!", self.line)
         # Consume closing right parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         if_stmt = self.statement(level + 1)
         else_stmt = None
 
         # If there is an 'else', consume it
-        if self.curr_tok[self.CODE] == tokens.KEYWORDS[tokens.ELSE]:
-            self.curr_tok = self.lex.__next__()
+        if self.code == tokens.KEYWORDS[tokens.ELSE]:
+            self.advance()
             else_stmt = self.statement(level + 1)
 
         return ast.IfStatement(expression, if_stmt, else_stmt, level)
@@ -287,21 +527,21 @@ class Parser(object):
         :raise CliteSyntaxError if an unexpected token is seen
         """
         # Consume the keyword if identifying the start of a while statement
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         # Match left parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
-            raise errors.CliteSyntaxError("'(' expected!", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
+            raise errors.CliteSyntaxError("'(' expected!", self.line)
         # Consume left parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         expression = self.expression()
 
         # Match right parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
-            raise errors.CliteSyntaxError("')' expected!", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
+            raise errors.CliteSyntaxError("')' expected!", self.line)
         # Consume right parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         statement = self.statement(level + 1)
 
@@ -315,29 +555,29 @@ class Parser(object):
         :raise CliteSyntaxError if an unexpected token is seen
         """
         # Consume the keyword if identifying the start of a print statement
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         # Match left opening parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
-            raise errors.CliteSyntaxError("'(' expected!", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
+            raise errors.CliteSyntaxError("'(' expected!", self.line)
         # Consume left opening parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         expression = self.expression()
 
         # Match right closing parenthesis
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
-            raise errors.CliteSyntaxError("')' expected!", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
+            raise errors.CliteSyntaxError("')' expected!", self.line)
         # Consume closing right parenthesis
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         # Match semicolon
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.SEMICOLON][0]:
-            raise errors.CliteSyntaxError("';' expected!", self.curr_tok[self.LINE])
+        if self.code != tokens.SINGLE_TOKENS[tokens.SEMICOLON][0]:
+            raise errors.CliteSyntaxError("';' expected!", self.line)
         # Consume semicolon
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
-        return ast.PrintStatement(expression, level)
+        return ast.PrintStatement(expression, level, self.tree)
 
     def assignment(self, level):
         """
@@ -347,258 +587,193 @@ class Parser(object):
         :raise CliteSyntaxError if an unexpected token is seen
         """
         # Save and consume identifier
-        identifier = self.curr_tok
-        self.curr_tok = self.lex.__next__()
+        identifier = self.value
+        line_number = self.line
+        self.advance()
 
         # Match equal sign
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.ASSIGN][0]:
+        if self.code != tokens.SINGLE_TOKENS[tokens.ASSIGN][0]:
             raise errors.CliteSyntaxError("An assignment statement expected!",
-                                          self.curr_tok[self.LINE])
+                                          self.line)
         # Consume equal sign
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         expr = self.expression()
 
         # Match semicolon
-        if self.curr_tok[self.CODE] != tokens.SINGLE_TOKENS[tokens.SEMICOLON][0]:
+        if self.code != tokens.SINGLE_TOKENS[tokens.SEMICOLON][0]:
             raise errors.CliteSyntaxError("Semicolon expected!",
-                                          self.curr_tok[self.LINE])
+                                          self.line)
         # Consume semicolon
-        self.curr_tok = self.lex.__next__()
+        self.advance()
 
         # Check if the identifier is declared
-        if identifier[2] not in self.decls:
-            raise errors.CliteSyntaxError("Identifier is not declared!",
-                                          self.curr_tok[self.LINE])
+        if identifier not in self.decls:
+            self.undeclared(identifier, line_number)
 
-        return ast.Assignment(identifier[2], expr, level)
+        return ast.Assignment(identifier, expr, level, self.tree)
 
     def expression(self):
         """
         Expression -> Conjunction { '||' Conjunction }
-        :return: A ast.Conjunction object
-        """
-        left_tree = self.conjunction()
-
-        while self.curr_tok[self.VALUE] == tokens.OR:
-            self.curr_tok = self.lex.__next__()
-            line_number = self.curr_tok[self.LINE]
-            right_tree = self.conjunction()
-            left_tree = ast.Conjunction(left_tree, right_tree, line_number)
-
-        return left_tree
-
-    def conjunction(self):
-        """
         Conjunction -> Equality { '&&' Equality }
-        :return: An ast.Equality object
-        """
-        left_tree = self.equality()
-
-        while self.curr_tok[self.VALUE] == tokens.AND:
-            self.curr_tok = self.lex.__next__()
-            line_number = self.curr_tok[self.LINE]
-            right_tree = self.equality()
-            left_tree = ast.Equality(left_tree, right_tree, line_number)
-
-        return left_tree
-
-    def equality(self):
-        """
-        Equality -> Relation [ EquOp Relation]
-        :return: An ast.BinaryEqualOpExpression or an ast.BinaryNotEqualOpExpression
-        :raise CliteSyntaxError if an unexpected token is seen
-        """
-        left_tree = self.relation
-
-        equality_operators = [tokens.EQUAL_EQ, tokens.NOT_EQUAL]
-        # Match equality operator
-        if self.curr_tok[self.VALUE] in equality_operators:
-            operator = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
-            line = self.curr_tok[self.LINE]
-            right_tree = self.relation
-
-            if operator == tokens.EQUAL_EQ:
-                left_tree = ast.BinaryEqualOpExpression(left_tree, right_tree, line)
-            elif operator == tokens.NOT_EQUAL:
-                left_tree = ast.BinaryNotEqualOpExpression(left_tree, right_tree, line)
-            else:
-                raise errors.CliteSyntaxError("Unexpected operator '{0}' given!".
-                                              format(operator), self.curr_tok[self.LINE])
-        return left_tree
-
-    @property
-    def relation(self):
-        """
-        Relation -> Addition [ RelOp Relation]
-        :return: A ast.BinaryExpression object
-        :raise CliteSyntaxError if an unexpected token is seen
-        """
-        left_tree = self.addition()
-
-        relation_operators = [tokens.LESS, tokens.LESS_EQ, tokens.GREATER, tokens.GREATER_EQ]
-        # Match relation operator
-        if self.curr_tok[self.VALUE] in relation_operators:
-            operator = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
-            line = self.curr_tok[self.LINE]
-            right_tree = self.addition()
-
-            if operator == tokens.LESS:
-                left_tree = ast.BinaryLessExpression(left_tree, right_tree, line)
-            elif operator == tokens.LESS_EQ:
-                left_tree = ast.BinaryLessEqualExpression(left_tree, right_tree, line)
-            elif operator == tokens.GREATER:
-                left_tree = ast.BinaryGreaterExpression(left_tree, right_tree, line)
-            elif operator == tokens.GREATER_EQ:
-                left_tree = ast.BinaryGreaterEqualExpression(left_tree, right_tree, line)
-            else:
-                raise errors.CliteSyntaxError("Unexpected operator '{0}' given!".
-                                              format(operator), self.curr_tok[self.LINE])
-
-        return left_tree
-
-    def addition(self):
-        """
+        Equality -> Relation [ EquOp Relation ]
+        Relation -> Addition [ RelOp Addition ]
         Addition -> Term { AddOp Term }
-        :return: An ast.BinaryPlusExpression or an ast.BinaryMinusExpression
-        :raise CliteSyntaxError if an unexpected token is seen
-        """
-        left_tree = self.term()
-
-        while self.curr_tok[self.VALUE] == tokens.PLUS or \
-                self.curr_tok[self.VALUE] == tokens.MINUS:
-            operator = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
-            line = self.curr_tok[self.LINE]
-            right_tree = self.term()
-
-            if operator == tokens.PLUS:
-                left_tree = ast.BinaryPlusExpression(left_tree, right_tree, line)
-            elif operator == tokens.MINUS:
-                left_tree = ast.BinaryMinusExpression(left_tree, right_tree, line)
-            else:
-                raise errors.CliteSyntaxError("Unexpected operator '{0}' given!".
-                                              format(operator), self.curr_tok[self.LINE])
-        return left_tree
-
-    def term(self):
-        """
         Term -> RaisedFactor { MulOp RaisedFactor }
-        :return: An ast.BinaryExpression object
-        :raise CliteSyntaxError if an unexpected token is seen
-        """
-        left_tree = self.raised_factor()
-
-        mul_operations = [tokens.TIMES, tokens.DIVIDE, tokens.MOD]
-
-        while self.curr_tok[self.VALUE] in mul_operations:
-            operator = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
-            line = self.curr_tok[self.LINE]
-            right_tree = self.raised_factor()
-
-            if operator == tokens.TIMES:
-                left_tree = ast.BinaryTimesExpression(left_tree, right_tree, line)
-            elif operator == tokens.DIVIDE:
-                left_tree = ast.BinaryDivideExpression(left_tree, right_tree, line)
-            elif operator == tokens.MOD:
-                left_tree = ast.BinaryModExpression(left_tree, right_tree, line)
-            else:
-                raise errors.CliteSyntaxError("Unexpected operator '{0}' given!".
-                                              format(operator), line)
-        return left_tree
-
-    def raised_factor(self):
-        """
         RaisedFactor -> Factor { '**' Factor }
-        :return: An ast.BinaryExpression object
-        :raise CliteSyntaxError if an unexpected token is seen
-        """
-        left_tree = self.factor()
-
-        while self.curr_tok[self.VALUE] == tokens.EXPONENT:
-            self.curr_tok = self.lex.__next__()
-            line_number = self.curr_tok[self.LINE]
-            right_tree = self.factor()
-            left_tree = ast.BinaryExpExpression(left_tree, right_tree,
-                                                line_number)
-        return left_tree
-
-    def factor(self):
-        """
         Factor -> [ UnaryOp ] Primary
-        :return: An ast. Factor object
-        """
-        unary_operators = [tokens.MINUS, tokens.NOT]
-        unary_operator = None
-
-        # Match unary operator if seen
-        if self.curr_tok[self.VALUE] in unary_operators:
-            unary_operator = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
-
-        primary = self.primary()
-        line_number = self.curr_tok[self.LINE]
 
-        return ast.Factor(primary, unary_operator, line_number)
+        The grammar above is parsed by operator precedence: the binary
+        operators are looked up in BINARY_OPERATORS, and operands and
+        operators are kept on two explicit stacks, so the parser does not
+        recurse, not even for parenthesised expressions. The cursor is kept
+        in a local variable while the expression is read and identifiers and
+        integer literals are matched inline; seek() writes it back.
+        :return: An ast.Expression object
+        :raise CliteSyntaxError if an unexpected token is seen
+        """
+        codes, values, lines = self.codes, self.values, self.lines
+        decls = self.decls
+        program = self.tree
+        binary_operators = self.BINARY_OPERATORS
+        unary_operators = self.UNARY_OPERATORS
+        lparen, rparen = self.LPAREN, self.RPAREN
+        id_code, int_code = tokens.ID[0], tokens.INTLIT[0]
+        factor = ast.Factor
+        position = start = self.position
+        operands = []
+        # Operators waiting for their right operand, as
+        # (binding power, non-associative, ast class, line) tuples.
+        # An open parenthesis is a (0, False, unary operator, None) tuple.
+        operators = []
+        open_parens = 0
+
+        while True:
+            # Factor -> [ UnaryOp ] Primary, where a Primary may be '(' Expression ')'
+            code = codes[position]
+            unary_operator = None
+            if code in unary_operators:
+                unary_operator = values[position]
+                position += 1
+                code = codes[position]
+            if code == lparen:
+                position += 1
+                operators.append((0, False, unary_operator, None))
+                open_parens += 1
+                continue
+            if code == id_code and values[position] in decls:
+                primary = ast.IdentifierExpression(values[position], lines[position], program)
+                position += 1
+            elif code == int_code:
+                primary = ast.IntLitExpression(values[position], lines[position])
+                position += 1
+            else:
+                self.seek(position)
+                primary = self.primary()
+                position = self.position
+            code = codes[position]
+            operands.append(factor(primary, unary_operator, lines[position]))
+
+            # Match binary operators and closing parentheses
+            while True:
+                entry = binary_operators.get(code)
+                if entry is not None:
+                    power = entry[0]
+                    # Apply the operators that bind more tightly
+                    while operators and operators[-1][0] > power:
+                        node_class, line = operators.pop()[2:]
+                        right_tree = operands.pop()
+                        operands[-1] = node_class(operands[-1], right_tree, line)
+                    if operators and operators[-1][0] == power:
+                        if entry[1]:
+                            # A non-associative operator, e.g. the second '<'
+                            # in 'a < b < c', does not belong to this expression
+                            entry = None
+                        else:
+                            node_class, line = operators.pop()[2:]
+                            right_tree = operands.pop()
+                            operands[-1] = node_class(operands[-1], right_tree, line)
+                if entry is not None:
+                    position += 1
+                    operators.append((entry[0], entry[1], entry[2], lines[position]))
+                    break
+
+                if open_parens and code == rparen:
+                    while operators[-1][0]:
+                        node_class, line = operators.pop()[2:]
+                        right_tree = operands.pop()
+                        operands[-1] = node_class(operands[-1], right_tree, line)
+                    unary_operator = operators.pop()[2]
+                    open_parens -= 1
+                    position += 1
+                    code = codes[position]
+                    # A factor in redundant parentheses is not wrapped again,
+                    # so '((((a))))' gives one node instead of a deep chain
+                    if unary_operator or not isinstance(operands[-1], factor):
+                        operands[-1] = factor(operands[-1], unary_operator, lines[position])
+                    continue
+
+                # The expression ends at the current token
+                self.seek(position)
+                if open_parens:
+                    raise errors.CliteSyntaxError("Missing right parenthesis!",
+                                                  self.line)
+                while operators:
+                    node_class, line = operators.pop()[2:]
+                    right_tree = operands.pop()
+                    operands[-1] = node_class(operands[-1], right_tree, line)
+                # Each token adds at most two nodes, so only the depth
+                # of a long expression needs to be checked
+                if 2 * (position - start) > self.MAX_EXPRESSION_DEPTH and \
+                        expression_depth(operands[0]) > self.MAX_EXPRESSION_DEPTH:
+                    raise errors.CliteSyntaxError("Expression is nested too deeply!",
+                                                  self.line)
+                return operands[0]
 
     def primary(self):
         """
-        Primary -> Identifier | IntLit | FloatLit | '(' Expression ')' | 'true' | 'false'
+        Primary -> Identifier | IntLit | FloatLit | 'true' | 'false'
+        A parenthesised expression is handled by expression().
         :return: An ast.Expression object
         :raise CliteSyntaxError if an unexpected token is seen
         """
-        line_number = self.curr_tok[self.LINE]
+        line_number = self.line
         # Match an identifier
-        if self.curr_tok[self.CODE] == tokens.ID[0]:
-            identifier = self.curr_tok[2]
-            # Raise an error if the identifier is not declared
+        if self.code == tokens.ID[0]:
+            identifier = self.value
+            # Report an error if the identifier is not declared
             if identifier not in self.decls:
-                raise errors.CliteSyntaxError("Identifier '{0}' not declared!".format(identifier),
-                                              self.curr_tok[self.LINE])
+                self.undeclared(identifier, line_number)
             # Consume identifier
-            self.curr_tok = self.lex.__next__()
-            return ast.IdentifierExpression(identifier, line_number)
+            self.advance()
+            return ast.IdentifierExpression(identifier, line_number, self.tree)
 
         # Or match an integer literal
-        elif self.curr_tok[self.CODE] == tokens.INTLIT[0]:
-            int_lit = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
+        elif self.code == tokens.INTLIT[0]:
+            int_lit = self.value
+            self.advance()
             return ast.IntLitExpression(int_lit, line_number)
 
         # Or match a real number
-        elif self.curr_tok[self.CODE] == tokens.REAL_NUMBER[0]:
-            real_number = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
+        elif self.code == tokens.REAL_NUMBER[0]:
+            real_number = self.value
+            self.advance()
             return ast.RealNumberExpression(real_number, line_number)
 
         # Or match a 'true'
-        elif self.curr_tok[self.CODE] == tokens.KEYWORDS[tokens.TRUE]:
-            true_expr = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
+        elif self.code == tokens.KEYWORDS[tokens.TRUE]:
+            true_expr = self.value
+            self.advance()
             return ast.TrueExpression(true_expr)
 
         # Or match a 'false'
-        elif self.curr_tok[self.CODE] == tokens.KEYWORDS[tokens.FALSE]:
-            false_expr = self.curr_tok[self.VALUE]
-            self.curr_tok = self.lex.__next__()
+        elif self.code == tokens.KEYWORDS[tokens.FALSE]:
+            false_expr = self.value
+            self.advance()
             return ast.FalseExpression(false_expr)
 
-        # Or match a left opening parenthesis
-        elif self.curr_tok[self.CODE] == tokens.SINGLE_TOKENS[tokens.LPAREN][0]:
-            self.curr_tok = self.lex.__next__()
-            # at this point there is an expression in self.curr_tok
-            syntax_tree = self.expression()
-
-            if self.curr_tok[self.CODE] == tokens.SINGLE_TOKENS[tokens.RPAREN][0]:
-                self.curr_tok = self.lex.__next__()
-                return syntax_tree
-            else:
-                raise errors.CliteSyntaxError("Missing right parenthesis!",
-                                              self.curr_tok[self.LINE])
         # Or raise a CliteSyntaxError
         else:
-            raise errors.CliteSyntaxError("Unexpected symbol {0}!".format(self.curr_tok[self.VALUE]),
-                                          self.curr_tok[self.LINE])
\ No newline at end of file
+            raise errors.CliteSyntaxError("Unexpected symbol {0}!".format(self.value),
+                                          self.line)
\ No newline at end of file
@@ -0,0 +1,282 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/11/2015
+"""
+import time
+
+import analysis
+import ast
+import visitor
+
+# Number of lines listed by report() when no limit is given
+DEFAULT_REPORT_LINES = 20
+
+
+class NodeProfile(object):
+    """
+    The counters of one profiled node: how many times it was evaluated
+    and the nanoseconds spent in it, its profiled children included.
+    """
+
+    def __init__(self, kind, line_number, parent=None):
+        self.kind = kind
+        self.line_number = line_number
+        self.parent = parent
+        self.children = []
+        self.hits = 0
+        self.total_ns = 0
+
+    def self_ns(self):
+        """
+        :return: the time spent in the node but not in its profiled
+                 children; type - int
+        """
+        return self.total_ns - sum(child.total_ns for child in self.children)
+
+    def as_dict(self):
+        return {"line": self.line_number, "kind": self.kind, "hits": self.hits,
+                "total_ns": self.total_ns, "self_ns": self.self_ns()}
+
+
+class ProfiledStatement(ast.Statement):
+    """
+    A statement that counts the evaluations of the statement it wraps and
+    the time they take.
+    Inherits the Statement base class.
+    """
+    child_fields = ('statement',)
+
+    def __init__(self, statement, record):
+        super().__init__()
+        self.statement = statement
+        self.record = record
+        self.level = statement.level
+        self.line_number = record.line_number
+
+    def __str__(self):
+        return self.statement.__str__()
+
+    def eval(self):
+        record = self.record
+        start = time.perf_counter_ns()
+        try:
+            return self.statement.eval()
+        finally:
+            record.total_ns += time.perf_counter_ns() - start
+            record.hits += 1
+
+
+class ProfiledExpression(ast.Expression):
+    """
+    An expression that counts the evaluations of the expression it wraps
+    and the time they take.
+    Inherits the Expression base class.
+    """
+    child_fields = ('expression',)
+
+    def __init__(self, expression, record):
+        self.expression = expression
+        self.record = record
+        self.line_number = record.line_number
+        self.checked = expression.checked
+        self.clite_type = getattr(expression, 'clite_type', None)
+
+    def __str__(self):
+        return self.expression.__str__()
+
+    def type(self):
+        return self.expression.type()
+
+    def eval(self):
+        record = self.record
+        start = time.perf_counter_ns()
+        try:
+            return self.expression.eval()
+        finally:
+            record.total_ns += time.perf_counter_ns() - start
+            record.hits += 1
+
+
+class Profiler(visitor.NodeTransformer):
+    """
+    A pass that instruments a program for profiling. Every statement and
+    every expression that computes something is wrapped in a
+    ProfiledStatement or ProfiledExpression node with its own NodeProfile,
+    keyed by the line the node is on. Blocks, identifiers and literals
+    are not wrapped: they do no work of their own, and timing them would
+    only measure the timer. A program that is not instrumented runs
+    exactly as before, so profiling costs nothing when it is off.
+    Only the tree walking evaluator can run an instrumented program.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.records = []
+        self.parents = []
+        self.roots = []
+
+    def instrument(self):
+        """
+        Instrument the program in place
+        :return: the Profiler object
+        """
+        self.transform(self.program)
+        return self
+
+    def wrap(self, node, wrapper_class, line_number):
+        """
+        Wrap a node and its children
+        :param node: an ast.Statement or ast.Expression object
+        :param wrapper_class: ProfiledStatement or ProfiledExpression
+        :param line_number: the line the node is on
+        :return: the wrapper
+        """
+        parent = self.parents[-1] if self.parents else None
+        record = NodeProfile(type(node).__name__, line_number, parent)
+        (parent.children if parent is not None else self.roots).append(record)
+        self.records.append(record)
+        self.parents.append(record)
+        self.generic_visit(node)
+        self.parents.pop()
+        return wrapper_class(node, record)
+
+    def visit_Statement(self, node):
+        return self.wrap(node, ProfiledStatement, statement_line(node))
+
+    def visit_Block(self, node):
+        return self.generic_visit(node)
+
+    def visit_Semicolon(self, node):
+        return node
+
+    def visit_HoistedLoop(self, node):
+        # The loop inside is profiled on the same line
+        return self.generic_visit(node)
+
+    def visit_Expression(self, node):
+        return self.wrap(node, ProfiledExpression, expression_line(node))
+
+    def visit_Factor(self, node):
+        if not node.unary_operator:
+            return self.generic_visit(node)
+        return self.wrap(node, ProfiledExpression, expression_line(node))
+
+    def visit_LoopInvariantExpression(self, node):
+        # The invariant is also held by its HoistedLoop, which resets it
+        return self.generic_visit(node)
+
+    def visit_Primary(self, node):
+        return node
+
+    def visit_ProfiledStatement(self, node):
+        # A hoisted invariant is reached twice, once from its loop and
+        # once from where it is used
+        return node
+
+    visit_ProfiledExpression = visit_ProfiledStatement
+
+    # ######## Results ############
+
+    def total_ns(self):
+        """
+        :return: the time spent in the top level statements; type - int
+        """
+        return sum(record.total_ns for record in self.roots)
+
+    def lines(self):
+        """
+        Sum the counters of the nodes on each line. The self time of a line
+        is the time spent in its nodes but not in nodes on other lines;
+        its cumulative time also counts the lines its nodes evaluate, such
+        as the body of a loop.
+        :return: a list of dictionaries, one per line, from the line with
+                 the largest self time down
+        """
+        lines = {}
+        for record in self.records:
+            line = lines.setdefault(record.line_number, {"line": record.line_number, "hits": 0,
+                                                         "self_ns": 0, "cumulative_ns": 0})
+            line["hits"] = max(line["hits"], record.hits)
+            line["self_ns"] += record.self_ns()
+            if record.parent is None or record.parent.line_number != record.line_number:
+                line["cumulative_ns"] += record.total_ns
+        return sorted(lines.values(), key=lambda line: (-line["self_ns"], line["line"]))
+
+    def as_dict(self, filename=None):
+        """
+        :param filename: the name of the profiled source [optional]
+        :return: the profile as a dictionary that can be dumped as JSON
+        """
+        return {"file": filename, "total_ns": self.total_ns(), "lines": self.lines(),
+                "nodes": [record.as_dict() for record in self.records]}
+
+    def report(self, source=None, limit=DEFAULT_REPORT_LINES):
+        """
+        Make a listing of the lines of the program that took the most time
+        :param source: the source text of the program, to show each line
+        :param limit: the number of lines to list; None lists every line
+        :return: type - string
+        """
+        source_lines = source.splitlines() if source is not None else []
+        total = self.total_ns() or 1
+        rows = ["{0:>6} {1:>10} {2:>11} {3:>11} {4:>7}  {5}".
+                format("Line", "Hits", "Self ms", "Cumul ms", "Self %", "Source")]
+        for line in self.lines()[:limit]:
+            number = line["line"]
+            text = source_lines[number - 1].strip() if 0 < number <= len(source_lines) else ""
+            rows.append("{0:>6} {1:>10} {2:>11.3f} {3:>11.3f} {4:>6.1f}%  {5}".
+                        format(number if number != -1 else "?", line["hits"],
+                               line["self_ns"] / 1e6, line["cumulative_ns"] / 1e6,
+                               100.0 * line["self_ns"] / total, text))
+        rows.append("Total: {0:.3f} ms".format(self.total_ns() / 1e6))
+        return "\n".join(rows)
+
+
+def expression_line(expression):
+    """
+    Return the first line number found in an expression, or -1 if it
+    carries none, e.g. true
+    :param expression: an ast.Expression object
+    :return: type - int
+    """
+    stack = [expression]
+    while stack:
+        node = stack.pop()
+        line_number = getattr(node, 'line_number', -1)
+        if line_number != -1:
+            return line_number
+        stack.extend(reversed(analysis.children(node)))
+    return -1
+
+
+def statement_line(statement):
+    """
+    Return the line of a statement, which is the line of its first
+    expression, or of its first statement for a block
+    :param statement: an ast.Statement object
+    :return: type - int
+    """
+    for field in statement.child_fields:
+        value = getattr(statement, field)
+        for child in value if isinstance(value, list) else [value]:
+            if isinstance(child, ast.Expression):
+                line_number = expression_line(child)
+            elif isinstance(child, ast.Statement):
+                line_number = statement_line(child)
+            else:
+                continue
+            if line_number != -1:
+                return line_number
+    # A statement may keep its expression out of its children
+    return getattr(statement, 'line_number', -1)
+
+
+def instrument(program):
+    """
+    A convenience function that instruments a program for profiling
+    :param program: a type checked, and possibly optimized, ast.Program
+    :return: a Profiler object with the counters of the program
+    """
+    return Profiler(program).instrument()
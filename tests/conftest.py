@@ -0,0 +1,32 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/22/2015
+
+The interpreter has modules named ast and parser, which hide the modules
+of the standard library with the same names. Python puts the current
+directory on the module path when it runs python3 -m pytest. pytest
+itself needs the standard ast module, so run the tests either from this
+directory with
+
+    python3 -m pytest
+
+or from the top directory with
+
+    python3 -P -m pytest tests
+
+This file then puts the interpreter in front of the module path and drops
+the standard modules pytest has already imported under those names.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+for name in ('ast', 'parser'):
+    module = sys.modules.get(name)
+    if module is not None and \
+            os.path.dirname(os.path.abspath(getattr(module, '__file__', None) or '')) != ROOT:
+        del sys.modules[name]
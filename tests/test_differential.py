@@ -0,0 +1,435 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 05/22/2015
+
+Differential tests: every back end, every option and every pass that
+rewrites or re-parses a program must give the output, the errors and the
+final values of the variables that the tree walking evaluator gives.
+"""
+import io
+import os
+import re
+
+import pytest
+
+import cache
+import errors
+import incremental
+import interpreter
+import ir
+import limits
+import optimizer
+import output
+import profiler
+import typechecker
+from conftest import ROOT
+from parser import Parser
+
+# Programs that use the features of the language one at a time. The ones
+# whose name ends in '_unbounded' divide two ints or overflow a 32 bit
+# int, so fixed width integers give them other values on purpose.
+PROGRAMS = {
+    'arithmetic': """
+        int main() {
+            int a; int b; int c; float x; float y;
+            a = 7; b = 3;
+            c = a * b - a % b + -a + 2 ** 5 - (a - b) * (a + b);
+            print(c);
+            x = 2.5; y = x * a - 0.5;
+            print(y);
+            print(x ** 2 + b);
+            print(-(x - a) * 2);
+        }
+    """,
+    'division_unbounded': """
+        int main() {
+            int a; int b; float x;
+            a = 7; b = 2;
+            x = a / b;
+            print(x);
+            print(a / b * b);
+            print(-a / b);
+            print(2 ** 70);
+            print(2 ** -1);
+        }
+    """,
+    'booleans': """
+        int main() {
+            int a; bool p; bool q; bool r;
+            a = 5;
+            p = a > 3 && a < 10;
+            q = !p || a == 5;
+            r = p && !q || a != 5;
+            print(p); print(q); print(r);
+            print(p == q);
+            print(true && (false || !false));
+            print(a >= 5 && a <= 5);
+        }
+    """,
+    'loops': """
+        int main() {
+            int i; int j; int sum; int n;
+            i = 0; sum = 0; n = 6;
+            while (i < n) {
+                j = 0;
+                while (j <= i) {
+                    if (j % 2 == 0)
+                        sum = sum + i * j;
+                    else if (j == 3)
+                        sum = sum - 1;
+                    else
+                        sum = sum + 1;
+                    j = j + 1;
+                }
+                i = i + 1;
+            }
+            print(sum);
+            print(i);
+        }
+    """,
+    'collatz_unbounded': """
+        int main() {
+            int n; int steps; int largest;
+            n = 27; steps = 0; largest = n;
+            while (n != 1) {
+                if (n % 2 == 0) n = n / 2;
+                else n = 3 * n + 1;
+                if (n > largest) largest = n;
+                steps = steps + 1;
+            }
+            print(steps);
+            print(largest);
+        }
+    """,
+    'gcd_fibonacci': """
+        int main() {
+            int a; int b; int t; int i; int f0; int f1;
+            a = 1071; b = 462;
+            while (b != 0) {
+                t = b;
+                b = a % b;
+                a = t;
+            }
+            print(a);
+            f0 = 0; f1 = 1; i = 0;
+            while (i < 40) {
+                t = f0 + f1;
+                f0 = f1;
+                f1 = t;
+                i = i + 1;
+            }
+            print(f0);
+        }
+    """,
+    'floats': """
+        int main() {
+            float x; float step; int i; bool small;
+            x = 0.0; step = 0.1; i = 0;
+            while (i < 10) {
+                x = x + step;
+                i = i + 1;
+            }
+            print(x);
+            small = x < 1.0;
+            print(small);
+            print(x * x - 2.0 * x + 1.0);
+            print(1.5 % 0.4);
+        }
+    """,
+    'optimizer_targets': """
+        int main() {
+            int i; int n; int k; int unused; int total; bool flag;
+            n = 20; k = 3; total = 0; flag = false;
+            i = 0;
+            while (i < n) {
+                unused = i * 1000;
+                total = total + (k * k + 2) * 2 + i % 8 + i ** 3;
+                if (false) total = 0;
+                while (false) total = 1;
+                ;
+                i = i + 1;
+            }
+            if (true) print(total);
+            print(flag || total > 0);
+            print(k * 0 + 0 * k + k * 1);
+        }
+    """,
+    'fusion_targets': """
+        int main() {
+            int n; int i; int divisors;
+            n = 360; i = 1; divisors = 0;
+            while (i <= n) {
+                if (n % i == 0) divisors = divisors + 1;
+                i = i + 1;
+            }
+            print(divisors);
+            i = 10;
+            while (0 < i && i != 4) i = i - 1;
+            print(i);
+        }
+    """,
+    'undefined': """
+        int main() {
+            int a; int b; int c;
+            a = 1;
+            print(a);
+            if (a > 1) b = 2;
+            c = a + b;
+            print(c);
+        }
+    """,
+    'deep_nesting': """
+        int main() {
+            int a; int b;
+            a = 1; b = 0;
+            """ + "while (a < 2) { " * 25 + "b = b + 1; a = 2;" + " }" * 25 + """
+            print(b);
+            print(""" + "(a + " * 40 + "a" + ")" * 40 + """);
+            print(((((((((((((((a)))))))))))))));
+        }
+    """,
+}
+
+
+def sample(name):
+    """
+    Read a sample program of the repository
+    :param name: the file name of the sample
+    :return: the source; type - string
+    """
+    with open(os.path.join(ROOT, name)) as source_file:
+        return source_file.read()
+
+
+PROGRAMS['test2_unbounded'] = sample('test2.c')
+PROGRAMS['test3'] = sample('test3.c')
+# isprime.c checks a large prime; a small one takes less time
+PROGRAMS['isprime_unbounded'] = sample('isprime.c').replace('1323209', '1009')
+
+NAMES = sorted(PROGRAMS)
+BOUNDED = [name for name in NAMES if not name.endswith('_unbounded')]
+
+
+def reference(name):
+    """
+    Run a program on the tree walking evaluator
+    :param name: a key of PROGRAMS
+    :return: an interpreter.Result object
+    """
+    return interpreter.Interpreter().run(PROGRAMS[name])
+
+
+def error_messages(result):
+    return [str(error) for error in result.errors]
+
+
+def assert_same(result, expected, environment=True):
+    """
+    Compare the result of a run with the result of the reference run
+    :param environment: compare the values of the variables as well
+    """
+    assert result.output == expected.output
+    assert error_messages(result) == error_messages(expected)
+    if environment:
+        assert result.environment == expected.environment
+
+
+def checked_program(name):
+    """
+    Parse and type check a program
+    :param name: a key of PROGRAMS
+    :return: an ast.Program object
+    """
+    program = Parser.from_string(PROGRAMS[name]).parse()
+    assert typechecker.check(program) == []
+    return program
+
+
+def execute(program):
+    """
+    Run a checked program on the tree walking evaluator
+    :param program: an ast.Program object
+    :return: the output and the messages of the errors
+    """
+    stream = io.StringIO()
+    program.output = output.BufferedSink(stream)
+    error_list = []
+    try:
+        program.execute()
+    except errors.CliteRuntimeError as error:
+        error_list.append(str(error))
+    return stream.getvalue(), error_list
+
+
+# ######## Back ends and options ############
+
+@pytest.mark.parametrize('name', NAMES)
+@pytest.mark.parametrize('backend', interpreter.BACKENDS)
+@pytest.mark.parametrize('optimize', [False, True])
+def test_backend(name, backend, optimize):
+    expected = reference(name)
+    result = interpreter.Interpreter(backend, optimize).run(PROGRAMS[name])
+    # The variables of the generated Python function are lost on an error
+    assert_same(result, expected, environment=backend != interpreter.PYTHON or expected.ok)
+
+
+@pytest.mark.parametrize('name', NAMES)
+@pytest.mark.parametrize('optimize', [False, True])
+def test_fused(name, optimize):
+    result = interpreter.Interpreter(optimize=optimize, fuse=True).run(PROGRAMS[name])
+    assert_same(result, reference(name))
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_resource_limits(name):
+    resource_limits = limits.ResourceLimits(max_steps=10 ** 7, timeout=60, max_int_bits=1024)
+    result = interpreter.Interpreter(resource_limits=resource_limits).run(PROGRAMS[name])
+    assert_same(result, reference(name))
+
+
+@pytest.mark.parametrize('name', BOUNDED)
+@pytest.mark.parametrize('bits', [32, 64])
+@pytest.mark.parametrize('optimize', [False, True])
+def test_int_bits(name, bits, optimize):
+    result = interpreter.Interpreter(optimize=optimize, int_bits=bits).run(PROGRAMS[name])
+    assert_same(result, reference(name))
+
+
+# ######## Passes ############
+
+@pytest.mark.parametrize('name', NAMES)
+@pytest.mark.parametrize('optimize', [False, True])
+def test_profiled(name, optimize):
+    program = checked_program(name)
+    if optimize:
+        optimizer.optimize(program, reduce_strength=True, remove_dead_stores=False)
+    profile = profiler.instrument(program)
+    expected = reference(name)
+    assert execute(program) == (expected.output, error_messages(expected))
+    assert profile.total_ns() >= 0
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_cache_round_trip(name, tmp_path):
+    program_cache = cache.ProgramCache(str(tmp_path / cache.CACHE_DIRECTORY_NAME))
+    key = program_cache.key(PROGRAMS[name].encode())
+    assert program_cache.load(key) is None
+    assert program_cache.store(key, checked_program(name))
+    program = program_cache.load(key)
+    expected = reference(name)
+    assert execute(program) == (expected.output, error_messages(expected))
+
+
+@pytest.mark.parametrize('name', NAMES)
+@pytest.mark.parametrize('ssa', [False, True])
+def test_ir(name, ssa):
+    program = checked_program(name)
+    stream = io.StringIO()
+    sink = output.BufferedSink(stream)
+    try:
+        run_ir(ir.lower(program, ssa=ssa), sink)
+        failed = False
+    except UndefinedValue:
+        failed = True
+    sink.flush()
+    expected = reference(name)
+    assert stream.getvalue() == expected.output
+    assert failed == (not expected.ok)
+
+
+# ######## Parsers ############
+
+@pytest.mark.parametrize('name', NAMES)
+def test_recovering_parser(name):
+    recovering_parser = Parser.from_string(PROGRAMS[name], recover=True)
+    program = recovering_parser.parse()
+    assert recovering_parser.errors == []
+    assert str(program) == str(Parser.from_string(PROGRAMS[name]).parse())
+
+
+@pytest.mark.parametrize('name', NAMES)
+def test_incremental_edit(name):
+    document = incremental.Document(PROGRAMS[name])
+    # Edit every integer literal, from the last, so that the offsets of the
+    # ones before stay valid
+    for literal in reversed(list(re.finditer(r"(?<![\w.])\d+(?![\w.])", document.text))):
+        document.edit(literal.start(), literal.end(), "(" + literal.group() + " + 1)")
+        assert str(document.program) == str(Parser.from_string(document.text).parse())
+    assert document.check() == []
+    expected = interpreter.Interpreter().run(document.text)
+    assert execute(document.program) == (expected.output, error_messages(expected))
+
+
+# ######## An evaluator of the IR ############
+
+class UndefinedValue(Exception):
+    pass
+
+
+IR_OPERATIONS = {
+    '+': lambda left, right: left + right,
+    '-': lambda left, right: left - right,
+    '*': lambda left, right: left * right,
+    '/': lambda left, right: left / right,
+    '%': lambda left, right: left % right,
+    '**': lambda left, right: left ** right,
+    '<': lambda left, right: left < right,
+    '<=': lambda left, right: left <= right,
+    '>': lambda left, right: left > right,
+    '>=': lambda left, right: left >= right,
+    '==': lambda left, right: left == right,
+    '!=': lambda left, right: left != right,
+}
+
+
+def run_ir(cfg, sink):
+    """
+    Run a control flow graph made by ir.lower()
+    :param cfg: an ir.ControlFlowGraph object
+    :param sink: the output.Sink for the printed values
+    :return: None
+    :raise UndefinedValue if a variable is read before it is assigned
+    """
+    values = {}
+
+    def value(operand):
+        if isinstance(operand, ir.Constant):
+            return operand.value
+        if operand not in values:
+            raise UndefinedValue(operand)
+        return values[operand]
+
+    block, previous = cfg.entry, None
+    while True:
+        phis = block.phis()
+        # The phis of a block read the values of the predecessor together
+        incoming = {}
+        for phi in phis:
+            operand = phi.operands[phi.blocks.index(previous)]
+            if isinstance(operand, ir.Constant) or operand in values:
+                incoming[phi.target] = value(operand)
+        values.update(incoming)
+        for instruction in block.instructions[len(phis):]:
+            if isinstance(instruction, ir.Copy):
+                values[instruction.target] = value(instruction.operands[0])
+            elif isinstance(instruction, ir.BinaryOperation):
+                values[instruction.target] = IR_OPERATIONS[instruction.operator](
+                    value(instruction.operands[0]), value(instruction.operands[1]))
+            elif isinstance(instruction, ir.UnaryOperation):
+                operand = value(instruction.operands[0])
+                values[instruction.target] = not operand if instruction.operator == '!' \
+                    else -operand
+            elif isinstance(instruction, ir.Print):
+                sink.write(value(instruction.operands[0]))
+        terminator = block.terminator
+        if isinstance(terminator, ir.Return):
+            return
+        previous = block
+        if isinstance(terminator, ir.Jump):
+            block = terminator.block
+        elif value(terminator.operands[0]):
+            block = terminator.if_true
+        else:
+            block = terminator.if_false
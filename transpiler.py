@@ -0,0 +1,302 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/26/2015
+"""
+import hashlib
+import math
+
+import analysis
+import ast
+import closures
+import compiler
+import errors
+import output
+import tokens
+import visitor
+
+# Name of the generated function
+FUNCTION_NAME = "clite_main"
+
+# Python operator for each binary expression class
+OPERATORS = {
+    ast.BinaryPlusExpression: "+", ast.BinaryMinusExpression: "-",
+    ast.BinaryTimesExpression: "*", ast.BinaryDivideExpression: "/",
+    ast.BinaryModExpression: "%", ast.BinaryExpExpression: "**",
+    ast.BinaryLessExpression: "<", ast.BinaryLessEqualExpression: "<=",
+    ast.BinaryGreaterExpression: ">", ast.BinaryGreaterEqualExpression: ">=",
+    ast.BinaryEqualOpExpression: "==", ast.BinaryNotEqualOpExpression: "!=",
+    ast.Conjunction: "or", ast.Equality: "and"
+}
+
+# Python precedence of each operator, from the loosest to the tightest
+# binding. The generated code has parentheses only where the precedence
+# or the associativity of the operators needs them, since compile()
+# rejects deeply nested parentheses.
+PRECEDENCE = {
+    "or": 1, "and": 2, "not": 3,
+    "<": 4, "<=": 4, ">": 4, ">=": 4, "==": 4, "!=": 4,
+    "+": 5, "-": 5, "*": 6, "/": 6, "%": 6, "**": 8
+}
+COMPARISON = 4
+UNARY_MINUS = 7
+# Names, literals and parenthesized expressions
+ATOM = 9
+
+# Compiled code objects, keyed by the hash of the generated source; the
+# oldest entry is dropped when the cache holds CODE_CACHE_SIZE entries
+_code_cache = {}
+CODE_CACHE_SIZE = 256
+
+
+class PythonGenerator(visitor.NodeVisitor):
+    """
+    A code generator that translates a type checked ast.Program into the
+    source of an equivalent Python function. Declared variables become
+    local variables of the function, which CPython reads faster than the
+    slots of Program.env. A print statement hands its value to the
+    emit argument of the function, which is the write method of an output sink.
+    """
+
+    INDENT = "    "
+
+    def __init__(self, program):
+        self.program = program
+        self.unsafe_reads = analysis.unsafe_reads(program)
+        self.lines = []
+        self.level = 1
+        # Python names of the loop invariants, keyed by node id
+        self.invariant_names = {}
+
+    def generate(self):
+        """
+        Generate the Python source of the program
+        :return: type - string
+        """
+        self.lines = ["def {0}(emit, undefined):".format(FUNCTION_NAME)]
+        for identifier in self.program.decls:
+            self.line("{0} = None".format(local_name(identifier)))
+        for statement in self.program.stmts:
+            self.visit(statement)
+        self.line("return {{{0}}}".format(", ".join(
+            "{0!r}: {1}".format(identifier, local_name(identifier))
+            for identifier in self.program.decls)))
+        return "\n".join(self.lines) + "\n"
+
+    def line(self, text):
+        self.lines.append(self.INDENT * self.level + text)
+
+    def suite(self, statement):
+        """
+        Generate an indented block of statements, adding a pass
+        statement if it would be empty
+        """
+        self.level += 1
+        length = len(self.lines)
+        self.visit(statement)
+        if len(self.lines) == length:
+            self.line("pass")
+        self.level -= 1
+
+    # ######### Statements #############
+
+    def visit_Block(self, node):
+        for statement in node.statements:
+            self.visit(statement)
+
+    def visit_Semicolon(self, node):
+        return
+
+    def visit_Assignment(self, node):
+        self.line("{0} = {1}".format(local_name(node.identifier), self.visit(node.expr)))
+
+    def visit_PrintStatement(self, node):
+        self.line("emit({0})".format(self.visit(node.expression)))
+
+    def visit_IfStatement(self, node):
+        self.line("if {0}:".format(self.visit(node.expression)))
+        self.suite(node.if_statement)
+        if node.else_statement:
+            self.line("else:")
+            self.suite(node.else_statement)
+
+    def visit_WhileStatement(self, node):
+        self.line("while {0}:".format(self.visit(node.expression)))
+        self.suite(node.statement)
+
+    def visit_HoistedLoop(self, node):
+        for invariant in node.invariants:
+            name = self.invariant_names[id(invariant)] = "t_{0}".format(len(self.invariant_names))
+            if invariant.eager:
+                self.line("{0} = {1}".format(name, self.visit(invariant.expression)))
+            else:
+                self.line("{0} = None".format(name))
+        self.visit(node.loop)
+
+    # ######## Expressions ############
+
+    def operand(self, node, minimum):
+        """
+        Generate an operand, in parentheses if its operator binds looser
+        than minimum
+        :param node: an ast.Expression object
+        :param minimum: the lowest precedence allowed without parentheses
+        :return: type - string
+        """
+        code = self.visit(node)
+        if precedence(node) < minimum:
+            return "({0})".format(code)
+        return code
+
+    def visit_BinaryExpression(self, node):
+        operator = OPERATORS[type(node)]
+        binding = PRECEDENCE[operator]
+        if operator == "**":
+            # Right associative, and looser than a unary minus on its left
+            left, right = ATOM, UNARY_MINUS
+        elif binding == COMPARISON:
+            # Python would chain a comparison inside another one
+            left = right = binding + 1
+        else:
+            left, right = binding, binding + 1
+        return "{0} {1} {2}".format(self.operand(node.left, left), operator,
+                                    self.operand(node.right, right))
+
+    def visit_Factor(self, node):
+        if node.unary_operator == tokens.NOT:
+            return "not " + self.operand(node.primary, PRECEDENCE["not"])
+        elif node.unary_operator == tokens.MINUS:
+            return "-" + self.operand(node.primary, UNARY_MINUS)
+        return self.visit(node.primary)
+
+    def visit_LoopInvariantExpression(self, node):
+        name = self.invariant_names[id(node)]
+        if node.eager:
+            return name
+        # A lazy invariant is computed at its first use in the loop
+        return "({0} if {0} is not None else ({0} := {1}))".format(name, self.visit(node.expression))
+
+    def visit_IdentifierExpression(self, node):
+        name = local_name(node.identifier)
+        if id(node) in self.unsafe_reads:
+            return "({0} if {0} is not None else undefined({1!r}, {2}))".\
+                format(name, node.identifier, node.line_number)
+        return name
+
+    def visit_Primary(self, node):
+        value = compiler.constant_value(node)
+        if isinstance(value, float) and not math.isfinite(value):
+            # repr() gives 'inf', which is not a Python literal
+            return "float({0!r})".format(repr(value))
+        return repr(value)
+
+
+def local_name(identifier):
+    """
+    Return the Python name of a Clite variable. The prefix keeps Clite
+    identifiers such as 'list' or 'pass' from clashing with Python names.
+    """
+    return "v_" + identifier
+
+
+def precedence(node):
+    """
+    :param node: an ast.Expression object
+    :return: the Python precedence of the code generated for the node
+    """
+    if isinstance(node, ast.BinaryExpression):
+        return PRECEDENCE[OPERATORS[type(node)]]
+    elif isinstance(node, ast.Factor):
+        if node.unary_operator == tokens.NOT:
+            return PRECEDENCE["not"]
+        elif node.unary_operator == tokens.MINUS:
+            return UNARY_MINUS
+        return precedence(node.primary)
+    value = compiler.constant_value(node)
+    if isinstance(value, (int, float)) and math.isfinite(value) and repr(value).startswith("-"):
+        # A negative constant is written with a unary minus
+        return UNARY_MINUS
+    return ATOM
+
+
+def undefined(identifier, line_number):
+    """
+    Called by the generated code when it reads an undefined variable
+    :raise CliteRuntimeError
+    """
+    raise errors.CliteRuntimeError(identifier + " not defined!", line_number)
+
+
+def generate(program):
+    """
+    A convenience function that generates the Python source of a program
+    :param program: a type checked ast.Program object
+    :return: type - string
+    """
+    return PythonGenerator(program).generate()
+
+
+def compile_program(program):
+    """
+    Translate a program to Python and compile it with the builtin compile().
+    The code object is cached under the hash of the generated source, so a
+    program that is run again is compiled only once. The generated source,
+    not the Clite source, is the key, because the same Clite source can
+    give different code once other passes rewrite the tree.
+    Python does not compile every program the parser accepts, e.g. one
+    with more than 20 nested while statements; such a program is compiled
+    to closures instead, which write to program.output.
+    :param program: a type checked ast.Program object
+    :return: the generated Python function
+    """
+    try:
+        python_source = generate(program)
+    except RecursionError:
+        return closure_function(program)
+    key = hashlib.sha256(python_source.encode()).hexdigest()
+    code = _code_cache.get(key)
+    if code is None:
+        try:
+            code = compile(python_source, "<clite>", "exec")
+        except (SyntaxError, RecursionError, MemoryError):
+            return closure_function(program)
+        if len(_code_cache) >= CODE_CACHE_SIZE:
+            del _code_cache[next(iter(_code_cache))]
+        _code_cache[key] = code
+    namespace = {}
+    exec(code, namespace)
+    return namespace[FUNCTION_NAME]
+
+
+def closure_function(program):
+    """
+    Compile a program to closures behind the interface of a generated
+    function
+    :param program: a type checked ast.Program object
+    :return: a function of the write function and the undefined() function,
+             which ignores both; the closures write to program.output
+    """
+    closure_compiler = closures.compile_program(program)
+
+    def function(write, undefined_function):
+        closure_compiler.run()
+        return closure_compiler.environment()
+    return function
+
+
+def run(function, sink=None):
+    """
+    Run a function returned by compile_program(). The printed values are
+    handed to an output sink, which is flushed also when the program stops
+    with an error.
+    :param function: a generated function
+    :param sink: an output.Sink; a buffer on sys.stdout by default
+    :return: the final values of the variables, { identifier: value }
+    """
+    if sink is None:
+        sink = output.BufferedSink()
+    try:
+        return function(sink.write, undefined)
+    finally:
+        sink.flush()
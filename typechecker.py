@@ -0,0 +1,183 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/20/2015
+"""
+import ast
+import errors
+import tokens
+import visitor
+
+
+class TypeChecker(visitor.NodeVisitor):
+    """
+    A static type checker for Clite programs.
+    The checker walks an ast.Program once, before evaluation, resolves the
+    type of every expression and stores it in the node's clite_type
+    attribute. Nodes that pass the check are marked as checked, which lets
+    their eval() methods skip the run-time type validation.
+    Every CliteTypeError found is collected rather than raised, so that a
+    whole program is diagnosed in one pass.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.errors = []
+
+    def check(self):
+        """
+        Type check every statement in the program
+        :return: a list of errors.CliteTypeError objects; empty if the
+                 program is well typed
+        """
+        for statement in self.program.stmts:
+            self.visit(statement)
+        return self.errors
+
+    def error(self, msg="", line=-1, type1=None, type2=None):
+        """
+        Record a type error
+        :return: None, which stands for the type of an ill-typed expression
+        """
+        self.errors.append(errors.CliteTypeError(msg, line, type1, type2))
+        return None
+
+    # ######### Statements #############
+
+    def visit_Block(self, node):
+        for statement in node.statements:
+            self.visit(statement)
+
+    def visit_Semicolon(self, node):
+        return
+
+    def visit_Assignment(self, node):
+        self.visit(node.expr)
+
+    def visit_IfStatement(self, node):
+        self.visit(node.expression)
+        self.visit(node.if_statement)
+        if node.else_statement:
+            self.visit(node.else_statement)
+
+    def visit_WhileStatement(self, node):
+        self.visit(node.expression)
+        self.visit(node.statement)
+
+    def visit_HoistedLoop(self, node):
+        self.visit(node.loop)
+
+    def visit_PrintStatement(self, node):
+        self.visit(node.expression)
+
+    # ######## Expressions ############
+
+    def annotate(self, node, clite_type):
+        """
+        Store the resolved type in a node and mark it as checked
+        :return: the resolved type
+        """
+        node.clite_type = clite_type
+        node.checked = clite_type is not None
+        return clite_type
+
+    def visit_BinaryBoolExpression(self, node):
+        # Conjunction (||) and Equality (&&)
+        left_type = self.visit(node.left)
+        right_type = self.visit(node.right)
+        if left_type is None or right_type is None:
+            return self.annotate(node, None)
+        if left_type != tokens.BOOL or right_type != tokens.BOOL:
+            return self.annotate(node, self.error(line=node.line_number,
+                                                  type1=left_type, type2=right_type))
+        return self.annotate(node, tokens.BOOL)
+
+    def visit_BinaryEqualOpExpression(self, node):
+        left_type = self.visit(node.left)
+        right_type = self.visit(node.right)
+        if left_type is None or right_type is None:
+            return self.annotate(node, None)
+        if left_type != right_type and (left_type not in tokens.NUMERICALS or
+                                        right_type not in tokens.NUMERICALS):
+            return self.annotate(node, self.error(line=node.line_number,
+                                                  type1=left_type, type2=right_type))
+        return self.annotate(node, tokens.BOOL)
+
+    visit_BinaryNotEqualOpExpression = visit_BinaryEqualOpExpression
+
+    def visit_relation(self, node):
+        left_type = self.visit(node.left)
+        right_type = self.visit(node.right)
+        if left_type is None or right_type is None:
+            return self.annotate(node, None)
+        if left_type not in tokens.NUMERICALS or right_type not in tokens.NUMERICALS:
+            return self.annotate(node, self.error(line=node.line_number,
+                                                  type1=left_type, type2=right_type))
+        return self.annotate(node, tokens.BOOL)
+
+    visit_BinaryLessExpression = visit_relation
+    visit_BinaryLessEqualExpression = visit_relation
+    visit_BinaryGreaterExpression = visit_relation
+    visit_BinaryGreaterEqualExpression = visit_relation
+
+    def visit_BinaryNumericalExpression(self, node):
+        left_type = self.visit(node.left)
+        right_type = self.visit(node.right)
+        if left_type is None or right_type is None:
+            return self.annotate(node, None)
+        if left_type not in tokens.NUMERICALS or right_type not in tokens.NUMERICALS:
+            return self.annotate(node, self.error(line=node.line_number,
+                                                  type1=left_type, type2=right_type))
+        # int / int is a float too, as the division computes it
+        if left_type == tokens.FLOAT or right_type == tokens.FLOAT or \
+                isinstance(node, ast.BinaryDivideExpression):
+            return self.annotate(node, tokens.FLOAT)
+        return self.annotate(node, tokens.INT)
+
+    def visit_Factor(self, node):
+        primary_type = self.visit(node.primary)
+        if primary_type is None or not node.unary_operator:
+            return self.annotate(node, primary_type)
+        if (node.unary_operator == tokens.NOT) != (primary_type == tokens.BOOL):
+            return self.annotate(node, self.error(
+                "The operator {0} is undefined for the argument type(s) {1}".
+                format(node.unary_operator, primary_type), node.line_number))
+        return self.annotate(node, primary_type)
+
+    def visit_LoopInvariantExpression(self, node):
+        return self.annotate(node, self.visit(node.expression))
+
+    def visit_IdentifierExpression(self, node):
+        return self.annotate(node, self.program.decls[node.identifier])
+
+    def visit_IntLitExpression(self, node):
+        return self.annotate(node, tokens.INT)
+
+    def visit_RealNumberExpression(self, node):
+        return self.annotate(node, tokens.FLOAT)
+
+    def visit_BooleanExpression(self, node):
+        return self.annotate(node, tokens.BOOL)
+
+    def visit_ConstantExpression(self, node):
+        return self.annotate(node, node.clite_type)
+
+
+def line_of(expression):
+    """
+    Return the line number carried by an expression, or -1 for
+    expressions without one (true and false)
+    :param expression: an ast.Expression object
+    :return: type - int
+    """
+    return getattr(expression, 'line_number', -1)
+
+
+def check(program):
+    """
+    A convenience function that type checks a program
+    :param program: an ast.Program object
+    :return: a list of errors.CliteTypeError objects
+    """
+    return TypeChecker(program).check()
@@ -0,0 +1,89 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/20/2015
+"""
+import ast
+
+
+class NodeVisitor(object):
+    """
+    A base class for passes that walk an ast.Program tree.
+    A subclass defines visit_<ClassName> methods; when a node's own class
+    has no method, the method of its closest base class is used, so that
+    visit_BinaryNumericalExpression handles every arithmetic node.
+    """
+
+    def visit(self, node):
+        """
+        A method that dispatches a node to the matching visit method
+        :param node: an ast.Statement or ast.Expression object
+        :return: whatever the visit method returns
+        """
+        return self.method_for(type(node))(node)
+
+    def method_for(self, node_class):
+        """
+        A method that returns the bound visit method for a node class,
+        searching the class hierarchy from the most specific class up.
+        :param node_class: a class from the ast module
+        :return: a bound method
+        """
+        cache = self.__dict__.setdefault('_method_cache', {})
+        method = cache.get(node_class)
+        if method is None:
+            method = self.generic_visit
+            for cls in node_class.__mro__:
+                candidate = getattr(self, 'visit_' + cls.__name__, None)
+                if candidate is not None:
+                    method = candidate
+                    break
+            cache[node_class] = method
+        return method
+
+    def generic_visit(self, node):
+        """
+        Called when no visit method matches the node's class
+        :param node: an ast node
+        :raise NotImplementedError
+        """
+        raise NotImplementedError("{0} cannot visit {1} nodes".
+                                  format(type(self).__name__, type(node).__name__))
+
+
+class NodeTransformer(NodeVisitor):
+    """
+    A base class for passes that rewrite an ast.Program tree.
+    A visit method returns the node that takes the place of the visited
+    node. Nodes without a visit method keep their place, and their
+    children are visited and replaced by generic_visit.
+    """
+
+    def transform(self, program):
+        """
+        A method that rewrites every statement of a program
+        :param program: an ast.Program object
+        :return: the same ast.Program object
+        """
+        program.stmts = [self.visit(statement) for statement in program.stmts]
+        return program
+
+    def generic_visit(self, node):
+        """
+        Visit the children of a node and store the nodes that replace them.
+        The children are found through the child_fields of the node class:
+        reading the __dict__ of a node would make CPython store its
+        attributes in a real dictionary, which slows down every later
+        attribute access of the evaluator.
+        :param node: an ast node
+        :return: the node itself
+        """
+        for field in node.child_fields:
+            value = getattr(node, field)
+            if isinstance(value, (ast.Statement, ast.Expression)):
+                setattr(node, field, self.visit(value))
+            elif isinstance(value, list):
+                value[:] = [self.visit(item) if isinstance(item, (ast.Statement, ast.Expression))
+                            else item for item in value]
+        return node
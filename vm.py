@@ -0,0 +1,163 @@
+# coding=utf-8
+"""
+CS 364 Programming Languages
+Author: Vela Dimitrova Mineva
+Date: 04/22/2015
+"""
+import compiler
+import errors
+import output
+
+
+class VirtualMachine(object):
+    """
+    A register based virtual machine that runs a compiler.CodeObject.
+    Printed values are written to an output.Sink.
+    """
+
+    def __init__(self, code_object, sink=None):
+        self.code_object = code_object
+        self.sink = sink if sink is not None else output.BufferedSink()
+        self.registers = None
+
+    def environment(self):
+        """
+        Return the values of the declared variables after a run
+        :return: a dictionary of the form { identifier: value }
+        """
+        names = self.code_object.names
+        return dict(zip(names, self.registers[:len(names)]))
+
+    def run(self):
+        """
+        Execute the program
+        :return: None
+        :raise CliteRuntimeError when an undefined variable is read
+        """
+        try:
+            self.execute()
+        finally:
+            self.sink.flush()
+
+    def execute(self):
+        """
+        The instruction loop of run()
+        """
+        instructions = self.code_object.instructions()
+        registers = self.registers = self.code_object.registers()
+        pc = 0
+
+        # Opcodes are bound to locals; the comparisons below are ordered
+        # roughly by how often the instructions run in a loop
+        ADD, SUB, MUL, DIV, MOD, POW = compiler.ADD, compiler.SUB, compiler.MUL, \
+            compiler.DIV, compiler.MOD, compiler.POW
+        LT, LE, GT, GE, EQ, NE = compiler.LT, compiler.LE, compiler.GT, \
+            compiler.GE, compiler.EQ, compiler.NE
+        JUMP_LT, JUMP_LE, JUMP_GT, JUMP_GE, JUMP_EQ, JUMP_NE = \
+            compiler.JUMP_LT, compiler.JUMP_LE, compiler.JUMP_GT, \
+            compiler.JUMP_GE, compiler.JUMP_EQ, compiler.JUMP_NE
+        JUMP_NOT_LT, JUMP_NOT_LE, JUMP_NOT_GT, JUMP_NOT_GE, JUMP_NOT_EQ, JUMP_NOT_NE = \
+            compiler.JUMP_NOT_LT, compiler.JUMP_NOT_LE, compiler.JUMP_NOT_GT, \
+            compiler.JUMP_NOT_GE, compiler.JUMP_NOT_EQ, compiler.JUMP_NOT_NE
+        JUMP, JUMP_IF_TRUE, JUMP_IF_FALSE = compiler.JUMP, compiler.JUMP_IF_TRUE, \
+            compiler.JUMP_IF_FALSE
+        MOVE, CHECK, PRINT, NEG, NOT, HALT = compiler.MOVE, compiler.CHECK, \
+            compiler.PRINT, compiler.NEG, compiler.NOT, compiler.HALT
+        write = self.sink.write
+
+        while True:
+            op, a, b, c = instructions[pc]
+            pc += 1
+            if op == ADD:
+                registers[a] = registers[b] + registers[c]
+            elif op == JUMP_LT:
+                if registers[b] < registers[c]:
+                    pc = a
+            elif op == JUMP_NOT_EQ:
+                if not registers[b] == registers[c]:
+                    pc = a
+            elif op == MOD:
+                registers[a] = registers[b] % registers[c]
+            elif op == MUL:
+                registers[a] = registers[b] * registers[c]
+            elif op == SUB:
+                registers[a] = registers[b] - registers[c]
+            elif op == JUMP:
+                pc = a
+            elif op == MOVE:
+                registers[a] = registers[b]
+            elif op == JUMP_IF_FALSE:
+                if not registers[b]:
+                    pc = a
+            elif op == JUMP_IF_TRUE:
+                if registers[b]:
+                    pc = a
+            elif op == DIV:
+                registers[a] = registers[b] / registers[c]
+            elif op == JUMP_NOT_LT:
+                if not registers[b] < registers[c]:
+                    pc = a
+            elif op == JUMP_LE:
+                if registers[b] <= registers[c]:
+                    pc = a
+            elif op == JUMP_NOT_LE:
+                if not registers[b] <= registers[c]:
+                    pc = a
+            elif op == JUMP_GT:
+                if registers[b] > registers[c]:
+                    pc = a
+            elif op == JUMP_NOT_GT:
+                if not registers[b] > registers[c]:
+                    pc = a
+            elif op == JUMP_GE:
+                if registers[b] >= registers[c]:
+                    pc = a
+            elif op == JUMP_NOT_GE:
+                if not registers[b] >= registers[c]:
+                    pc = a
+            elif op == JUMP_EQ:
+                if registers[b] == registers[c]:
+                    pc = a
+            elif op == JUMP_NE:
+                if registers[b] != registers[c]:
+                    pc = a
+            elif op == JUMP_NOT_NE:
+                if not registers[b] != registers[c]:
+                    pc = a
+            elif op == LT:
+                registers[a] = registers[b] < registers[c]
+            elif op == LE:
+                registers[a] = registers[b] <= registers[c]
+            elif op == GT:
+                registers[a] = registers[b] > registers[c]
+            elif op == GE:
+                registers[a] = registers[b] >= registers[c]
+            elif op == EQ:
+                registers[a] = registers[b] == registers[c]
+            elif op == NE:
+                registers[a] = registers[b] != registers[c]
+            elif op == POW:
+                registers[a] = registers[b] ** registers[c]
+            elif op == NEG:
+                registers[a] = - registers[b]
+            elif op == NOT:
+                registers[a] = not registers[b]
+            elif op == CHECK:
+                if registers[a] is None:
+                    raise errors.CliteRuntimeError(self.code_object.names[a] + " not defined!", b)
+            elif op == PRINT:
+                write(registers[a])
+            elif op == HALT:
+                return
+
+
+def run(code_object, sink=None):
+    """
+    A convenience function that runs a compiled program
+    :param code_object: a compiler.CodeObject
+    :param sink: an output.Sink; a buffer on sys.stdout by default
+    :return: the VirtualMachine after the run
+    """
+    machine = VirtualMachine(code_object, sink)
+    machine.run()
+    return machine